@@ -7,12 +7,15 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flasgger import Swagger
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from config import config
+from app.utils.db_routing import RoutingSession
 from app.utils.redis_client import redis_client
 
 # 初始化扩展（但不绑定到特定应用）
-db = SQLAlchemy()
+# 会话按读写路由：replica_read 标记的只读查询走只读副本（见 app/utils/db_routing.py）
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 swagger = Swagger()
 
@@ -31,8 +34,15 @@ def create_app(config_name='default'):
     
     # 加载配置
     app.config.from_object(config[config_name])
+
+    # 部署在反向代理之后时，按可信代理层数从 X-Forwarded-* 还原客户端地址与协议
+    hops = app.config.get('TRUSTED_PROXY_HOPS', 0)
+    if hops > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
     
-    # 初始化扩展
+    # 初始化扩展（使用连接池时换用带指标的连接池）
+    from app.utils.pool_metrics import configure_engine_options
+    configure_engine_options(app)
     db.init_app(app)
     migrate.init_app(app, db)
 
@@ -47,6 +57,10 @@ def create_app(config_name='default'):
 
     # 初始化 Redis
     redis_client.init_app(app)
+
+    # SQL 语句计数（按配置开启）
+    from app.utils import statement_counter
+    statement_counter.init_app(app)
     
     # 初始化 Flasgger（配置已在 config 中设置）
     swagger.init_app(app)
@@ -2,21 +2,32 @@
 ç®¡çå API è·¯ç±
 å¤çç®¡çåç¸å³çè®¾å¤ç®¡çåè½
 """
-from flask import Blueprint, request
+import csv
+import io
+
+from flask import Blueprint, Response, request, stream_with_context
 from flasgger import swag_from
-from app.services import equipment_service
+from app import db
+from app.services import equipment_service, reservation_service
 from app.api.v1.schemas.equipment_schema import (
     EquipmentSchema, EquipmentCreateSchema, EquipmentUpdateSchema
 )
 from app.api.v1.schemas.timeslot_schema import (
     TimeSlotSchema, TimeSlotCreateSchema, TimeSlotUpdateSchema
 )
+from app.api.v1.schemas.reservation_schema import ReservationSchema, ReservationExportQuerySchema
 from app.utils.response import success, fail
 from app.utils.exceptions import NotFoundError, ValidationError
-from app.utils.auth import admin_required
+from app.utils.auth import admin_required, get_user_profile
+from app.utils.pool_metrics import pool_stats
+from app.utils.projection import schema_columns
 from app.utils.redis_client import redis_client
+from app.utils.revocation import revoke_user
+from app.utils.serializer import compile_serializer
 from app.services import timeslot_service
+from app.models.equipment import Equipment
 from app.models.timeslot import TimeSlot
+from app.models.reservation import Reservation
 
 # åå»ºèå¾
 admin_bp = Blueprint('admin', __name__)
@@ -28,6 +39,16 @@ equipment_update_schema = EquipmentUpdateSchema()
 timeslot_schema = TimeSlotSchema()
 timeslot_create_schema = TimeSlotCreateSchema()
 timeslot_update_schema = TimeSlotUpdateSchema()
+equipment_serializer = compile_serializer(equipment_schema)
+timeslot_serializer = compile_serializer(timeslot_schema)
+reservation_schema = ReservationSchema()
+reservation_export_query_schema = ReservationExportQuerySchema()
+reservation_serializer = compile_serializer(reservation_schema)
+reservation_columns = schema_columns(Reservation, reservation_schema)
+# 导出 CSV 的列（与预约响应字段一致）
+RESERVATION_EXPORT_FIELDS = list(reservation_schema.dump_fields)
+# 导出时每累计多少行向客户端发送一次
+EXPORT_FLUSH_ROWS = 500
 
 
 @admin_bp.route('/equipments', methods=['POST'])
@@ -96,10 +117,10 @@ def create_equipment():
         equipment = equipment_service.create_equipment(validated_data)
         
         # æ¸é¤ç¸å³ç¼å­ï¼ä½¿ç¨ééç¬¦å é¤ææç¸å³ç¼å­ï¼
-        _clear_equipment_cache()
+        _clear_equipment_cache(equip_id=equipment.id, lab_ids=[equipment.lab_id])
         
         # åºååè¿å
-        data = equipment_schema.dump(equipment)
+        data = equipment_serializer(equipment)
         return success(data=data, msg='åå»ºæå')
     except ValidationError as e:
         return fail(code=422, msg=e.message, data=e.payload)
@@ -170,15 +191,18 @@ def update_equipment(equip_id):
             return fail(code=422, msg='æ°æ®éªè¯å¤±è´¥', data=errors)
         
         validated_data = equipment_update_schema.load(json_data)
+
+        old_equipment = Equipment.query.get(equip_id)
+        old_lab_id = old_equipment.lab_id if old_equipment else None
         
         # æ´æ°è®¾å¤
         equipment = equipment_service.update_equipment(equip_id, validated_data)
         
         # æ¸é¤ç¸å³ç¼å­
-        _clear_equipment_cache(equip_id=equip_id)
+        _clear_equipment_cache(equip_id=equip_id, lab_ids=[old_lab_id, equipment.lab_id])
         
         # åºååè¿å
-        data = equipment_schema.dump(equipment)
+        data = equipment_serializer(equipment)
         return success(data=data, msg='æ´æ°æå')
     except NotFoundError as e:
         return fail(code=404, msg=e.message)
@@ -227,10 +251,13 @@ def update_equipment(equip_id):
 def delete_equipment(equip_id):
     """ç®¡çåå é¤è®¾å¤"""
     try:
+        equipment = equipment_service.get_equipment_by_id(equip_id)
+        lab_id = equipment.lab_id
         equipment_service.delete_equipment(equip_id)
         
         # æ¸é¤ç¸å³ç¼å­
-        _clear_equipment_cache(equip_id=equip_id)
+        _clear_equipment_cache(equip_id=equip_id, lab_ids=[lab_id])
+        _clear_timeslot_cache(equip_id)
         
         return success(msg='å é¤æå')
     except NotFoundError as e:
@@ -284,7 +311,7 @@ def create_timeslot():
 
         _clear_timeslot_cache(slot.equip_id)
 
-        data = timeslot_schema.dump(slot)
+        data = timeslot_serializer(slot)
         return success(data=data, msg='åå»ºæå')
     except NotFoundError as e:
         return fail(code=404, msg=e.message, data=e.payload)
@@ -352,7 +379,7 @@ def update_timeslot(slot_id):
         if old_equip_id and old_equip_id != slot.equip_id:
             _clear_timeslot_cache(old_equip_id)
 
-        data = timeslot_schema.dump(slot)
+        data = timeslot_serializer(slot)
         return success(data=data, msg='æ´æ°æå')
     except NotFoundError as e:
         return fail(code=404, msg=e.message, data=e.payload)
@@ -396,23 +423,201 @@ def delete_timeslot(slot_id):
         return fail(code=500, msg=f'å é¤å¤±è´¥: {str(e)}')
 
 
-def _clear_equipment_cache(equip_id=None):
+@admin_bp.route('/reservations/export', methods=['GET'])
+@admin_required
+@swag_from({
+    'tags': ['管理员预约管理'],
+    'summary': '导出预约记录',
+    'description': '按筛选条件导出全部预约记录（CSV，UTF-8 带 BOM）。数据库分批读取、边读边发送，不受列表接口每页 100 条的限制。',
+    'security': [{'Bearer': []}],
+    'produces': ['text/csv'],
+    'parameters': [
+        {'name': 'equip_id', 'in': 'query', 'type': 'integer', 'required': False, 'description': '设备ID'},
+        {'name': 'status', 'in': 'query', 'type': 'integer', 'required': False,
+         'enum': [0, 1, 2, 3], 'description': '预约状态'},
+        {'name': 'start_date', 'in': 'query', 'type': 'string', 'format': 'date', 'required': False,
+         'description': '预约开始时间不早于该日期'},
+        {'name': 'end_date', 'in': 'query', 'type': 'string', 'format': 'date', 'required': False,
+         'description': '预约开始时间不晚于该日期（包含当天）'}
+    ],
+    'responses': {
+        200: {'description': 'CSV 文件，首行为字段名'},
+        403: {'description': '需要管理员权限'},
+        422: {'description': '参数校验失败'}
+    }
+})
+def export_reservations():
+    """管理员导出预约记录（CSV）"""
+    errors = reservation_export_query_schema.validate(request.args)
+    if errors:
+        return fail(code=422, msg='参数校验失败', data=errors)
+    params = reservation_export_query_schema.load(request.args)
+    rows = reservation_service.iter_reservation_history(reservation_columns, **params)
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        buffer.write('\ufeff')     # BOM：Excel 按 UTF-8 打开
+        writer.writerow(RESERVATION_EXPORT_FIELDS)
+        for count, row in enumerate(rows, 1):
+            data = reservation_serializer(row)
+            writer.writerow([data.get(field, '') for field in RESERVATION_EXPORT_FIELDS])
+            if count % EXPORT_FLUSH_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename=reservations.csv'}
+    )
+
+
+@admin_bp.route('/cache/stats', methods=['GET'])
+@admin_required
+@swag_from({
+    'tags': ['管理员缓存管理'],
+    'summary': '缓存统计',
+    'description': '按键前缀汇总所有进程的缓存命中率、读取耗时分布与写入大小，用于调整缓存过期时间与缓存位置',
+    'security': [{'Bearer': []}],
+    'responses': {
+        200: {
+            'description': '查询成功',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'code': {'type': 'integer', 'example': 200},
+                    'msg': {'type': 'string', 'example': '查询成功'},
+                    'data': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'prefix': {'type': 'string', 'example': 'api:equipment:list'},
+                                'reads': {'type': 'integer', 'example': 1200},
+                                'hit_rate': {'type': 'number', 'example': 0.93},
+                                'latency_p95_ms': {'type': 'number', 'example': 2},
+                                'write_bytes_avg': {'type': 'integer', 'example': 5120}
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        403: {'description': '需要管理员权限'},
+        503: {'description': '缓存服务不可用'}
+    }
+})
+def get_cache_stats():
+    """管理员查看缓存统计"""
+    stats = redis_client.get_cache_stats()
+    if stats is None:
+        return fail(code=503, msg='缓存服务不可用')
+    return success(data=stats, msg='查询成功')
+
+
+@admin_bp.route('/db/pool', methods=['GET'])
+@admin_required
+@swag_from({
+    'tags': ['管理员系统监控'],
+    'summary': '数据库连接池统计',
+    'description': '当前进程各数据库连接（主库与只读副本）的连接池状态：取连接耗时分布、等待线程数、溢出连接数、超时与探活失败次数，用于调整 DB_POOL_* 配置。多进程部署时每次请求只返回处理该请求的进程的数据。',
+    'security': [{'Bearer': []}],
+    'responses': {
+        200: {
+            'description': '查询成功',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'code': {'type': 'integer', 'example': 200},
+                    'msg': {'type': 'string', 'example': '查询成功'},
+                    'data': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'bind': {'type': 'string', 'example': 'primary'},
+                                'pid': {'type': 'integer', 'example': 4127},
+                                'pool_size': {'type': 'integer', 'example': 10},
+                                'checked_out': {'type': 'integer', 'example': 3},
+                                'overflow': {'type': 'integer', 'example': 0},
+                                'waiting': {'type': 'integer', 'example': 0},
+                                'max_waiting': {'type': 'integer', 'example': 2},
+                                'checkout_p95_ms': {'type': 'number', 'example': 0.5},
+                                'timeouts': {'type': 'integer', 'example': 0},
+                                'ping_failures': {'type': 'integer', 'example': 1}
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        403: {'description': '需要管理员权限'}
+    }
+})
+def get_db_pool_stats():
+    """管理员查看数据库连接池统计"""
+    return success(data=pool_stats(db.engines), msg='查询成功')
+
+
+@admin_bp.route('/users/<string:user_type>/<string:user_id>/revoke-tokens', methods=['POST'])
+@admin_required
+@swag_from({
+    'tags': ['管理员用户管理'],
+    'summary': '吊销用户的全部 token',
+    'description': '使该用户此前签发的所有 token 失效（如账号被盗、停用），所有服务进程在数秒内生效，用户需重新登录',
+    'security': [{'Bearer': []}],
+    'parameters': [
+        {'name': 'user_type', 'in': 'path', 'type': 'string', 'required': True,
+         'enum': ['student', 'teacher', 'admin'], 'description': '用户类型'},
+        {'name': 'user_id', 'in': 'path', 'type': 'string', 'required': True, 'description': '学号/工号'}
+    ],
+    'responses': {
+        200: {'description': '吊销成功'},
+        403: {'description': '需要管理员权限'},
+        404: {'description': '用户不存在'},
+        503: {'description': '吊销服务不可用'}
+    }
+})
+def revoke_user_tokens(user_type, user_id):
+    """管理员吊销用户的全部 token"""
+    if user_type not in ['student', 'teacher', 'admin']:
+        return fail(code=400, msg='user_type 必须是 student, teacher 或 admin')
+    if get_user_profile(user_id, user_type) is None:
+        return fail(code=404, msg='用户不存在')
+    if not revoke_user(user_type, user_id):
+        return fail(code=503, msg='吊销服务不可用')
+    return success(msg='吊销成功')
+
+
+def _clear_equipment_cache(equip_id=None, lab_ids=()):
     """
-    æ¸é¤è®¾å¤ç¸å³ç¼å­
+    清除设备相关缓存
     
     Args:
-        equip_id: è®¾å¤IDï¼å¦ææä¾åæ¸é¤è¯¥è®¾å¤çè¯¦æç¼å­
+        equip_id: 设备ID，如果提供则清除该设备的详情缓存与否定缓存（新增设备时必须提供）
+        lab_ids: 受影响的实验室ID（修改所属实验室时包含新旧两个）
     """
-    # æ¸é¤è¯¦æç¼å­
-    if equip_id:
-        redis_client.delete(f'api:equipment:detail:{equip_id}')
-    
-    # æ³¨æï¼Redis ä¸æ¯æééç¬¦å é¤ï¼åè¡¨ç¼å­ä¼å¨è¿æåèªå¨æ¸é¤
-    # å¦æéè¦ç«å³æ¸é¤ææåè¡¨ç¼å­ï¼å¯ä»¥ä½¿ç¨ Redis SCAN å½ä»¤éåå é¤
-    # è¿éç®åå¤çï¼è®©åè¡¨ç¼å­èªç¶è¿æï¼5åéï¼
+    # 列表缓存键嵌入了目录/实验室版本号，在同一事务中递增全局目录和受影响实验室的版本号，
+    # 所有相关列表缓存立即失效，无需通配符删除；详情删除与版本号递增一次往返提交
+    tags = [equipment_service.catalog_cache_tag()]
+    tags.extend(equipment_service.lab_cache_tag(lab_id) for lab_id in set(lab_ids) if lab_id is not None)
+    with redis_client.pipeline(transaction=True) as pipe:
+        if equip_id:
+            pipe.delete(
+                f'api:equipment:detail:{equip_id}',
+                equipment_service.not_found_cache_key(equip_id)
+            )
+        pipe.bump_generations(*tags)
+
 
 def _clear_timeslot_cache(equip_id):
     """
     Çå³ýÊ±¼ä¶ÎÁÐ±í»º´æ
     """
-    redis_client.delete(f'timeslot:list:{equip_id}')
+    # 时间段配置变更后，该设备的可用时间缓存随版本号递增失效
+    with redis_client.pipeline(transaction=True) as pipe:
+        pipe.delete(f'timeslot:list:{equip_id}')
+        pipe.bump_generations(timeslot_service.timeslot_cache_tag(equip_id))
@@ -4,16 +4,19 @@
 """
 from flask import Blueprint, request
 from flasgger import swag_from
-from werkzeug.security import check_password_hash
-from app.utils.auth import generate_token, get_user_by_id
+from app.utils.auth import cache_user_profile, generate_token, get_current_user, get_user_by_id, login_required
+from app.utils.password import needs_rehash, upgrade_password_hash, verify_password
+from app.utils.rate_limit import rate_limit
+from app.utils.revocation import revoke_token, revoke_user
 from app.utils.response import success, fail
-from app.utils.exceptions import UnauthorizedError, ValidationError
+from app.utils.exceptions import UnauthorizedError, ValidationError, ServiceUnavailableError
 
 # 创建蓝图
 auth_bp = Blueprint('auth', __name__)
 
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limit('login', by='login')
 @swag_from({
     'tags': ['认证管理'],
     'summary': '用户登录',
@@ -73,6 +76,12 @@ auth_bp = Blueprint('auth', __name__)
         },
         401: {
             'description': '登录失败'
+        },
+        429: {
+            'description': '请求过于频繁（响应头 Retry-After 为需等待的秒数）'
+        },
+        503: {
+            'description': '登录请求过多（响应头 Retry-After 为建议的重试秒数）'
         }
     }
 })
@@ -102,9 +111,16 @@ def login():
         if not hasattr(user, 'password_hash') or not user.password_hash:
             raise UnauthorizedError('用户密码未设置')
         
-        if not check_password_hash(user.password_hash, password):
+        if not verify_password(user.password_hash, password):
             raise UnauthorizedError('用户名或密码错误')
         
+        # 哈希参数与当前配置不同时，用本次提交的明文密码重新计算并保存
+        if needs_rehash(user.password_hash):
+            upgrade_password_hash(user, password)
+        
+        # 预热用户资料缓存，后续 /users/me、创建预约等直接读缓存
+        cache_user_profile(user, user_type)
+        
         # 获取实验室ID
         lab_id = None
         if hasattr(user, 'lab_id'):
@@ -137,6 +153,48 @@ def login():
         
     except (UnauthorizedError, ValidationError) as e:
         return fail(code=e.status_code, msg=e.message)
+    except ServiceUnavailableError as e:
+        response, code = fail(code=e.status_code, msg=e.message)
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, code
     except Exception as e:
         return fail(code=500, msg=f'登录失败: {str(e)}')
 
+
+@auth_bp.route('/logout', methods=['POST'])
+@login_required
+@swag_from({
+    'tags': ['认证管理'],
+    'summary': '退出登录',
+    'description': '吊销当前 token，所有服务进程在数秒内拒绝该 token（不含 jti 的旧 token 会吊销该用户此前签发的全部 token）',
+    'security': [{'Bearer': []}],
+    'responses': {
+        200: {
+            'description': '退出成功',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'code': {'type': 'integer', 'example': 200},
+                    'msg': {'type': 'string', 'example': '退出成功'}
+                }
+            }
+        },
+        401: {
+            'description': '未授权'
+        },
+        503: {
+            'description': '吊销服务不可用'
+        }
+    }
+})
+def logout():
+    """退出登录"""
+    current_user = get_current_user()
+    if current_user.get('jti'):
+        revoked = revoke_token(current_user)
+    else:
+        revoked = revoke_user(current_user.get('user_type'), current_user.get('user_id'))
+    if not revoked:
+        return fail(code=503, msg='退出失败，请稍后重试')
+    return success(msg='退出成功')
+
@@ -6,16 +6,23 @@ from flask import Blueprint, request
 from flasgger import swag_from
 from app.services import equipment_service
 from app.api.v1.schemas.equipment_schema import EquipmentSchema
-from app.utils.response import success, fail
-from app.utils.exceptions import NotFoundError
+from app.models.equipment import Equipment
+from app.utils.response import success, fail, cached_success
+from app.utils.exceptions import NotFoundError, ValidationError
 from app.utils.auth import login_required
+from app.utils.pagination import parse_pagination
+from app.utils.projection import schema_columns
 from app.utils.redis_client import redis_client
+from app.utils.serializer import compile_serializer
 
 # 创建蓝图
 equipment_bp = Blueprint('equipment', __name__)
 
 # 实例化 Schema
 equipment_schema = EquipmentSchema()
+equipment_serializer = compile_serializer(equipment_schema)
+# 列表只查询响应需要的列
+equipment_columns = schema_columns(Equipment, equipment_schema)
 
 
 @equipment_bp.route('/', methods=['GET'])
@@ -54,6 +61,20 @@ equipment_schema = EquipmentSchema()
             'type': 'integer',
             'required': False,
             'description': '设备状态筛选'
+        },
+        {
+            'in': 'query',
+            'name': 'cursor',
+            'type': 'string',
+            'required': False,
+            'description': '分页游标（上一页响应中的 next_cursor），不传表示第一页'
+        },
+        {
+            'in': 'query',
+            'name': 'per_page',
+            'type': 'integer',
+            'required': False,
+            'description': '每页数量（1-100，默认 20）'
         }
     ],
     'responses': {
@@ -76,12 +97,19 @@ equipment_schema = EquipmentSchema()
                                 'status': {'type': 'integer', 'example': 1}
                             }
                         }
-                    }
+                    },
+                    'next_cursor': {'type': 'string', 'example': 'WzIwXQ', 'description': '下一页游标，没有下一页时为 null'}
                 }
             }
         },
+        304: {
+            'description': '资源未变化（If-None-Match 与 ETag 一致），无响应体'
+        },
         401: {
             'description': '未授权'
+        },
+        422: {
+            'description': '分页参数无效'
         }
     }
 })
@@ -93,32 +121,39 @@ def get_equipments():
         keyword = request.args.get('keyword', type=str)
         category = request.args.get('category', type=int)
         status = request.args.get('status', type=int)
+        cursor, per_page = parse_pagination(request.args)
         
-        # 构建缓存键（包含所有筛选条件）
-        # 查询 lab_id=1, keyword="显微镜", category=2, status=1
-        # api:equipment:list:lab_1:kw_显微镜:cat_2:st_1
-        cache_key = f'api:equipment:list:lab_{lab_id}:kw_{keyword}:cat_{category}:st_{status}'
-        
-        # 尝试从缓存获取
-        cached_data = redis_client.get(cache_key)
-        if cached_data is not None:
-            return success(data=cached_data, msg='查询成功')
-        
-        # 查询设备列表
-        equipments = equipment_service.get_equipment_list(
-            lab_id=lab_id,
-            keyword=keyword,
-            category=category,
-            status=status
+        # 构建缓存键（包含所有筛选条件、分页位置和列表版本号）
+        # 查询 lab_id=1, keyword="显微镜", category=2, status=1 的第一页
+        # api:equipment:list:lab_1:kw_显微镜:cat_2:st_1:cur_None:n_20:v5
+        # 按实验室筛选时嵌入该实验室的版本号，否则嵌入全局目录版本号；
+        # 管理员修改设备后递增对应版本号，列表缓存立即失效
+        if lab_id is not None:
+            version_tag = equipment_service.lab_cache_tag(lab_id)
+        else:
+            version_tag = equipment_service.catalog_cache_tag()
+        cache_key = redis_client.versioned_key(
+            f'api:equipment:list:lab_{lab_id}:kw_{keyword}:cat_{category}:st_{status}:cur_{cursor}:n_{per_page}',
+            version_tag
         )
         
-        # 序列化
-        data = equipment_schema.dump(equipments, many=True)
-        
-        # 存入缓存（5分钟过期）
-        redis_client.set(cache_key, data, ex=300)
+        def load_equipments():
+            # 查询一页设备并序列化
+            page = equipment_service.get_equipment_list(
+                lab_id=lab_id,
+                keyword=keyword,
+                category=category,
+                status=status,
+                cursor=cursor,
+                per_page=per_page,
+                columns=equipment_columns
+            )
+            return equipment_serializer(page.items, many=True), page.next_cursor
         
-        return success(data=data, msg='查询成功')
+        # 从缓存获取，未命中时并发请求只有一个会查询数据库（1小时过期，失效由版本号保证）
+        return cached_success(cache_key, load_equipments, ex=3600, msg='查询成功', paginated=True)
+    except ValidationError as e:
+        return fail(code=422, msg=e.message, data=e.payload)
     except Exception as e:
         return fail(code=500, msg=f'查询失败: {str(e)}')
 
@@ -158,6 +193,9 @@ def get_equipments():
                 }
             }
         },
+        304: {
+            'description': '资源未变化（If-None-Match 与 ETag 一致），无响应体'
+        },
         404: {
             'description': '设备不存在'
         }
@@ -166,22 +204,13 @@ def get_equipments():
 def get_equipment(equip_id):
     """获取设备详情"""
     try:
-        # 尝试从缓存获取
-        cache_key = f'api:equipment:detail:{equip_id}'
-        cached_data = redis_client.get(cache_key)
-        if cached_data is not None:
-            return success(data=cached_data, msg='查询成功')
-        
-        # 查询设备
-        equipment = equipment_service.get_equipment_by_id(equip_id)
-        
-        # 序列化
-        data = equipment_schema.dump(equipment)
-        
-        # 存入缓存（10分钟过期）
-        redis_client.set(cache_key, data, ex=600)
-        
-        return success(data=data, msg='查询成功')
+        # 查询设备并序列化（缓存10分钟）
+        return cached_success(
+            f'api:equipment:detail:{equip_id}',
+            lambda: equipment_serializer(equipment_service.get_equipment_by_id(equip_id)),
+            ex=600,
+            msg='查询成功'
+        )
     except NotFoundError as e:
         return fail(code=404, msg=e.message)
     except Exception as e:
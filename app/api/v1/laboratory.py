@@ -9,9 +9,11 @@ from app.services import lab_service
 from app.api.v1.schemas.lab_schema import (
     LaboratorySchema, LaboratoryCreateSchema, LaboratoryUpdateSchema
 )
-from app.utils.response import success, fail
+from app.utils.response import success, fail, cached_success
 from app.utils.exceptions import NotFoundError, ValidationError
+from app.utils.pagination import parse_pagination
 from app.utils.redis_client import redis_client
+from app.utils.serializer import compile_serializer
 
 # 创建蓝图
 lab_bp = Blueprint('laboratory', __name__)
@@ -20,13 +22,30 @@ lab_bp = Blueprint('laboratory', __name__)
 lab_schema = LaboratorySchema()
 lab_create_schema = LaboratoryCreateSchema()
 lab_update_schema = LaboratoryUpdateSchema()
+lab_serializer = compile_serializer(lab_schema)
 
 
 @lab_bp.route('/', methods=['GET'])
 @swag_from({
     'tags': ['实验室管理'],
     'summary': '获取实验室列表',
-    'description': '获取所有实验室的列表',
+    'description': '分页获取实验室列表（按 ID 升序）',
+    'parameters': [
+        {
+            'in': 'query',
+            'name': 'cursor',
+            'type': 'string',
+            'required': False,
+            'description': '分页游标（上一页响应中的 next_cursor），不传表示第一页'
+        },
+        {
+            'in': 'query',
+            'name': 'per_page',
+            'type': 'integer',
+            'required': False,
+            'description': '每页数量（1-100，默认 20）'
+        }
+    ],
     'responses': {
         200: {
             'description': '成功返回实验室列表',
@@ -45,30 +64,39 @@ lab_update_schema = LaboratoryUpdateSchema()
                                 'location': {'type': 'string', 'example': '教学楼A101'}
                             }
                         }
-                    }
+                    },
+                    'next_cursor': {'type': 'string', 'example': 'WzIwXQ', 'description': '下一页游标，没有下一页时为 null'}
                 }
             }
+        },
+        304: {
+            'description': '资源未变化（If-None-Match 与 ETag 一致），无响应体'
+        },
+        422: {
+            'description': '分页参数无效'
         }
     }
 })
 def get_labs():
-    """获取所有实验室（带缓存）"""
+    """分页获取实验室（带缓存）"""
     try:
-        # 尝试从缓存获取序列化后的数据
-        cache_key = 'api:lab:list'
-        cached_data = redis_client.get(cache_key)
-        if cached_data is not None:
-            # 缓存命中，直接返回（完全跳过数据库查询和序列化）
-            return success(data=cached_data, msg='查询成功')
+        cursor, per_page = parse_pagination(request.args)
         
-        # 缓存未命中，查询数据库并序列化
-        labs = lab_service.get_lab_list()
-        data = lab_schema.dump(labs, many=True)
+        # 缓存键含分页位置并嵌入列表版本号，实验室增删改后版本递增，所有分页的缓存同时失效
+        cache_key = redis_client.versioned_key(
+            f'api:lab:list:cur_{cursor}:n_{per_page}',
+            lab_service.list_cache_tag()
+        )
         
-        # 存入缓存（10分钟过期）
-        redis_client.set(cache_key, data, ex=600)
+        def load_labs():
+            page = lab_service.get_lab_list(cursor=cursor, per_page=per_page)
+            return lab_serializer(page.items, many=True), page.next_cursor
         
-        return success(data=data, msg='查询成功')
+        # 缓存命中时直接返回已编码的响应体（完全跳过数据库查询和序列化）
+        # 缓存未命中时查询数据库并序列化，并发请求只有一个会执行查询（10分钟过期）
+        return cached_success(cache_key, load_labs, ex=600, msg='查询成功', paginated=True)
+    except ValidationError as e:
+        return fail(code=422, msg=e.message, data=e.payload)
     except Exception as e:
         return fail(code=500, msg=f'查询失败: {str(e)}')
 
@@ -134,10 +162,10 @@ def create_lab():
         lab = lab_service.create_lab(validated_data)
         
         # 清除相关缓存
-        redis_client.delete('api:lab:list')
+        redis_client.bump_generations(lab_service.list_cache_tag())
         
         # 序列化返回
-        data = lab_schema.dump(lab)
+        data = lab_serializer(lab)
         return success(data=data, msg='创建成功')
     except ValidationError as e:
         return fail(code=422, msg=e.message, data=e.payload)
@@ -217,11 +245,11 @@ def update_lab(lab_id):
         lab = lab_service.update_lab(lab_id, validated_data)
         
         # 清除相关缓存
-        redis_client.delete('api:lab:list')
+        redis_client.bump_generations(lab_service.list_cache_tag())
         redis_client.delete(f'api:lab:detail:{lab_id}')
         
         # 序列化返回
-        data = lab_schema.dump(lab)
+        data = lab_serializer(lab)
         return success(data=data, msg='更新成功')
     except NotFoundError as e:
         return fail(code=404, msg=e.message)
@@ -268,7 +296,7 @@ def delete_lab(lab_id):
         lab_service.delete_lab(lab_id)
         
         # 清除相关缓存
-        redis_client.delete('api:lab:list')
+        redis_client.bump_generations(lab_service.list_cache_tag())
         redis_client.delete(f'api:lab:detail:{lab_id}')
         
         return success(msg='删除成功')
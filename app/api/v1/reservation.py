@@ -8,10 +8,15 @@ from app.services import reservation_service
 from app.api.v1.schemas.reservation_schema import (
     ReservationSchema, ReservationCreateSchema, ReservationQuerySchema
 )
-from app.utils.response import success, fail
+from app.models.reservation import Reservation
+from app.utils.response import success, fail, cached_success
 from app.utils.exceptions import NotFoundError, ValidationError
 from app.utils.auth import login_required, get_current_user
+from app.utils.pagination import parse_pagination
+from app.utils.projection import schema_columns
+from app.utils.rate_limit import rate_limit
 from app.utils.redis_client import redis_client
+from app.utils.serializer import compile_serializer
 
 # 创建蓝图
 reservation_bp = Blueprint('reservation', __name__)
@@ -20,10 +25,14 @@ reservation_bp = Blueprint('reservation', __name__)
 reservation_schema = ReservationSchema()
 reservation_create_schema = ReservationCreateSchema()
 reservation_query_schema = ReservationQuerySchema()
+reservation_serializer = compile_serializer(reservation_schema)
+# 列表只查询响应需要的列
+reservation_columns = schema_columns(Reservation, reservation_schema)
 
 
 @reservation_bp.route('/', methods=['POST'])
 @login_required
+@rate_limit('reservation_create', by='user')
 @swag_from({
     'tags': ['预约管理'],
     'summary': '创建预约',
@@ -68,6 +77,9 @@ reservation_query_schema = ReservationQuerySchema()
         },
         422: {
             'description': '数据验证失败'
+        },
+        429: {
+            'description': '请求过于频繁（响应头 Retry-After 为需等待的秒数）'
         }
     }
 })
@@ -92,7 +104,7 @@ def create_reservation():
         reservation = reservation_service.create_reservation(validated_data, current_user)
         
         # 序列化返回
-        data = reservation_schema.dump(reservation)
+        data = reservation_serializer(reservation)
         return success(data=data, msg='创建成功')
     except ValidationError as e:
         return fail(code=422, msg=e.message, data=e.payload)
@@ -121,6 +133,20 @@ def create_reservation():
             'type': 'integer',
             'required': False,
             'description': '状态筛选 (0:待审, 1:通过, 2:拒绝, 3:已取消)'
+        },
+        {
+            'in': 'query',
+            'name': 'cursor',
+            'type': 'string',
+            'required': False,
+            'description': '分页游标（上一页响应中的 next_cursor），不传表示第一页'
+        },
+        {
+            'in': 'query',
+            'name': 'per_page',
+            'type': 'integer',
+            'required': False,
+            'description': '每页数量（1-100，默认 20）'
         }
     ],
     'responses': {
@@ -143,12 +169,19 @@ def create_reservation():
                                 'equip_name': {'type': 'string', 'example': '扫描电子显微镜'}
                             }
                         }
-                    }
+                    },
+                    'next_cursor': {'type': 'string', 'example': 'WzIwXQ', 'description': '下一页游标，没有下一页时为 null'}
                 }
             }
         },
+        304: {
+            'description': '资源未变化（If-None-Match 与 ETag 一致），无响应体'
+        },
         401: {
             'description': '未授权'
+        },
+        422: {
+            'description': '分页参数无效'
         }
     }
 })
@@ -158,33 +191,34 @@ def get_my_reservations():
         # 获取查询参数
         equip_id = request.args.get('equip_id', type=int)
         status = request.args.get('status', type=int)
+        cursor, per_page = parse_pagination(request.args)
         
         # 获取当前用户
         current_user = get_current_user()
         
-        # 构建缓存键
-        cache_key = f'api:reservation:list:user_{current_user["user_id"]}:type_{current_user["user_type"]}:equip_{equip_id}:status_{status}'
-        
-        # 尝试从缓存获取
-        cached_data = redis_client.get(cache_key)
-        if cached_data is not None:
-            return success(data=cached_data, msg='查询成功')
-        
-        # 查询预约列表
-        reservations = reservation_service.get_reservation_list(
-            user_id=current_user['user_id'],
-            user_type=current_user['user_type'],
-            equip_id=equip_id,
-            status=status
+        # 构建缓存键（含分页位置，嵌入该用户预约列表的版本号，预约变更后版本递增，所有分页的旧缓存自动失效）
+        cache_key = redis_client.versioned_key(
+            f'api:reservation:list:user_{current_user["user_id"]}:type_{current_user["user_type"]}:equip_{equip_id}:status_{status}:cur_{cursor}:n_{per_page}',
+            reservation_service.user_cache_tag(current_user['user_type'], current_user['user_id'])
         )
         
-        # 序列化
-        data = reservation_schema.dump(reservations, many=True)
+        def load_reservations():
+            # 查询一页预约并序列化
+            page = reservation_service.get_reservation_list(
+                user_id=current_user['user_id'],
+                user_type=current_user['user_type'],
+                equip_id=equip_id,
+                status=status,
+                cursor=cursor,
+                per_page=per_page,
+                columns=reservation_columns
+            )
+            return reservation_serializer(page.items, many=True), page.next_cursor
         
-        # 存入缓存（5分钟过期）
-        redis_client.set(cache_key, data, ex=300)
-        
-        return success(data=data, msg='查询成功')
+        # 缓存5分钟
+        return cached_success(cache_key, load_reservations, ex=300, msg='查询成功', paginated=True)
+    except ValidationError as e:
+        return fail(code=422, msg=e.message, data=e.payload)
     except Exception as e:
         return fail(code=500, msg=f'查询失败: {str(e)}')
 
@@ -224,6 +258,9 @@ def get_my_reservations():
                 }
             }
         },
+        304: {
+            'description': '资源未变化（If-None-Match 与 ETag 一致），无响应体'
+        },
         404: {
             'description': '预约不存在'
         }
@@ -232,22 +269,13 @@ def get_my_reservations():
 def get_reservation(reservation_id):
     """获取预约详情"""
     try:
-        # 尝试从缓存获取
-        cache_key = f'api:reservation:detail:{reservation_id}'
-        cached_data = redis_client.get(cache_key)
-        if cached_data is not None:
-            return success(data=cached_data, msg='查询成功')
-        
-        # 查询预约
-        reservation = reservation_service.get_reservation_by_id(reservation_id)
-        
-        # 序列化
-        data = reservation_schema.dump(reservation)
-        
-        # 存入缓存（10分钟过期）
-        redis_client.set(cache_key, data, ex=600)
-        
-        return success(data=data, msg='查询成功')
+        # 查询预约并序列化（缓存10分钟）
+        return cached_success(
+            f'api:reservation:detail:{reservation_id}',
+            lambda: reservation_serializer(reservation_service.get_reservation_by_id(reservation_id)),
+            ex=600,
+            msg='查询成功'
+        )
     except NotFoundError as e:
         return fail(code=404, msg=e.message)
     except Exception as e:
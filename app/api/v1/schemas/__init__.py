@@ -9,7 +9,8 @@ from app.api.v1.schemas.equipment_schema import (
     EquipmentSchema, EquipmentCreateSchema, EquipmentUpdateSchema, EquipmentQuerySchema
 )
 from app.api.v1.schemas.timeslot_schema import (
-    TimeSlotSchema, TimeSlotCreateSchema, TimeSlotUpdateSchema
+    TimeSlotSchema, TimeSlotCreateSchema, TimeSlotUpdateSchema,
+    AvailableDaySchema, TimeSlotAvailableQuerySchema
 )
 
 __all__ = [
@@ -23,4 +24,6 @@ __all__ = [
     'TimeSlotSchema',
     'TimeSlotCreateSchema',
     'TimeSlotUpdateSchema',
+    'AvailableDaySchema',
+    'TimeSlotAvailableQuerySchema',
 ]
@@ -3,7 +3,7 @@
 用于数据验证和序列化
 """
 from marshmallow import fields, validate
-from app.utils.schemas import BaseCreateSchema, BaseUpdateSchema, BaseSchema
+from app.utils.schemas import BaseCreateSchema, BaseUpdateSchema, BaseSchema, BaseQuerySchema
 
 
 class ReservationSchema(BaseSchema):
@@ -44,4 +44,12 @@ class ReservationUpdateSchema(BaseUpdateSchema):
 class ReservationQuerySchema(BaseSchema):
     """预约查询 Schema（用于 GET 请求参数）"""
     equip_id = fields.Integer(allow_none=True, description='设备ID筛选')
-    status = fields.Integer(allow_none=True, validate=validate.OneOf([0, 1, 2, 3]), description='状态筛选')
\ No newline at end of file
+    status = fields.Integer(allow_none=True, validate=validate.OneOf([0, 1, 2, 3]), description='状态筛选')
+
+
+class ReservationExportQuerySchema(BaseQuerySchema):
+    """预约导出查询参数 Schema（日期按预约开始时间筛选，包含结束日期当天）"""
+    equip_id = fields.Integer(missing=None, validate=validate.Range(min=1), description='设备ID筛选')
+    status = fields.Integer(missing=None, validate=validate.OneOf([0, 1, 2, 3]), description='状态筛选')
+    start_date = fields.Date(missing=None, error_messages={'invalid': '开始日期格式必须为 YYYY-MM-DD'}, description='开始日期')
+    end_date = fields.Date(missing=None, error_messages={'invalid': '结束日期格式必须为 YYYY-MM-DD'}, description='结束日期（包含）')
@@ -2,7 +2,7 @@
 时间段 Schema 定义
 """
 from marshmallow import fields, pre_load, ValidationError as MarshmallowValidationError
-from app.utils.schemas import BaseSchema, BaseCreateSchema, BaseUpdateSchema
+from app.utils.schemas import BaseSchema, BaseCreateSchema, BaseUpdateSchema, BaseQuerySchema
 
 
 def _normalize_time_string(value):
@@ -63,3 +63,22 @@ class TimeSlotUpdateSchema(BaseUpdateSchema):
             if key in data:
                 data[key] = _normalize_time_string(data[key])
         return data
+
+
+class AvailableWindowSchema(BaseSchema):
+    """可用时间窗口响应 Schema"""
+    slot_id = fields.Integer(dump_only=True, description='所属时间段ID')
+    start_time = fields.Time(dump_only=True, format='%H:%M:%S', description='窗口开始时间')
+    end_time = fields.Time(dump_only=True, format='%H:%M:%S', description='窗口结束时间')
+
+
+class AvailableDaySchema(BaseSchema):
+    """单日可用时间响应 Schema"""
+    date = fields.Date(dump_only=True, description='日期')
+    windows = fields.List(fields.Nested(AvailableWindowSchema), dump_only=True, description='当天的可用时间窗口')
+
+
+class TimeSlotAvailableQuerySchema(BaseQuerySchema):
+    """可用时间查询参数 Schema"""
+    start_date = fields.Date(error_messages={'invalid': '开始日期格式必须为 YYYY-MM-DD'}, description='开始日期')
+    end_date = fields.Date(error_messages={'invalid': '结束日期格式必须为 YYYY-MM-DD'}, description='结束日期（包含）')
@@ -1,19 +1,26 @@
 """
 时间段 API 路由
 """
+from datetime import date, timedelta
 from flask import Blueprint, request
 from flasgger import swag_from
 
-from app.services import timeslot_service
-from app.api.v1.schemas.timeslot_schema import TimeSlotSchema
-from app.utils.response import success, fail
+from app.services import timeslot_service, reservation_service
+from app.api.v1.schemas.timeslot_schema import (
+    TimeSlotSchema, AvailableDaySchema, TimeSlotAvailableQuerySchema
+)
+from app.utils.response import fail, cached_success, encode_success, raw_success
 from app.utils.auth import login_required
 from app.utils.exceptions import NotFoundError, ValidationError
 from app.utils.redis_client import redis_client
+from app.utils.serializer import compile_serializer
 
 timeslot_bp = Blueprint('timeslot', __name__)
 
 timeslot_schema = TimeSlotSchema()
+available_day_schema = AvailableDaySchema()
+available_query_schema = TimeSlotAvailableQuerySchema()
+timeslot_serializer = compile_serializer(timeslot_schema)
 
 
 @timeslot_bp.route('/equipment/<int:equip_id>', methods=['GET'])
@@ -62,6 +69,9 @@ timeslot_schema = TimeSlotSchema()
                     }
                 }
             }
+        },
+        304: {
+            'description': '资源未变化（If-None-Match 与 ETag 一致），无响应体'
         }
     }
 })
@@ -69,20 +79,14 @@ def get_timeslots(equip_id):
     try:
         only_active = str(request.args.get('only_active', '')).lower() in ('true', '1')
 
-        # 仅对完整列表做缓存，only_active 时不使用缓存以避免歧义
-        cache_key = f'timeslot:list:{equip_id}'
-        if not only_active:
-            cached_data = redis_client.get(cache_key)
-            if cached_data is not None:
-                return success(data=cached_data, msg='查询成功')
-
-        slots = timeslot_service.get_timeslots_by_equipment(equip_id, only_active=only_active)
-        data = timeslot_schema.dump(slots, many=True)
+        def load_timeslots():
+            slots = timeslot_service.get_timeslots_by_equipment(equip_id, only_active=only_active)
+            return timeslot_serializer(slots, many=True)
 
-        if not only_active:
-            redis_client.set(cache_key, data, ex=3600)
-
-        return success(data=data, msg='查询成功')
+        # 仅对完整列表做缓存，only_active 时不使用缓存以避免歧义
+        if only_active:
+            return raw_success(encode_success(load_timeslots(), msg='查询成功'))
+        return cached_success(f'timeslot:list:{equip_id}', load_timeslots, ex=3600, msg='查询成功')
     except NotFoundError as e:
         return fail(code=404, msg=e.message, data=e.payload)
     except ValidationError as e:
@@ -95,8 +99,8 @@ def get_timeslots(equip_id):
 @login_required
 @swag_from({
     'tags': ['时间段管理'],
-    'summary': '获取设备可用时间段',
-    'description': '返回设备可用时间段（当前仅返回 is_active=1 的时间段，后续需结合预约排除占用时间段）。',
+    'summary': '获取设备可用时间',
+    'description': '将激活的每日时间段展开到日期范围内的每一天，扣除待审/已通过预约占用的时间，按天返回空闲时间窗口。默认查询今天起 7 天，最多 90 天。',
     'security': [{'Bearer': []}],
     'parameters': [
         {
@@ -105,11 +109,27 @@ def get_timeslots(equip_id):
             'required': True,
             'type': 'integer',
             'description': '设备ID'
+        },
+        {
+            'in': 'query',
+            'name': 'start_date',
+            'required': False,
+            'type': 'string',
+            'format': 'date',
+            'description': '开始日期（YYYY-MM-DD，默认今天）'
+        },
+        {
+            'in': 'query',
+            'name': 'end_date',
+            'required': False,
+            'type': 'string',
+            'format': 'date',
+            'description': '结束日期（YYYY-MM-DD，包含当天，默认开始日期后 6 天）'
         }
     ],
     'responses': {
         200: {
-            'description': '成功返回可用时间段列表',
+            'description': '成功返回每日可用时间窗口',
             'schema': {
                 'type': 'object',
                 'properties': {
@@ -120,24 +140,53 @@ def get_timeslots(equip_id):
                         'items': {
                             'type': 'object',
                             'properties': {
-                                'slot_id': {'type': 'integer', 'example': 1},
-                                'equip_id': {'type': 'integer', 'example': 1},
-                                'start_time': {'type': 'string', 'example': '09:00:00'},
-                                'end_time': {'type': 'string', 'example': '10:00:00'},
-                                'is_active': {'type': 'integer', 'example': 1}
+                                'date': {'type': 'string', 'example': '2026-01-05'},
+                                'windows': {
+                                    'type': 'array',
+                                    'items': {
+                                        'type': 'object',
+                                        'properties': {
+                                            'slot_id': {'type': 'integer', 'example': 1},
+                                            'start_time': {'type': 'string', 'example': '09:30:00'},
+                                            'end_time': {'type': 'string', 'example': '10:00:00'}
+                                        }
+                                    }
+                                }
                             }
                         }
                     }
                 }
             }
+        },
+        304: {
+            'description': '资源未变化（If-None-Match 与 ETag 一致），无响应体'
+        },
+        422: {
+            'description': '日期参数校验失败'
         }
     }
 })
 def get_available_timeslots(equip_id):
     try:
-        slots = timeslot_service.get_available_timeslots(equip_id)
-        data = timeslot_schema.dump(slots, many=True)
-        return success(data=data, msg='查询成功')
+        errors = available_query_schema.validate(request.args)
+        if errors:
+            return fail(code=422, msg='参数校验失败', data=errors)
+        params = available_query_schema.load(request.args)
+        start_date = params.get('start_date') or date.today()
+        end_date = params.get('end_date') or start_date + timedelta(days=6)
+
+        # 缓存键嵌入设备预约与时间段配置的版本号，任一变更后旧缓存自动失效
+        cache_key = redis_client.versioned_key(
+            f'api:timeslot:available:{equip_id}:{start_date.isoformat()}:{end_date.isoformat()}',
+            reservation_service.equipment_cache_tag(equip_id),
+            timeslot_service.timeslot_cache_tag(equip_id)
+        )
+
+        def load_available():
+            days = timeslot_service.get_available_timeslots(equip_id, start_date=start_date, end_date=end_date)
+            return available_day_schema.dump(days, many=True)
+
+        return cached_success(cache_key, load_available, ex=300, msg='查询成功')
     except NotFoundError as e:
         return fail(code=404, msg=e.message, data=e.payload)
     except ValidationError as e:
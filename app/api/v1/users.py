@@ -4,7 +4,7 @@
 """
 from flask import Blueprint
 from flasgger import swag_from
-from app.utils.auth import login_required, get_current_user, get_user_by_id
+from app.utils.auth import login_required, get_current_user, get_user_profile
 from app.utils.response import success, fail
 from app.utils.exceptions import NotFoundError
 
@@ -52,19 +52,15 @@ def get_current_user_info():
         user_id = current_user.get('user_id')
         user_type = current_user.get('user_type')
         
-        # 获取用户对象
-        user = get_user_by_id(user_id, user_type)
-        if not user:
+        # 获取用户资料（读缓存，不含密码哈希；学生资料包含实验室名称 lab_name）
+        profile = get_user_profile(user_id, user_type)
+        if not profile:
             raise NotFoundError('用户不存在')
         
         # 构建用户信息
-        user_data = user.to_dict()
+        user_data = dict(profile)
         user_data['user_type'] = user_type
         
-        # 如果是学生，添加实验室名称
-        if user_type == 'student' and hasattr(user, 'lab_name'):
-            user_data['lab_name'] = user.lab_name
-        
         return success(data=user_data, msg='获取成功')
         
     except NotFoundError as e:
@@ -1,7 +1,7 @@
 """
 Flask CLI 命令模块
 """
-from app.commands import seed
+from app.commands import seed, bench, cache
 
-__all__ = ['seed']
+__all__ = ['seed', 'bench', 'cache']
 
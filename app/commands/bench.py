@@ -0,0 +1,396 @@
+"""
+性能基准命令
+用于对比缓存、认证、限流等热点路径不同实现的耗时与体积，均不依赖应用数据库
+"""
+import contextlib
+import logging
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import click
+import jwt
+from flask import current_app, g, request
+from flask.cli import with_appcontext
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.api.v1.schemas.equipment_schema import EquipmentSchema
+from app.api.v1.schemas.lab_schema import LaboratorySchema
+from app.api.v1.schemas.reservation_schema import ReservationSchema
+from app.api.v1.schemas.timeslot_schema import TimeSlotSchema
+from app.models.reservation import Reservation
+from app.utils import auth
+from app.utils.codec import ValueCodec
+from app.utils.memory_backend import MemoryBackend
+from app.utils.password import PasswordPool
+from app.utils.projection import fetch_rows, schema_columns, stream_rows
+from app.utils.redis_client import redis_client
+from app.utils.serializer import compile_serializer
+
+
+@click.group('bench')
+def bench():
+    """性能基准测试"""
+
+
+def _timeit(func, number: int) -> float:
+    """执行 number 次，返回单次平均耗时（微秒）"""
+    started = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - started) / number * 1e6
+
+
+def _sample_catalog(size: int) -> list:
+    """模拟设备目录列表缓存"""
+    return [
+        {
+            'id': i,
+            'name': f'高效液相色谱仪-{i}',
+            'lab_id': i % 20 + 1,
+            'category': i % 3 + 1,
+            'status': 1,
+            'location': f'实验楼 {i % 8 + 1} 层 {i % 30 + 100} 室',
+            'description': '用于样品分离与定量分析，使用前请阅读操作规程并完成培训。',
+            'price': f'{1000 + i * 13.5:.2f}',
+        }
+        for i in range(size)
+    ]
+
+
+def _sample_reservations(size: int) -> list:
+    """模拟预约历史列表缓存"""
+    base = datetime(2026, 1, 1, 8, 0)
+    return [
+        {
+            'id': 100000 + i,
+            'equip_id': i % 50 + 1,
+            'student_id': f'2023{i % 200:03d}',
+            'student_name': '张三',
+            'apply_time': (base + timedelta(hours=i)).isoformat(),
+            'start_time': (base + timedelta(days=i % 30, hours=2)).isoformat(),
+            'end_time': (base + timedelta(days=i % 30, hours=4)).isoformat(),
+            'status': i % 4,
+            'purpose': '课题组实验测试',
+        }
+        for i in range(size)
+    ]
+
+
+@bench.command('codec')
+@click.option('--size', default=500, help='列表条目数（默认：500）')
+@click.option('--number', default=200, help='每项重复次数（默认：200）')
+@click.option('--threshold', default=1024, help='压缩阈值字节数（默认：1024）')
+def bench_codec(size, number, threshold):
+    """
+    对比缓存值编解码方案
+
+    legacy 为原有的 JSON 路径（json.dumps(ensure_ascii=False) / json.loads），
+    其余为带版本标记的新格式，分别给出不压缩与按阈值压缩的结果。
+    """
+    codecs = [
+        ('legacy', ValueCodec('legacy')),
+        ('json', ValueCodec('json', compress_threshold=0)),
+        ('json+zlib', ValueCodec('json', compress_threshold=threshold)),
+    ]
+    msgpack_codec = ValueCodec('msgpack', compress_threshold=0)
+    if msgpack_codec.name == 'msgpack':
+        codecs.append(('msgpack', msgpack_codec))
+        codecs.append(('msgpack+zlib', ValueCodec('msgpack', compress_threshold=threshold)))
+    else:
+        click.echo('[WARN] 未安装 msgpack，跳过 msgpack 方案')
+
+    for title, payload in (('设备目录', _sample_catalog(size)), ('预约历史', _sample_reservations(size))):
+        click.echo(f'\n{title}（{size} 条，每项 {number} 次）')
+        click.echo(f'  {"方案":<14}{"体积(B)":>10}{"编码(us)":>12}{"解码(us)":>12}')
+        for name, codec in codecs:
+            encoded = codec.encode(payload)
+            if isinstance(encoded, str):
+                encoded = encoded.encode('utf-8')
+            assert codec.decode(encoded) == payload
+            encode_us = _timeit(lambda: codec.encode(payload), number)
+            decode_us = _timeit(lambda: codec.decode(encoded), number)
+            click.echo(f'  {name:<14}{len(encoded):>10}{encode_us:>12.1f}{decode_us:>12.1f}')
+
+
+def _legacy_get_current_user():
+    """改造前的认证路径：三次请求头查找、两次 print、每次 jwt.decode"""
+    auth_header = (
+        request.headers.get('Authorization', '') or
+        request.headers.get('authorization', '') or
+        request.headers.get('AUTHORIZATION', '')
+    )
+    token = auth_header[7:] if auth_header.startswith('Bearer ') else auth_header
+    print(f"[DEBUG] 收到 token: {token[:20]}...")
+    payload = jwt.decode(token, current_app.config.get('SECRET_KEY', 'dev-secret-key'), algorithms=['HS256'])
+    print(f"[DEBUG] Token 验证成功: {payload}")
+    g.current_user = payload
+    return payload
+
+
+@bench.command('auth')
+@click.option('--number', default=20000, help='重复次数（默认：20000）')
+@with_appcontext
+def bench_auth(number):
+    """
+    对比每个请求的认证开销
+
+    legacy 为改造前的 get_current_user（print 输出重定向到 /dev/null，实际写终端/日志会更慢），
+    decode 为不使用缓存的 jwt.decode，cached 为当前带验证缓存的 get_current_user。
+    """
+    token = auth.generate_token('2023001', 'student', 1)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def run(func):
+        # 同一请求上下文内重复执行，每次清除 g.current_user 模拟新请求
+        def once():
+            g.pop('current_user', None)
+            func()
+        return once
+
+    # 按生产环境的日志级别测量（开发模式下 DEBUG 日志会逐条输出）
+    logger = current_app.logger
+    previous_level = logger.level
+    logger.setLevel(logging.INFO)
+    try:
+        with current_app.test_request_context(headers=headers):
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                legacy = _timeit(run(_legacy_get_current_user), number)
+            decode = _timeit(run(lambda: auth.decode_token(token)), number)
+            auth.get_current_user()     # 预热验证缓存
+            cached = _timeit(run(auth.get_current_user), number)
+    finally:
+        logger.setLevel(previous_level)
+
+    click.echo(f'每个请求的认证开销（{number} 次平均）')
+    click.echo(f'  {"legacy":<10}{legacy:>10.1f} us')
+    click.echo(f'  {"decode":<10}{decode:>10.1f} us')
+    click.echo(f'  {"cached":<10}{cached:>10.1f} us')
+
+
+@bench.command('password')
+@click.option('--method', default=None, help='哈希方法（默认：PASSWORD_HASH_METHOD）')
+@click.option('--number', default=20, help='每个并发的校验次数（默认：20）')
+@click.option('--workers', default=0, help='线程池大小（默认：CPU 核数）')
+@with_appcontext
+def bench_password(method, number, workers):
+    """
+    测量每核每秒可完成的登录密码校验次数
+
+    serial 为在请求线程中直接校验（改造前的方式），pool 为 workers 个并发请求
+    通过密码线程池校验；per core 按 min(workers, CPU 核数) 折算。
+    """
+    method = method or current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt')
+    workers = workers or os.cpu_count() or 1
+    pwhash = generate_password_hash('bench-password', method=method)
+    cores = min(workers, os.cpu_count() or 1)
+
+    serial = _timeit(lambda: check_password_hash(pwhash, 'bench-password'), number)
+
+    pool = PasswordPool(workers=workers, max_pending=workers * 4, timeout=60)
+    barrier = threading.Barrier(workers)
+
+    def client():
+        barrier.wait()
+        for _ in range(number):
+            pool.run(check_password_hash, pwhash, 'bench-password')
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as clients:
+            started = time.perf_counter()
+            for future in [clients.submit(client) for _ in range(workers)]:
+                future.result()
+            elapsed = time.perf_counter() - started
+    finally:
+        pool.shutdown()
+    throughput = workers * number / elapsed
+
+    click.echo(f'密码校验吞吐（{pwhash.partition("$")[0]}，线程池 {workers}，CPU {os.cpu_count()} 核）')
+    click.echo(f'  {"serial":<10}{1e6 / serial:>10.1f} 次/秒（单次 {serial / 1000:.1f} ms）')
+    click.echo(f'  {"pool":<10}{throughput:>10.1f} 次/秒')
+    click.echo(f'  {"per core":<10}{throughput / cores:>10.1f} 次/秒')
+
+
+@bench.command('ratelimit')
+@click.option('--number', default=2000, help='重复次数（默认：2000）')
+@with_appcontext
+def bench_ratelimit(number):
+    """
+    测量每次限流检查的开销
+
+    backend 为当前配置的缓存后端（redis 时为一次 EVALSHA 往返），
+    fallback 为 Redis 不可用时使用的进程内令牌桶。
+    """
+    key = 'ratelimit:bench:127.0.0.1'
+    fallback = MemoryBackend()
+    if redis_client.backend == 'redis':
+        # 启动时熔断器处于打开状态，等待后台首次探测
+        time.sleep(0.5)
+    if redis_client.take_token(key, rate=number, capacity=number) is None:
+        backend = None
+        click.echo('[WARN] Redis 不可用，跳过 backend')
+    else:
+        backend = _timeit(lambda: redis_client.take_token(key, rate=number, capacity=number), number)
+        redis_client.delete(key)
+    local = _timeit(lambda: fallback.token_bucket(key, number, number), number)
+
+    click.echo(f'每次限流检查的开销（{number} 次平均）')
+    if backend is not None:
+        click.echo(f'  {redis_client.backend:<10}{backend:>10.1f} us')
+    click.echo(f'  {"fallback":<10}{local:>10.1f} us')
+
+
+def _sample_rows(schema_name: str, size: int) -> list:
+    """模拟 ORM 查询结果（按属性取值，可空字段约一半为 None）"""
+    base = datetime(2026, 1, 1, 8, 0)
+    if schema_name == 'lab':
+        return [SimpleNamespace(id=i, name=f'实验室-{i}', location=f'实验楼 {i % 8 + 1} 层' if i % 2 else None)
+                for i in range(size)]
+    if schema_name == 'equipment':
+        return [SimpleNamespace(id=i, name=f'高效液相色谱仪-{i}', lab_id=i % 20 + 1 if i % 3 else None,
+                                category=i % 2 + 1, status=1,
+                                next_avail_time=base + timedelta(hours=i) if i % 2 else None)
+                for i in range(size)]
+    if schema_name == 'timeslot':
+        return [SimpleNamespace(slot_id=i, equip_id=i % 50 + 1, start_time=dt_time(8 + i % 10, 0),
+                                end_time=dt_time(9 + i % 10, 30), is_active=1)
+                for i in range(size)]
+    return [
+        SimpleNamespace(
+            id=100000 + i,
+            student_id=f'2023{i % 200:03d}' if i % 2 else None,
+            teacher_id=None if i % 2 else f'T{i % 50:03d}',
+            equip_id=i % 50 + 1,
+            status=i % 4,
+            apply_time=base + timedelta(hours=i),
+            approver_id='A001' if i % 4 else None,
+            approve_time=base + timedelta(hours=i, minutes=30) if i % 4 else None,
+            user_name='张三',
+            equip_name=f'高效液相色谱仪-{i % 50}',
+            price=Decimal(f'{100 + i * 1.5:.2f}'),
+            start_time=base + timedelta(days=i % 30, hours=2),
+            end_time=base + timedelta(days=i % 30, hours=4),
+        )
+        for i in range(size)
+    ]
+
+
+@bench.command('serialize')
+@click.option('--size', default=2000, help='列表条目数（默认：2000）')
+@click.option('--number', default=20, help='每项重复次数（默认：20）')
+@with_appcontext
+def bench_serialize(size, number):
+    """
+    对比列表接口的序列化开销
+
+    legacy 为 BaseSchema.dump(many=True)（marshmallow 序列化后再递归过滤 None），
+    compiled 为 compile_serializer 生成的专用函数；两者按响应的 JSON 编码逐字节比对。
+    """
+    schemas = [
+        ('lab', LaboratorySchema()),
+        ('equipment', EquipmentSchema()),
+        ('timeslot', TimeSlotSchema()),
+        ('reservation', ReservationSchema()),
+    ]
+    dumps = current_app.json.dumps
+
+    click.echo(f'列表序列化开销（{size} 条，每项 {number} 次平均）')
+    click.echo(f'  {"Schema":<14}{"legacy(ms)":>12}{"compiled(ms)":>14}{"加速":>8}')
+    for name, schema in schemas:
+        rows = _sample_rows(name, size)
+        serializer = compile_serializer(schema)
+        if dumps(serializer(rows, many=True)) != dumps(schema.dump(rows, many=True)):
+            raise click.ClickException(f'{name}: 编译结果与 schema.dump 不一致')
+        legacy = _timeit(lambda: schema.dump(rows, many=True), number) / 1000
+        compiled = _timeit(lambda: serializer(rows, many=True), number) / 1000
+        click.echo(f'  {name:<14}{legacy:>12.2f}{compiled:>14.2f}{legacy / compiled:>7.1f}x')
+
+
+def _measure(func) -> tuple:
+    """执行一次，返回 (耗时 ms, Python 堆内存峰值 MB)；耗时与内存分两次测量，避免 tracemalloc 拖慢计时"""
+    started = time.perf_counter()
+    func()
+    elapsed = (time.perf_counter() - started) * 1000
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+@bench.command('query')
+@click.option('--size', default=50000, help='预约条数（默认：50000）')
+@click.option('--batch-size', default=1000, help='流式读取每批行数（默认：1000）')
+@with_appcontext
+def bench_query(size, batch_size):
+    """
+    对比读取一个用户全部预约历史的耗时与内存峰值
+
+    在临时 SQLite 库中写入 size 条预约后，分别按三种方式查询并序列化：
+    orm 为加载完整 ORM 实体，projected 为只查询响应列、由行元组构造字典，
+    streamed 为在 projected 基础上按 yield_per 分批读取、逐行序列化。
+    """
+    schema = ReservationSchema()
+    serializer = compile_serializer(schema)
+    columns = schema_columns(Reservation, schema)
+    base = datetime(2026, 1, 1, 8, 0)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = create_engine(f'sqlite:///{tmpdir}/bench.db')
+        Reservation.__table__.create(engine)
+        with engine.begin() as conn:
+            conn.execute(insert(Reservation.__table__), [
+                {
+                    'id': i + 1,
+                    'student_id': '2023001',
+                    'equip_id': i % 50 + 1,
+                    'status': i % 4,
+                    'apply_time': base + timedelta(minutes=i),
+                    'user_name': '张三',
+                    'equip_name': f'高效液相色谱仪-{i % 50}',
+                    'price': Decimal(f'{100 + i % 100 * 1.5:.2f}'),
+                    'start_time': base + timedelta(days=i % 30, hours=2),
+                    'end_time': base + timedelta(days=i % 30, hours=4),
+                }
+                for i in range(size)
+            ])
+
+        condition = Reservation.student_id == '2023001'
+        order = (Reservation.apply_time.desc(), Reservation.id.desc())
+
+        def orm():
+            with Session(engine) as session:
+                items = session.scalars(select(Reservation).where(condition).order_by(*order)).all()
+                return serializer(items, many=True)
+
+        def projected():
+            with Session(engine) as session:
+                rows = fetch_rows(select(*columns).where(condition).order_by(*order), session=session)
+                return serializer(rows, many=True)
+
+        def streamed():
+            with Session(engine) as session:
+                rows = stream_rows(select(*columns).where(condition).order_by(*order), batch_size, session=session)
+                return [serializer.dump_one(row) for row in rows]
+
+        try:
+            expected = current_app.json.dumps(orm())
+            click.echo(f'读取并序列化 {size} 条预约历史（SQLite，yield_per={batch_size}）')
+            click.echo(f'  {"方式":<12}{"耗时(ms)":>12}{"内存峰值(MB)":>16}')
+            for name, func in (('orm', orm), ('projected', projected), ('streamed', streamed)):
+                if current_app.json.dumps(func()) != expected:
+                    raise click.ClickException(f'{name}: 结果与 orm 不一致')
+                elapsed, peak = _measure(func)
+                click.echo(f'  {name:<12}{elapsed:>12.1f}{peak:>16.1f}')
+        finally:
+            engine.dispose()
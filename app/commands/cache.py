@@ -0,0 +1,56 @@
+"""
+缓存管理命令
+"""
+import json
+
+import click
+from flask.cli import with_appcontext
+
+from app.utils.redis_client import redis_client
+
+
+@click.command('cache-stats')
+@click.option('--reset', is_flag=True, help='清空已汇总的统计')
+@click.option('--as-json', 'as_json', is_flag=True, help='以 JSON 输出完整统计（含耗时直方图）')
+@with_appcontext
+def cache_stats(reset, as_json):
+    """
+    按键前缀查看缓存命中率、读取耗时与写入大小
+
+    统计由各进程每隔 CACHE_METRICS_FLUSH_INTERVAL 秒汇总到 Redis，
+    使用 memory 缓存后端时只能看到当前进程的数据。
+    """
+    if reset:
+        if not redis_client.reset_cache_stats():
+            click.echo('[ERROR] 清空失败：缓存服务不可用', err=True)
+            raise click.Abort()
+        click.echo('[OK] 缓存统计已清空')
+        return
+
+    stats = redis_client.get_cache_stats()
+    if stats is None:
+        click.echo('[ERROR] 读取失败：缓存服务不可用', err=True)
+        raise click.Abort()
+    if as_json:
+        click.echo(json.dumps(stats, ensure_ascii=False, indent=2))
+        return
+    if not stats:
+        click.echo('暂无统计数据')
+        return
+
+    def fmt(value, spec=''):
+        if value is None:
+            return '-'
+        return format(value, spec) if isinstance(value, (int, float)) else str(value)
+
+    click.echo(f'{"prefix":<28}{"reads":>9}{"hit%":>8}{"local%":>8}{"err":>6}'
+               f'{"avg_ms":>9}{"p95_ms":>9}{"p99_ms":>9}{"writes":>8}{"avg_B":>9}')
+    for item in stats:
+        reads = item['reads']
+        local_rate = item['local_hits'] / reads * 100 if reads else None
+        hit_rate = item['hit_rate'] * 100 if item['hit_rate'] is not None else None
+        click.echo(
+            f'{item["prefix"]:<28}{reads:>9}{fmt(hit_rate, ".1f"):>8}{fmt(local_rate, ".1f"):>8}'
+            f'{item["errors"]:>6}{fmt(item["latency_avg_ms"], ".2f"):>9}{fmt(item["latency_p95_ms"]):>9}'
+            f'{fmt(item["latency_p99_ms"]):>9}{item["writes"]:>8}{fmt(item["write_bytes_avg"]):>9}'
+        )
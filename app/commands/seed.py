@@ -3,13 +3,13 @@
 用于初始化测试用户数据
 """
 import click
-from werkzeug.security import generate_password_hash
 from flask.cli import with_appcontext
 from app import db
 from app.models.student import Student
 from app.models.teacher import Teacher
 from app.models.admin import Admin
 from app.models.laboratory import Laboratory
+from app.utils.password import hash_password
 
 
 @click.command('init-users')
@@ -40,8 +40,8 @@ def init_users(password):
         else:
             click.echo('[OK] 实验室 L1 已存在')
         
-        # 生成密码Hash
-        password_hash = generate_password_hash(password)
+        # 生成密码Hash（按 PASSWORD_HASH_METHOD 配置的参数）
+        password_hash = hash_password(password)
         
         # 创建学生用户
         student = Student.query.filter_by(id='2023001').first()
@@ -111,5 +111,10 @@ def init_users(password):
 
 def register_commands(app):
     """注册CLI命令到Flask应用"""
+    from app.commands.bench import bench
+    from app.commands.cache import cache_stats
+    
     app.cli.add_command(init_users)
+    app.cli.add_command(bench)
+    app.cli.add_command(cache_stats)
 
@@ -43,6 +43,8 @@ class Reservation(db.Model, ToDictMixin):
         db.Index('idx_reservation_equip_status', 'equip_id', 'status'),
         db.Index('idx_reservation_student_status', 'student_id', 'status'),
         db.Index('idx_reservation_teacher_status', 'teacher_id', 'status'),
+        # 时间区间索引：按设备和开始时间范围扫描，用于预约冲突检测
+        db.Index('idx_reservation_equip_time', 'equip_id', 'start_time', 'end_time'),
     )
     
     def __repr__(self):
@@ -2,26 +2,63 @@
 设备服务层
 处理设备相关的业务逻辑
 """
+from sqlalchemy import select
+
 from app import db
 from app.models.equipment import Equipment
 from app.models.laboratory import Laboratory
+from app.utils.db_routing import replica_read
 from app.utils.exceptions import NotFoundError, ValidationError
+from app.utils.pagination import paginate
+from app.utils.redis_client import redis_client
+from app.utils.session import commit_keep_loaded
+
+# “设备不存在”结果的缓存时间（秒）：反复查询已删除/不存在的设备时只访问缓存
+NOT_FOUND_CACHE_TTL = 60
+
+
+def catalog_cache_tag():
+    """
+    全部设备列表缓存的版本号标签
+    """
+    return 'equipment:catalog'
 
 
-def get_equipment_list(lab_id=None, keyword=None, category=None, status=None):
+def not_found_cache_key(equip_id):
+    """
+    设备不存在的否定缓存键，新增设备时删除
+    """
+    return f'api:equipment:nf:{equip_id}'
+
+
+def lab_cache_tag(lab_id):
+    """
+    指定实验室设备列表缓存的版本号标签
     """
-    查询设备列表（支持筛选）
+    return f'equipment:lab:{lab_id}'
+
+
+@replica_read
+def get_equipment_list(lab_id=None, keyword=None, category=None, status=None, cursor=None, per_page=20, columns=None):
+    """
+    分页查询设备列表（支持筛选，按 ID 升序）
     
     Args:
         lab_id: 实验室ID筛选
         keyword: 关键词搜索（设备名称）
         category: 设备类别筛选
         status: 设备状态筛选
+        cursor: 上一页返回的游标，为空表示第一页
+        per_page: 每页数量
+        columns: 只查询这些列（见 schema_columns），本页记录为字典；为空时返回 ORM 对象
     
     Returns:
-        list: 设备列表
+        Page: 本页设备列表与下一页游标
+    
+    Raises:
+        ValidationError: 游标无效
     """
-    query = Equipment.query
+    query = select(*columns) if columns else Equipment.query
     
     # 按实验室ID筛选
     if lab_id is not None:
@@ -40,10 +77,8 @@ def get_equipment_list(lab_id=None, keyword=None, category=None, status=None):
     if status is not None:
         query = query.filter(Equipment.status == status)
     
-    # 按ID排序
-    query = query.order_by(Equipment.id)
-    
-    return query.all()
+    # 按ID排序分页（主键索引）
+    return paginate(query, [(Equipment.id, False)], cursor, per_page)
 
 
 def get_equipment_by_id(equip_id):
@@ -59,8 +94,13 @@ def get_equipment_by_id(equip_id):
     Raises:
         NotFoundError: 设备不存在
     """
+    nf_key = not_found_cache_key(equip_id)
+    if redis_client.get(nf_key):
+        raise NotFoundError('设备不存在')
+    
     equipment = Equipment.query.get(equip_id)
     if not equipment:
+        redis_client.set(nf_key, 1, ex=NOT_FOUND_CACHE_TTL)
         raise NotFoundError('设备不存在')
     return equipment
 
@@ -94,7 +134,7 @@ def create_equipment(data):
     
     try:
         db.session.add(equipment)
-        db.session.commit()
+        commit_keep_loaded()
         return equipment
     except Exception as e:
         db.session.rollback()
@@ -137,7 +177,7 @@ def update_equipment(equip_id, data):
         equipment.next_avail_time = data['next_avail_time']
     
     try:
-        db.session.commit()
+        commit_keep_loaded()
         return equipment
     except Exception as e:
         db.session.rollback()
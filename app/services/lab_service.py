@@ -5,18 +5,37 @@
 from app import db
 from app.models.laboratory import Laboratory
 from app.models.student import Student
+from app.utils.auth import user_profile_cache_key
+from app.utils.db_routing import replica_read
 from app.utils.exceptions import NotFoundError, ValidationError
+from app.utils.pagination import paginate
+from app.utils.redis_client import redis_client
+from app.utils.session import commit_keep_loaded
 
 
-def get_lab_list():
+def list_cache_tag():
     """
-    查询所有实验室
+    实验室列表缓存（所有分页）的版本号标签
+    """
+    return 'lab:list'
+
+
+@replica_read
+def get_lab_list(cursor=None, per_page=20):
+    """
+    分页查询实验室（按 ID 升序）
+    
+    Args:
+        cursor: 上一页返回的游标，为空表示第一页
+        per_page: 每页数量
     
     Returns:
-        list: 实验室对象列表
+        Page: 本页实验室列表与下一页游标
+    
+    Raises:
+        ValidationError: 游标无效
     """
-    labs = Laboratory.query.all()
-    return labs
+    return paginate(Laboratory.query, [(Laboratory.id, False)], cursor, per_page)
 
 
 def get_lab_by_id(lab_id):
@@ -64,7 +83,7 @@ def create_lab(data):
     
     try:
         db.session.add(lab)
-        db.session.commit()
+        commit_keep_loaded()
         return lab
     except Exception as e:
         db.session.rollback()
@@ -88,6 +107,7 @@ def update_lab(lab_id, data):
         ValidationError: 数据验证失败
     """
     lab = get_lab_by_id(lab_id)
+    student_ids = []
     
     # 检查名称是否与其他实验室冲突
     if 'name' in data and data['name'] != lab.name:
@@ -106,6 +126,8 @@ def update_lab(lab_id, data):
         
         # 关键逻辑：更新 Student 表中的冗余字段 lab_name
         # 使用 SQLAlchemy 的 update 语句进行批量更新
+        # 先记下受影响的学生，提交后删除其资料缓存（资料中包含 lab_name）
+        student_ids = [sid for (sid,) in db.session.query(Student.id).filter_by(lab_id=lab_id)]
         Student.query.filter_by(lab_id=lab_id).update(
             {'lab_name': new_name},
             synchronize_session=False
@@ -116,11 +138,12 @@ def update_lab(lab_id, data):
             lab.location = data['location']
     
     try:
-        db.session.commit()
-        return lab
+        commit_keep_loaded()
     except Exception as e:
         db.session.rollback()
         raise ValidationError(f'更新实验室失败: {str(e)}')
+    redis_client.delete_many([user_profile_cache_key('student', sid) for sid in student_ids])
+    return lab
 
 
 def delete_lab(lab_id):
@@ -2,14 +2,93 @@
 预约服务层
 处理预约相关的业务逻辑
 """
-from datetime import datetime
+from datetime import datetime, time, timedelta
+from flask import current_app
+from sqlalchemy import select
 from app import db
 from app.models.reservation import Reservation
-from app.models.student import Student
-from app.models.teacher import Teacher
 from app.models.equipment import Equipment
+from app.utils.auth import get_user_profile
+from app.utils.db_routing import replica_read
 from app.utils.exceptions import NotFoundError, ValidationError
+from app.utils.pagination import paginate
+from app.utils.projection import stream_rows
 from app.utils.redis_client import redis_client
+from app.utils.session import commit_keep_loaded
+
+# 占用设备时间的预约状态：待审(0)、通过(1)
+ACTIVE_STATUSES = (0, 1)
+
+# “预约不存在”结果的缓存时间（秒）
+NOT_FOUND_CACHE_TTL = 60
+
+
+def not_found_cache_key(reservation_id):
+    """
+    预约不存在的否定缓存键，新建预约时删除
+    """
+    return f'api:reservation:nf:{reservation_id}'
+
+
+def user_cache_tag(user_type, user_id):
+    """
+    用户预约列表缓存的版本号标签
+    """
+    return f'reservation:user:{user_type}:{user_id}'
+
+
+def equipment_cache_tag(equip_id):
+    """
+    设备预约占用（可用时间）缓存的版本号标签
+    """
+    return f'reservation:equip:{equip_id}'
+
+
+def _max_duration():
+    """单次预约的最长时长（RESERVATION_MAX_HOURS）"""
+    return timedelta(hours=current_app.config.get('RESERVATION_MAX_HOURS', 24))
+
+
+def _validate_time_range(start_time, end_time):
+    """
+    校验预约时间范围：开始/结束时间需同时提供，开始时间早于结束时间，且时长不超过上限
+    """
+    if start_time is None and end_time is None:
+        return
+    if start_time is None or end_time is None:
+        raise ValidationError('开始时间和结束时间必须同时提供', payload={'field': 'time_range'})
+    if start_time >= end_time:
+        raise ValidationError('开始时间必须早于结束时间', payload={'field': 'time_range'})
+    max_duration = _max_duration()
+    if end_time - start_time > max_duration:
+        raise ValidationError(
+            f'单次预约时长不能超过 {max_duration.total_seconds() / 3600:g} 小时',
+            payload={'field': 'time_range'}
+        )
+
+
+def _check_conflict(equip_id, start_time, end_time):
+    """
+    检查同一设备下预约时间是否与已有的待审/通过预约冲突
+
+    两个区间重叠当且仅当 start_time < 新结束时间 且 end_time > 新开始时间。
+    预约时长不超过 RESERVATION_MAX_HOURS（创建时校验），与新区间重叠的预约开始时间必然晚于
+    新开始时间减去最长时长，据此给 start_time 加上下界，idx_reservation_equip_time 上的
+    范围扫描只覆盖该时间窗内的预约，不随设备历史预约数量增长，FOR UPDATE 也只锁定窗内的行。
+    调小 RESERVATION_MAX_HOURS 前需确认已有预约都不超过新的上限，否则更长的旧预约不会被检测到。
+
+    使用锁定读（FOR UPDATE）读取最新已提交数据，避免可重复读快照看不到并发事务刚提交的预约。
+    """
+    conflict = db.session.query(Reservation.id).filter(
+        Reservation.equip_id == equip_id,
+        Reservation.status.in_(ACTIVE_STATUSES),
+        Reservation.start_time > start_time - _max_duration(),
+        Reservation.start_time < end_time,
+        Reservation.end_time > start_time
+    ).with_for_update().first()
+
+    if conflict:
+        raise ValidationError('预约时间与已有预约冲突', payload={'conflict_reservation_id': conflict.id})
 
 
 def create_reservation(data, current_user):
@@ -24,36 +103,50 @@ def create_reservation(data, current_user):
         Reservation: 创建的预约对象
     
     Raises:
-        ValidationError: 数据验证失败
+        ValidationError: 数据验证失败或预约时间冲突
     """
-    # 验证设备是否存在
-    equipment = Equipment.query.get(data.get('equip_id'))
-    if not equipment:
-        raise ValidationError('设备不存在', payload={'field': 'equip_id'})
+    start_time = data.get('start_time')
+    end_time = data.get('end_time')
+    _validate_time_range(start_time, end_time)
     
     # 根据用户类型设置用户ID
     user_id = current_user['user_id']
     user_type = current_user['user_type']
     
-    # 填充冗余字段
+    # 填充冗余字段（用户姓名取自用户资料缓存）
     user_name = None
     if user_type == 'student':
-        student = Student.query.get(user_id)
+        student = get_user_profile(user_id, 'student')
         if not student:
             raise ValidationError('学生不存在')
-        user_name = student.name
+        user_name = student['name']
         data['student_id'] = user_id
         data['teacher_id'] = None
     elif user_type == 'teacher':
-        teacher = Teacher.query.get(user_id)
+        teacher = get_user_profile(user_id, 'teacher')
         if not teacher:
             raise ValidationError('教师不存在')
-        user_name = teacher.name
+        user_name = teacher['name']
         data['student_id'] = None
         data['teacher_id'] = user_id
     else:
         raise ValidationError('用户类型不支持预约')
     
+    # 验证设备是否存在，并对设备行加锁（SELECT ... FOR UPDATE）
+    # 同一设备的并发预约在此串行化，直到本事务提交或回滚，保证只有一个能成功
+    equipment = Equipment.query.filter_by(id=data.get('equip_id')).with_for_update().first()
+    if not equipment:
+        db.session.rollback()
+        raise ValidationError('设备不存在', payload={'field': 'equip_id'})
+    
+    # 时间冲突检测
+    if start_time is not None:
+        try:
+            _check_conflict(equipment.id, start_time, end_time)
+        except ValidationError:
+            db.session.rollback()
+            raise
+    
     # 创建预约
     reservation = Reservation(
         equip_id=data['equip_id'],
@@ -64,16 +157,16 @@ def create_reservation(data, current_user):
         user_name=user_name,
         equip_name=equipment.name,
         price=data.get('price'),
-        start_time=data.get('start_time'),
-        end_time=data.get('end_time')
+        start_time=start_time,
+        end_time=end_time
     )
     
     try:
         db.session.add(reservation)
-        db.session.commit()
+        commit_keep_loaded()
         
         # 清除相关缓存
-        _clear_reservation_cache()
+        _clear_reservation_cache(reservation)
         
         return reservation
     except Exception as e:
@@ -81,20 +174,28 @@ def create_reservation(data, current_user):
         raise ValidationError(f'创建预约失败: {str(e)}')
 
 
-def get_reservation_list(user_id=None, equip_id=None, status=None, user_type=None):
+@replica_read
+def get_reservation_list(user_id=None, equip_id=None, status=None, user_type=None, cursor=None, per_page=20, columns=None):
     """
-    获取预约列表（支持筛选）
+    分页获取预约列表（支持筛选）
     
     Args:
         user_id: 用户ID筛选
         equip_id: 设备ID筛选
         status: 状态筛选
         user_type: 用户类型（student/teacher）
+        cursor: 上一页返回的游标，为空表示第一页
+        per_page: 每页数量
+        columns: 只查询这些列（见 schema_columns，须包含 apply_time 与 id），本页记录为字典；
+                 为空时返回 ORM 对象
     
     Returns:
-        list: 预约列表
+        Page: 本页预约列表与下一页游标
+    
+    Raises:
+        ValidationError: 游标无效
     """
-    query = Reservation.query
+    query = select(*columns) if columns else Reservation.query
     
     # 按用户ID筛选
     if user_id and user_type:
@@ -111,10 +212,44 @@ def get_reservation_list(user_id=None, equip_id=None, status=None, user_type=Non
     if status is not None:
         query = query.filter(Reservation.status == status)
     
-    # 按申请时间倒序排列
-    query = query.order_by(Reservation.apply_time.desc())
-    
-    return query.all()
+    # 按申请时间倒序分页，ID 作为同一时间内的次序（idx_reservation_apply_time 隐含主键）
+    return paginate(
+        query,
+        [(Reservation.apply_time, True), (Reservation.id, True)],
+        cursor,
+        per_page
+    )
+
+
+def iter_reservation_history(columns, equip_id=None, status=None, start_date=None, end_date=None,
+                             batch_size=1000):
+    """
+    按 ID 顺序流式读取预约记录（管理员导出）
+
+    结果集可能包含全部历史预约，按 batch_size 分批读取（yield_per），进程内存与记录数无关；
+    迭代结束前一直占用数据库连接，调用方应尽快消费完毕。
+
+    Args:
+        columns: 要读取的列（见 schema_columns）
+        equip_id: 设备ID筛选
+        status: 状态筛选
+        start_date: 预约开始时间不早于该日期
+        end_date: 预约开始时间不晚于该日期（包含当天）
+        batch_size: 每批读取的行数
+
+    Returns:
+        Iterator[dict]: 以列名为键的预约记录
+    """
+    stmt = select(*columns)
+    if equip_id is not None:
+        stmt = stmt.where(Reservation.equip_id == equip_id)
+    if status is not None:
+        stmt = stmt.where(Reservation.status == status)
+    if start_date is not None:
+        stmt = stmt.where(Reservation.start_time >= datetime.combine(start_date, time.min))
+    if end_date is not None:
+        stmt = stmt.where(Reservation.start_time < datetime.combine(end_date + timedelta(days=1), time.min))
+    return stream_rows(stmt.order_by(Reservation.id), batch_size=batch_size)
 
 
 def get_reservation_by_id(reservation_id):
@@ -130,8 +265,13 @@ def get_reservation_by_id(reservation_id):
     Raises:
         NotFoundError: 预约不存在
     """
+    nf_key = not_found_cache_key(reservation_id)
+    if redis_client.get(nf_key):
+        raise NotFoundError('预约不存在')
+    
     reservation = Reservation.query.get(reservation_id)
     if not reservation:
+        redis_client.set(nf_key, 1, ex=NOT_FOUND_CACHE_TTL)
         raise NotFoundError('预约不存在')
     return reservation
 
@@ -172,10 +312,10 @@ def update_reservation_status(reservation_id, status, approver_id=None):
         reservation.approve_time = datetime.utcnow()
     
     try:
-        db.session.commit()
+        commit_keep_loaded()
         
         # 清除相关缓存
-        _clear_reservation_cache(reservation_id=reservation_id)
+        _clear_reservation_cache(reservation)
         
         return reservation
     except Exception as e:
@@ -201,10 +341,10 @@ def delete_reservation(reservation_id):
     
     try:
         db.session.delete(reservation)
-        db.session.commit()
+        commit_keep_loaded()
         
         # 清除相关缓存
-        _clear_reservation_cache(reservation_id=reservation_id)
+        _clear_reservation_cache(reservation)
         
         return True
     except Exception as e:
@@ -212,18 +352,22 @@ def delete_reservation(reservation_id):
         raise ValidationError(f'删除预约失败: {str(e)}')
 
 
-def _clear_reservation_cache(reservation_id=None):
+def _clear_reservation_cache(reservation):
     """
     清除预约相关缓存
     
+    删除该预约的详情缓存与否定缓存，并递增预约所属用户与设备的版本号：
+    只有该用户的预约列表和该设备的可用时间缓存失效，写入代价为一次 Redis 往返。
+    
     Args:
-        reservation_id: 预约ID，如果提供则清除该预约的详情缓存
+        reservation: 发生变更的预约对象
     """
-    # 清除详情缓存
-    if reservation_id:
-        redis_client.delete(f'api:reservation:detail:{reservation_id}')
+    if reservation.student_id:
+        user_tag = user_cache_tag('student', reservation.student_id)
+    else:
+        user_tag = user_cache_tag('teacher', reservation.teacher_id)
     
-    # 清除列表缓存（使用通配符删除所有相关缓存）
-    keys = redis_client.keys('api:reservation:list:*')
-    for key in keys:
-        redis_client.delete(key)
\ No newline at end of file
+    # 删除与版本号递增在同一次往返中提交
+    with redis_client.pipeline(transaction=True) as pipe:
+        pipe.delete(f'api:reservation:detail:{reservation.id}', not_found_cache_key(reservation.id))
+        pipe.bump_generations(user_tag, equipment_cache_tag(reservation.equip_id))
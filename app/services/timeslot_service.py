@@ -1,13 +1,28 @@
 """
 时间段服务层，处理时间段相关的业务逻辑
 """
-from datetime import time
+from datetime import time, date, datetime, timedelta
 from sqlalchemy import and_
 
 from app import db
-from app.models.equipment import Equipment
+from app.models.reservation import Reservation
 from app.models.timeslot import TimeSlot
+from app.services import equipment_service
+from app.services.reservation_service import ACTIVE_STATUSES
+from app.utils.db_routing import replica_read
 from app.utils.exceptions import NotFoundError, ValidationError
+from app.utils.session import commit_keep_loaded
+
+# 可用时间查询的最大日期跨度（天）
+MAX_AVAILABLE_DAYS = 90
+SECONDS_PER_DAY = 24 * 3600
+
+
+def timeslot_cache_tag(equip_id):
+    """
+    设备时间段配置（可用时间）缓存的版本号标签
+    """
+    return f'timeslot:equip:{equip_id}'
 
 
 def _normalize_time(value):
@@ -58,12 +73,14 @@ def _check_overlap(equip_id, start_time, end_time, exclude_slot_id=None):
 
 
 def _check_equipment_exists(equip_id):
-    equipment = Equipment.query.get(equip_id)
-    if not equipment:
+    # 复用设备查询的否定缓存
+    try:
+        return equipment_service.get_equipment_by_id(equip_id)
+    except NotFoundError:
         raise NotFoundError('设备不存在', payload={'field': 'equip_id'})
-    return equipment
 
 
+@replica_read
 def get_timeslots_by_equipment(equip_id, only_active=False):
     """
     获取设备的时间段列表
@@ -75,12 +92,115 @@ def get_timeslots_by_equipment(equip_id, only_active=False):
     return query.order_by(TimeSlot.start_time.asc()).all()
 
 
-def get_available_timeslots(equip_id):
+def _seconds_of(value):
     """
-    获取设备可用时间段（当前阶段仅返回激活的时间段）
+    time 对象转换为当天的秒数
     """
-    # TODO: 关联 Reservation 表，排除状态为 Pending(0) 和 Approved(1) 的时间段
-    return get_timeslots_by_equipment(equip_id, only_active=True)
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def _time_of(seconds):
+    """
+    当天的秒数转换为 time 对象
+    """
+    return time(hour=seconds // 3600, minute=seconds // 60 % 60, second=seconds % 60)
+
+
+def _range_mask(start, end):
+    """
+    生成 [start, end) 秒区间的位图，第 i 位表示当天第 i 秒
+    """
+    return ((1 << (end - start)) - 1) << start
+
+
+def _iter_runs(mask):
+    """
+    按从低到高的顺序遍历位图中连续为 1 的区间，返回 (start, end) 秒
+    """
+    while mask:
+        start = (mask & -mask).bit_length() - 1
+        shifted = mask >> start
+        length = (~shifted & (shifted + 1)).bit_length() - 1
+        yield start, start + length
+        mask ^= ((1 << length) - 1) << start
+
+
+def _build_busy_masks(equip_id, start_date, days):
+    """
+    一次查询日期范围内的待审/通过预约，按天汇总为占用位图
+    """
+    range_start = datetime.combine(start_date, time.min)
+    range_end = range_start + timedelta(days=days)
+
+    rows = db.session.query(Reservation.start_time, Reservation.end_time).filter(
+        Reservation.equip_id == equip_id,
+        Reservation.status.in_(ACTIVE_STATUSES),
+        Reservation.start_time < range_end,
+        Reservation.end_time > range_start
+    ).all()
+
+    busy = [0] * days
+    for res_start, res_end in rows:
+        # 裁剪到查询范围内，跨天预约按天拆分
+        offset = int((max(res_start, range_start) - range_start).total_seconds())
+        stop = int((min(res_end, range_end) - range_start).total_seconds())
+        while offset < stop:
+            day_index, day_offset = divmod(offset, SECONDS_PER_DAY)
+            day_stop = min(stop - day_index * SECONDS_PER_DAY, SECONDS_PER_DAY)
+            busy[day_index] |= _range_mask(day_offset, day_stop)
+            offset = (day_index + 1) * SECONDS_PER_DAY
+    return busy
+
+
+def get_available_timeslots(equip_id, start_date=None, end_date=None):
+    """
+    获取设备在日期范围内的可用时间窗口
+
+    将激活的每日时间段模板展开到每一天，扣除待审(0)/通过(1)预约占用的时间。
+    每天的时间段与占用情况都以秒级位图表示，整个范围只需一次预约查询，
+    其余均为内存中的位运算，不会按天查询数据库。
+
+    Args:
+        equip_id: 设备ID
+        start_date: 开始日期（默认今天）
+        end_date: 结束日期，包含当天（默认开始日期后 6 天）
+
+    Returns:
+        list: 每天一项，{'date': date, 'windows': [{'slot_id', 'start_time', 'end_time'}, ...]}
+    """
+    if start_date is None:
+        start_date = date.today()
+    if end_date is None:
+        end_date = start_date + timedelta(days=6)
+    if end_date < start_date:
+        raise ValidationError('结束日期不能早于开始日期', payload={'field': 'end_date'})
+    days = (end_date - start_date).days + 1
+    if days > MAX_AVAILABLE_DAYS:
+        raise ValidationError(f'查询范围不能超过 {MAX_AVAILABLE_DAYS} 天', payload={'field': 'end_date'})
+
+    slots = get_timeslots_by_equipment(equip_id, only_active=True)
+    templates = [
+        (slot.slot_id, _range_mask(_seconds_of(slot.start_time), _seconds_of(slot.end_time)))
+        for slot in slots
+    ]
+    busy = _build_busy_masks(equip_id, start_date, days) if templates else [0] * days
+
+    result = []
+    for day_index in range(days):
+        windows = []
+        for slot_id, template in templates:
+            free = template & ~busy[day_index] if busy[day_index] else template
+            for start, end in _iter_runs(free):
+                windows.append({
+                    'slot_id': slot_id,
+                    'start_time': _time_of(start),
+                    'end_time': _time_of(end)
+                })
+        result.append({
+            'date': start_date + timedelta(days=day_index),
+            'windows': windows
+        })
+    return result
 
 
 def check_slot_usage(slot_id):
@@ -112,7 +232,7 @@ def create_timeslot(data):
     )
     try:
         db.session.add(slot)
-        db.session.commit()
+        commit_keep_loaded()
         return slot
     except Exception as e:
         db.session.rollback()
@@ -155,7 +275,7 @@ def update_timeslot(slot_id, data):
         slot.is_active = data.get('is_active')
 
     try:
-        db.session.commit()
+        commit_keep_loaded()
         return slot
     except Exception as e:
         db.session.rollback()
@@ -5,7 +5,8 @@
 from app.utils.response import success, fail
 from app.utils.exceptions import (
     APIException, ValidationError, NotFoundError,
-    UnauthorizedError, ForbiddenError, register_error_handlers
+    UnauthorizedError, ForbiddenError, ServiceUnavailableError,
+    register_error_handlers
 )
 from app.utils.schemas import (
     BaseSchema, BaseQuerySchema, BaseCreateSchema,
@@ -17,7 +18,8 @@ __all__ = [
     'success', 'fail',
     # 异常类
     'APIException', 'ValidationError', 'NotFoundError',
-    'UnauthorizedError', 'ForbiddenError', 'register_error_handlers',
+    'UnauthorizedError', 'ForbiddenError', 'ServiceUnavailableError',
+    'register_error_handlers',
     # Schema 基类
     'BaseSchema', 'BaseQuerySchema', 'BaseCreateSchema',
     'BaseUpdateSchema', 'PaginationSchema', 'IDSchema'
@@ -2,11 +2,22 @@
 JWT 认证工具类
 提供 JWT token 生成、验证和用户认证功能
 """
+import hashlib
+import logging
+import random
+import time
+import uuid
 import jwt
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, current_app, g
 from app.utils.exceptions import UnauthorizedError, ForbiddenError
+from app.utils.local_cache import LocalCache
+from app.utils.redis_client import redis_client
+from app.utils.revocation import is_revoked
+
+# token 有效期（7 天）
+TOKEN_LIFETIME = timedelta(days=7)
 
 
 def generate_token(user_id: str, user_type: str, lab_id: int = None) -> str:
@@ -25,8 +36,9 @@ def generate_token(user_id: str, user_type: str, lab_id: int = None) -> str:
         'user_id': user_id,
         'user_type': user_type,
         'lab_id': lab_id,
-        'exp': datetime.utcnow() + timedelta(days=7),  # 7天过期
-        'iat': datetime.utcnow()
+        'exp': datetime.utcnow() + TOKEN_LIFETIME,
+        'iat': datetime.utcnow(),
+        'jti': uuid.uuid4().hex  # 用于单独吊销（注销）该 token
     }
     
     secret_key = current_app.config.get('SECRET_KEY', 'dev-secret-key')
@@ -34,10 +46,42 @@ def generate_token(user_id: str, user_type: str, lab_id: int = None) -> str:
     return token
 
 
+def decode_token(token: str) -> dict:
+    """
+    解码并校验 JWT token 的签名与过期时间（不使用缓存）
+    
+    Raises:
+        UnauthorizedError: token 无效或过期
+    """
+    try:
+        secret_key = current_app.config.get('SECRET_KEY', 'dev-secret-key')
+        return jwt.decode(token, secret_key, algorithms=['HS256'])
+    except jwt.ExpiredSignatureError:
+        raise UnauthorizedError('Token 已过期')
+    except jwt.InvalidTokenError:
+        raise UnauthorizedError('Token 无效')
+
+
+def _token_cache() -> LocalCache:
+    """当前应用的已验证 token 缓存（进程内 LRU）"""
+    cache = current_app.extensions.get('jwt_token_cache')
+    if cache is None:
+        cache = LocalCache(
+            max_size=current_app.config.get('JWT_CACHE_MAX_SIZE', 4096),
+            ttl=current_app.config.get('JWT_CACHE_TTL', 300)
+        )
+        current_app.extensions['jwt_token_cache'] = cache
+    return cache
+
+
 def verify_token(token: str) -> dict:
     """
     验证 JWT token
     
+    验证通过的载荷按 token 的 SHA-256 摘要缓存在进程内（不保存 token 原文），
+    缓存时间不超过 token 的剩余有效期，过期的 token 不会从缓存中被接受。
+    每次都会检查吊销状态（未吊销的 token 只查进程内过滤器，不访问 Redis）。
+    
     Args:
         token: JWT token 字符串
     
@@ -45,16 +89,33 @@ def verify_token(token: str) -> dict:
         dict: token 载荷（payload）
     
     Raises:
-        UnauthorizedError: token 无效或过期
+        UnauthorizedError: token 无效、过期或已被吊销
     """
-    try:
-        secret_key = current_app.config.get('SECRET_KEY', 'dev-secret-key')
-        payload = jwt.decode(token, secret_key, algorithms=['HS256'])
-        return payload
-    except jwt.ExpiredSignatureError:
-        raise UnauthorizedError('Token 已过期')
-    except jwt.InvalidTokenError:
-        raise UnauthorizedError('Token 无效')
+    cache = _token_cache()
+    digest = hashlib.sha256(token.encode('utf-8')).digest()
+    payload = cache.get(digest)
+    if payload is None:
+        payload = decode_token(token)
+        remaining = payload['exp'] - time.time() if 'exp' in payload else None
+        if remaining is None or remaining > 0:
+            cache.set(digest, payload, ttl=remaining)
+    if is_revoked(payload):
+        raise UnauthorizedError('Token 已失效')
+    # 返回副本，调用方修改不影响缓存
+    return dict(payload)
+
+
+def _log_auth_failure(reason: str) -> None:
+    """
+    按 AUTH_LOG_SAMPLE_RATE 采样记录认证失败
+    
+    不记录 token 与请求头内容；失败请求可能很多（过期 token 轮询、扫描），采样避免日志放大
+    """
+    logger = current_app.logger
+    if not logger.isEnabledFor(logging.WARNING):
+        return
+    if random.random() < current_app.config.get('AUTH_LOG_SAMPLE_RATE', 0.01):
+        logger.warning('认证失败: %s (%s %s)', reason, request.method, request.path)
 
 
 def get_current_user():
@@ -65,23 +126,11 @@ def get_current_user():
         dict: 用户信息，包含 user_id, user_type, lab_id
     """
     if not hasattr(g, 'current_user'):
-        # 调试：打印所有请求头
-        # Flask 的 request.headers 是大小写不敏感的，但为了兼容性，我们检查多种可能
-        auth_header = (
-            request.headers.get('Authorization', '') or 
-            request.headers.get('authorization', '') or
-            request.headers.get('AUTHORIZATION', '')
-        )
+        # Flask 的 request.headers 大小写不敏感
+        auth_header = request.headers.get('Authorization', '')
         
         if not auth_header:
-            # 调试：打印所有请求头，帮助排查
-            print(f"[DEBUG] 请求头中没有 Authorization")
-            print(f"[DEBUG] 所有请求头 keys: {list(request.headers.keys())}")
-            print(f"[DEBUG] 所有请求头 (原始): {dict(request.headers)}")
-            print(f"[DEBUG] Authorization (大写): {request.headers.get('Authorization', 'NOT FOUND')}")
-            print(f"[DEBUG] authorization (小写): {request.headers.get('authorization', 'NOT FOUND')}")
-            print(f"[DEBUG] 请求方法: {request.method}")
-            print(f"[DEBUG] 请求 URL: {request.url}")
+            _log_auth_failure('缺少 Authorization 请求头')
             raise UnauthorizedError('缺少认证 token')
         
         # 移除 'Bearer ' 前缀（如果存在）
@@ -90,14 +139,15 @@ def get_current_user():
         else:
             token = auth_header
         
-        print(f"[DEBUG] 收到 token: {token[:20]}...")
         try:
-            payload = verify_token(token)
-            print(f"[DEBUG] Token 验证成功: {payload}")
-            g.current_user = payload
-        except Exception as e:
-            print(f"[DEBUG] Token 验证失败: {str(e)}")
+            g.current_user = verify_token(token)
+        except UnauthorizedError as e:
+            _log_auth_failure(e.message)
             raise
+        
+        logger = current_app.logger
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('认证通过: %s/%s', g.current_user.get('user_type'), g.current_user.get('user_id'))
     
     return g.current_user
 
@@ -143,7 +193,10 @@ def admin_required(f):
 
 def get_user_by_id(user_id: str, user_type: str):
     """
-    根据用户ID和类型获取用户对象
+    根据用户ID和类型获取用户对象（查询数据库）
+    
+    只读场景请使用 get_user_profile（带缓存，不含密码哈希）；本函数用于登录等需要
+    password_hash 或需要修改用户的场景。
     
     Args:
         user_id: 用户ID
@@ -165,3 +218,49 @@ def get_user_by_id(user_id: str, user_type: str):
         return Admin.query.get(user_id)
     return None
 
+
+def user_profile_cache_key(user_type: str, user_id: str) -> str:
+    """
+    用户资料缓存键，用户信息（含冗余字段 lab_name）变更时删除
+    """
+    return f'user:profile:{user_type}:{user_id}'
+
+
+def cache_user_profile(user, user_type: str) -> dict:
+    """
+    写入用户资料缓存（登录成功时调用）
+    
+    Args:
+        user: Student, Teacher 或 Admin 对象
+        user_type: 用户类型
+    
+    Returns:
+        dict: 用户资料（不含 password_hash）
+    """
+    profile = user.to_dict(exclude=['password_hash'])
+    redis_client.set(
+        user_profile_cache_key(user_type, user.id),
+        profile,
+        ex=current_app.config.get('USER_PROFILE_CACHE_TTL', 3600)
+    )
+    return profile
+
+
+def get_user_profile(user_id: str, user_type: str) -> dict:
+    """
+    获取用户资料（优先读缓存，未命中时查询数据库并写入缓存）
+    
+    Args:
+        user_id: 用户ID
+        user_type: 用户类型 ('student', 'teacher', 'admin')
+    
+    Returns:
+        dict: 用户资料（模型字段，不含 password_hash）；用户不存在时返回 None
+    """
+    profile = redis_client.get(user_profile_cache_key(user_type, user_id))
+    if profile is not None:
+        return profile
+    user = get_user_by_id(user_id, user_type)
+    if user is None:
+        return None
+    return cache_user_profile(user, user_type)
@@ -0,0 +1,52 @@
+"""
+布隆过滤器
+用固定大小的位数组判断元素"一定不存在"或"可能存在"
+"""
+import hashlib
+import math
+import threading
+
+
+class BloomFilter:
+    """
+    布隆过滤器（写入加锁，读取无锁）
+
+    不存在的元素以约 error_rate 的概率被误判为存在，存在的元素一定判断为存在；
+    元素数超过 capacity 后误判率上升，调用方应重建更大的过滤器。
+
+    Args:
+        capacity: 预计元素数
+        error_rate: 元素数不超过 capacity 时的误判率
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, item: str) -> list:
+        # 一次哈希拆成两个 64 位值，按 h1 + i * h2 生成 k 个位置（Kirsch-Mitzenmacher）
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        positions = self._positions(item)
+        with self._lock:
+            if all(self._bits[p >> 3] & (1 << (p & 7)) for p in positions):
+                return
+            for p in positions:
+                self._bits[p >> 3] |= 1 << (p & 7)
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
@@ -0,0 +1,143 @@
+"""
+缓存指标
+按键前缀统计命中、未命中、错误、写入大小与读取耗时分布
+"""
+import re
+import threading
+import time
+from collections import defaultdict
+
+# 前缀取键开头最多 3 段纯字母段，如 'api:equipment:detail:12' -> 'api:equipment:detail'
+PREFIX_SEGMENTS = 3
+_SEGMENT = re.compile(r'^[A-Za-z_]+$')
+
+# 读取耗时直方图的桶上界（毫秒），超过最后一个桶计入 inf
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+# 各进程定期把增量累加到 Redis，CLI 与接口读取汇总结果
+STATS_KEY_PREFIX = 'cache:stats:'
+STATS_INDEX_KEY = 'cache:stats:index'
+
+# 读取结果
+LOCAL_HIT = 'local_hits'
+HIT = 'hits'
+MISS = 'misses'
+ERROR = 'errors'
+
+
+def key_prefix(key: str) -> str:
+    """提取键的统计前缀"""
+    segments = []
+    for segment in key.split(':')[:PREFIX_SEGMENTS]:
+        if not _SEGMENT.match(segment):
+            break
+        segments.append(segment)
+    return ':'.join(segments) or 'other'
+
+
+def _bucket_field(latency_ms: float) -> str:
+    for bound in LATENCY_BUCKETS_MS:
+        if latency_ms <= bound:
+            return f'le_{bound}'
+    return 'le_inf'
+
+
+class CacheMetrics:
+    """
+    进程内缓存指标累加器（线程安全）
+
+    计数先在进程内累加，由 RedisClient 每隔 flush_interval 秒取出增量写入 Redis，
+    读取路径上只有一次加锁的字典累加。
+
+    Args:
+        flush_interval: 增量写入 Redis 的间隔（秒）
+    """
+
+    def __init__(self, flush_interval: float = 10):
+        self.flush_interval = flush_interval
+        self._data = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record(self, key: str, outcome: str, latency: float = None) -> None:
+        """
+        记录一次读取
+
+        Args:
+            key: 缓存键
+            outcome: LOCAL_HIT / HIT / MISS / ERROR
+            latency: 耗时（秒）
+        """
+        prefix = key_prefix(key)
+        with self._lock:
+            counters = self._data.setdefault(prefix, defaultdict(int))
+            counters[outcome] += 1
+            if latency is not None:
+                latency_ms = latency * 1000
+                counters['latency_count'] += 1
+                counters['latency_us'] += int(latency_ms * 1000)
+                counters[_bucket_field(latency_ms)] += 1
+
+    def record_write(self, key: str, size: int) -> None:
+        """记录一次写入及其编码后的字节数"""
+        prefix = key_prefix(key)
+        with self._lock:
+            counters = self._data.setdefault(prefix, defaultdict(int))
+            counters['writes'] += 1
+            counters['write_bytes'] += size
+
+    def due(self) -> bool:
+        """是否到了写入 Redis 的时间"""
+        return time.monotonic() - self._last_flush >= self.flush_interval
+
+    def drain(self) -> dict:
+        """取出并清空累计的增量：{前缀: {计数项: 值}}"""
+        with self._lock:
+            data, self._data = self._data, {}
+            self._last_flush = time.monotonic()
+        return {prefix: dict(counters) for prefix, counters in data.items()}
+
+
+def summarize(prefix: str, counters: dict) -> dict:
+    """
+    根据累计计数计算命中率、平均/分位耗时与平均写入大小
+
+    分位耗时取所在直方图桶的上界，是近似值；超出最大桶时为 '>1000'
+    """
+    counters = {k: int(v) for k, v in counters.items()}
+    local_hits = counters.get(LOCAL_HIT, 0)
+    hits = counters.get(HIT, 0)
+    misses = counters.get(MISS, 0)
+    errors = counters.get(ERROR, 0)
+    reads = local_hits + hits + misses + errors
+    latency_count = counters.get('latency_count', 0)
+    writes = counters.get('writes', 0)
+
+    def percentile(q):
+        if not latency_count:
+            return None
+        threshold, seen = q * latency_count, 0
+        for bound in LATENCY_BUCKETS_MS:
+            seen += counters.get(f'le_{bound}', 0)
+            if seen >= threshold:
+                return bound
+        return f'>{LATENCY_BUCKETS_MS[-1]}'
+
+    return {
+        'prefix': prefix,
+        'reads': reads,
+        'local_hits': local_hits,
+        'hits': hits,
+        'misses': misses,
+        'errors': errors,
+        'hit_rate': round((local_hits + hits) / reads, 4) if reads else None,
+        'latency_avg_ms': round(counters.get('latency_us', 0) / latency_count / 1000, 3) if latency_count else None,
+        'latency_p50_ms': percentile(0.5),
+        'latency_p95_ms': percentile(0.95),
+        'latency_p99_ms': percentile(0.99),
+        'latency_histogram': {
+            f'le_{bound}': counters.get(f'le_{bound}', 0) for bound in (*LATENCY_BUCKETS_MS, 'inf')
+        },
+        'writes': writes,
+        'write_bytes_avg': round(counters.get('write_bytes', 0) / writes) if writes else None,
+    }
@@ -0,0 +1,149 @@
+"""
+熔断器
+依赖的外部服务（如 Redis）不可用时快速失败，避免每个请求都等待连接超时
+"""
+import os
+import threading
+import time
+import weakref
+from functools import partial
+from typing import Callable, Optional
+
+
+def _reset_after_fork(ref: weakref.ref) -> None:
+    breaker = ref()
+    if breaker is not None:
+        breaker._after_fork()
+
+
+class CircuitBreaker:
+    """
+    熔断器（线程安全）
+
+    - closed：正常放行，连续失败 failure_threshold 次后熔断
+    - open：直接拒绝调用，由后台线程每隔 cooldown 秒执行一次 probe 探测，
+      探测成功后恢复为 closed；请求本身从不参与探测，不会被超时拖慢
+
+    fork 出的子进程（如 gunicorn --preload 的 worker）不会继承探测线程，
+    子进程中熔断仍为 open 时，由第一次 allow() 调用重新启动探测
+
+    Args:
+        probe: 探测函数，抛出异常表示服务仍不可用
+        failure_threshold: 触发熔断的连续失败次数
+        cooldown: 探测间隔（秒）
+        on_open: 熔断时的回调
+        on_close: 恢复时的回调（在恢复放行前调用）
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+
+    def __init__(
+        self,
+        probe: Callable[[], object],
+        failure_threshold: int = 3,
+        cooldown: float = 10,
+        on_open: Optional[Callable[[Exception], None]] = None,
+        on_close: Optional[Callable[[], None]] = None
+    ):
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.on_open = on_open
+        self.on_close = on_close
+        self._state = self.CLOSED
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._probe_thread: Optional[threading.Thread] = None
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=partial(_reset_after_fork, weakref.ref(self)))
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """是否放行调用"""
+        if self._state == self.CLOSED:
+            return True
+        if self._probe_thread is None:
+            self._start_probe(0)
+        return False
+
+    def record_success(self) -> None:
+        """记录一次成功调用，清零连续失败计数"""
+        if self._failures:
+            with self._lock:
+                self._failures = 0
+
+    def record_failure(self, error: Exception = None) -> None:
+        """记录一次失败调用，连续失败达到阈值时熔断"""
+        with self._lock:
+            self._failures += 1
+            if self._failures < self.failure_threshold or self._state == self.OPEN:
+                return
+        self.trip(error)
+
+    def trip(self, error: Exception = None, delay: float = None) -> None:
+        """
+        立即熔断并启动后台探测
+
+        Args:
+            error: 导致熔断的异常（传给 on_open）
+            delay: 首次探测前的等待时间，默认为 cooldown；启动时传 0 可立即探测
+        """
+        with self._lock:
+            already_open = self._state == self.OPEN
+            self._state = self.OPEN
+        self._start_probe(self.cooldown if delay is None else delay)
+        if not already_open and self.on_open is not None:
+            self.on_open(error)
+
+    def reset(self) -> None:
+        """强制恢复为 closed（探测线程会在下次探测后退出）"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def _start_probe(self, delay: float) -> None:
+        """启动后台探测线程（已在运行时不重复启动）"""
+        with self._lock:
+            if self._probe_thread is not None:
+                return
+            self._probe_thread = threading.Thread(
+                target=self._probe_loop,
+                args=(delay,),
+                name='circuit-breaker-probe',
+                daemon=True
+            )
+            self._probe_thread.start()
+
+    def _after_fork(self) -> None:
+        """子进程中重置锁与探测线程：fork 时父进程的锁可能正被持有，探测线程也不会被继承"""
+        self._lock = threading.Lock()
+        self._probe_thread = None
+
+    def _probe_loop(self, delay: float) -> None:
+        """后台探测：直到探测成功或被 reset 为止"""
+        while True:
+            time.sleep(delay)
+            delay = self.cooldown
+            if self._state == self.OPEN:
+                try:
+                    self.probe()
+                except Exception:
+                    continue
+                if self.on_close is not None:
+                    try:
+                        self.on_close()
+                    except Exception:
+                        pass
+                with self._lock:
+                    self._state = self.CLOSED
+                    self._failures = 0
+                    self._probe_thread = None
+                return
+            with self._lock:
+                if self._state == self.CLOSED:
+                    self._probe_thread = None
+                    return
@@ -0,0 +1,137 @@
+"""
+Redis 缓存值编解码
+缓存值写入 Redis 前编码为带版本标记的字节串，读取时按首字节标记选择解码方式
+"""
+import json
+import zlib
+from typing import Any, Union
+
+try:
+    import msgpack
+except ImportError:  # 可选依赖，未安装时回退到 JSON
+    msgpack = None
+
+# 首字节版本标记（低 7 位为格式，最高位表示 zlib 压缩）
+# 旧格式的值是无标记的 JSON 文本或普通字符串：首字节为可打印字符或 UTF-8 起始字节，
+# 不会落在 0x01-0x03 / 0x81-0x83，新旧条目可以在滚动发布期间共存
+TAG_JSON = 0x01
+TAG_MSGPACK = 0x02
+TAG_TEXT = 0x03             # 原样存储的字符串（如预编码的响应体）
+FLAG_ZLIB = 0x80
+_KNOWN_TAGS = (TAG_JSON, TAG_MSGPACK, TAG_TEXT)
+
+
+class JsonCodec:
+    """JSON 编码（紧凑分隔符，保留非 ASCII 字符）"""
+    tag = TAG_JSON
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class MsgpackCodec:
+    """MessagePack 编码（二进制，体积和编解码耗时均小于 JSON）"""
+    tag = TAG_MSGPACK
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+CODECS = {
+    'json': JsonCodec,
+    'msgpack': MsgpackCodec,
+}
+
+
+class ValueCodec:
+    """
+    缓存值编解码器
+
+    - 写入：按配置的格式编码，超过压缩阈值且压缩后更小时使用 zlib，首字节写入版本标记
+    - 读取：按标记解码，任意格式和压缩状态的条目都能读取；无标记的旧值按原 JSON 逻辑解析
+    - codec='legacy' 时写入与旧版本完全相同的无标记格式，用于滚动发布第一阶段：
+      先让所有进程升级到能读取新格式的版本，再切换写入格式，旧进程不会读到无法识别的值
+
+    Args:
+        codec: 写入格式：'msgpack'（默认）、'json' 或 'legacy'；msgpack 未安装时回退到 json
+        compress_threshold: 编码后不小于该字节数时尝试压缩，0 表示不压缩
+        compress_level: zlib 压缩级别（1 最快，9 最小）
+    """
+
+    def __init__(self, codec: str = 'msgpack', compress_threshold: int = 1024, compress_level: int = 1):
+        if codec not in CODECS and codec != 'legacy':
+            raise ValueError(f'未知的缓存编码格式: {codec}')
+        if codec == 'msgpack' and msgpack is None:
+            codec = 'json'
+        self.name = codec
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+        self._codec = CODECS[codec]() if codec in CODECS else None
+        self._decoders = {TAG_JSON: JsonCodec()}
+        if msgpack is not None:
+            self._decoders[TAG_MSGPACK] = MsgpackCodec()
+
+    def encode(self, value: Any, raw: bool = False) -> Union[bytes, str, int, float]:
+        """
+        编码要写入 Redis 的值
+
+        Args:
+            value: 任意可序列化的值
+            raw: 为 True 时 value 是字符串，原样存储（仍可压缩）
+        """
+        if self._codec is None:
+            # 旧格式：dict/list 转为 JSON，其余原样写入
+            if not raw and isinstance(value, (dict, list)):
+                return json.dumps(value, ensure_ascii=False)
+            return value
+
+        if raw:
+            tag, payload = TAG_TEXT, value.encode('utf-8') if isinstance(value, str) else value
+        else:
+            tag, payload = self._codec.tag, self._codec.dumps(value)
+
+        if self.compress_threshold and len(payload) >= self.compress_threshold:
+            compressed = zlib.compress(payload, self.compress_level)
+            if len(compressed) < len(payload):
+                tag, payload = tag | FLAG_ZLIB, compressed
+        return bytes((tag,)) + payload
+
+    def decode(self, data: Union[bytes, str, None], raw: bool = False) -> Any:
+        """
+        解码从 Redis 读取的值
+
+        Args:
+            data: Redis 返回的字节串，为 None 时返回 None
+            raw: 为 True 时旧格式的值原样返回字符串，不做 JSON 解析
+        """
+        if data is None:
+            return None
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        if data and data[0] & ~FLAG_ZLIB in _KNOWN_TAGS:
+            tag, payload = data[0], data[1:]
+            if tag & FLAG_ZLIB:
+                payload = zlib.decompress(payload)
+            tag &= ~FLAG_ZLIB
+            if tag == TAG_TEXT:
+                return payload.decode('utf-8')
+            decoder = self._decoders.get(tag)
+            if decoder is None:
+                raise ValueError('缓存值为 msgpack 格式，但当前环境未安装 msgpack')
+            return decoder.loads(payload)
+
+        # 旧格式：尝试解析 JSON，失败时原样返回
+        text = data.decode('utf-8')
+        if raw:
+            return text
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            return text
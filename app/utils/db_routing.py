@@ -0,0 +1,188 @@
+"""
+数据库读写分离
+用 replica_read 标记的只读服务函数，其查询路由到只读副本；写入、写入后的读取仍走主库
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.util import find_tables
+
+from app.utils.redis_client import redis_client
+
+# 只读副本在 SQLALCHEMY_BINDS 中的键前缀（replica_0、replica_1 ...，见 config.py）
+REPLICA_BIND_PREFIX = 'replica_'
+# 用户写入后的主库粘滞标记，保留 DB_REPLICA_STICKY_SECONDS 秒
+STICKY_KEY_PREFIX = 'db:sticky:'
+# 表的写入标记，写入提交后保留 DB_REPLICA_STICKY_SECONDS 秒
+WRITTEN_KEY_PREFIX = 'db:written:'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+_cache_fill = ContextVar('cache_fill', default=False)
+
+
+def replica_read(func):
+    """
+    标记只读服务函数：函数内执行的查询可以路由到只读副本
+
+    以下情况仍走主库：未配置副本；会话中有未提交的修改或本会话已提交过写入；
+    当前用户在粘滞窗口内写过数据（保证写后读一致，窗口应大于副本的复制延迟）；
+    在 cache_fill 块内填充共享缓存，且查询的表在粘滞窗口内被写入过。
+
+    Usage:
+        @replica_read
+        def get_lab_list(cursor=None, per_page=20):
+            ...
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _replica_reads.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
+
+
+@contextmanager
+def cache_fill():
+    """
+    标记共享缓存的填充：块内查询的表在粘滞窗口内被任何用户写入过时走主库
+
+    写入使缓存失效后，其他用户的下一次未命中若从尚未同步的副本读取，会把写入前的数据
+    写入新版本的缓存并一直保留到过期（设备列表为 1 小时）；用户粘滞窗口只保护写入者本人。
+
+    Usage:
+        with cache_fill():
+            value = loader()
+    """
+    token = _cache_fill.set(True)
+    try:
+        yield
+    finally:
+        _cache_fill.reset(token)
+
+
+def _sticky_key(user: dict) -> str:
+    return f"{STICKY_KEY_PREFIX}{user.get('user_type')}:{user.get('user_id')}"
+
+
+def _user_sticky() -> bool:
+    """当前用户是否在写入后的粘滞窗口内（每个请求只查询一次）"""
+    if not has_request_context():
+        return False
+    sticky = g.get('db_primary_sticky')
+    if sticky is None:
+        user = g.get('current_user')
+        sticky = bool(user) and redis_client.get(_sticky_key(user)) is not None
+        g.db_primary_sticky = sticky
+    return sticky
+
+
+def _mark_user_sticky() -> None:
+    """当前用户写入后，粘滞窗口内的读取都走主库"""
+    if not has_request_context():
+        return
+    g.db_primary_sticky = True
+    user = g.get('current_user')
+    window = current_app.config.get('DB_REPLICA_STICKY_SECONDS', 5)
+    if user and window > 0:
+        redis_client.set(_sticky_key(user), 1, ex=max(1, round(window)))
+
+
+def _statement_tables(mapper, clause) -> set:
+    """查询涉及的表名"""
+    if clause is not None:
+        return {t.name for t in find_tables(clause, include_joins=True) if isinstance(t, sa.Table)}
+    if mapper is not None:
+        return {t.name for t in mapper.tables}
+    return set()
+
+
+def _recently_written(tables: set) -> bool:
+    """这些表是否在粘滞窗口内被写入过（每个请求每张表只查询一次）"""
+    cache = g.setdefault('db_written_tables', {}) if has_request_context() else {}
+    for table in tables:
+        written = cache.get(table)
+        if written is None:
+            written = cache[table] = redis_client.get(f'{WRITTEN_KEY_PREFIX}{table}') is not None
+        if written:
+            return True
+    return False
+
+
+def _mark_tables_written(tables: set) -> None:
+    """记录写入的表，粘滞窗口内填充共享缓存的查询读取这些表时走主库"""
+    window = current_app.config.get('DB_REPLICA_STICKY_SECONDS', 5)
+    if not tables or window <= 0:
+        return
+    with redis_client.pipeline() as pipe:
+        for table in tables:
+            pipe.set(f'{WRITTEN_KEY_PREFIX}{table}', 1, ex=max(1, round(window)))
+
+
+def _written_tables(session) -> set:
+    return session.info.setdefault('written_tables', set())
+
+
+class RoutingSession(Session):
+    """
+    按读写路由的会话
+
+    在 flask_sqlalchemy 按 bind_key 选择引擎的基础上，replica_read 标记的函数中
+    执行的查询随机选择一个只读副本
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if isinstance(clause, sa.sql.dml.UpdateBase):
+            # 批量 UPDATE/DELETE 不经过 flush，同样记为写入
+            _written_tables(self).add(clause.table.name)
+        elif bind is None and _replica_reads.get() and not self._flushing:
+            engine = self._replica_engine(mapper, clause)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def replicas(self) -> list:
+        """已配置的只读副本引擎"""
+        return [
+            engine for key, engine in self._db.engines.items()
+            if key and key.startswith(REPLICA_BIND_PREFIX)
+        ]
+
+    def _replica_engine(self, mapper=None, clause=None):
+        if self.info.get('primary_sticky') or self.new or self.dirty or self.deleted:
+            return None
+        replicas = self.replicas()
+        if not replicas or _user_sticky():
+            return None
+        if _cache_fill.get() and _recently_written(_statement_tables(mapper, clause)):
+            return None
+        return random.choice(replicas)
+
+
+@sa.event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    # after_flush 中 new/dirty/deleted 仍是 flush 之前的状态
+    tables = _written_tables(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        tables.update(t.name for t in sa.inspect(obj).mapper.tables)
+
+
+@sa.event.listens_for(RoutingSession, 'after_commit')
+def _after_commit(session):
+    tables = session.info.pop('written_tables', None)
+    if tables:
+        session.info['primary_sticky'] = True
+        if session.replicas():
+            _mark_user_sticky()
+            _mark_tables_written(tables)
+
+
+@sa.event.listens_for(RoutingSession, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('written_tables', None)
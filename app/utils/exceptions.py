@@ -57,6 +57,16 @@ class ForbiddenError(APIException):
     message = '禁止访问'
 
 
+class ServiceUnavailableError(APIException):
+    """服务暂时不可用（过载），retry_after 为建议的重试间隔秒数"""
+    status_code = 503
+    message = '服务繁忙，请稍后重试'
+    
+    def __init__(self, message=None, retry_after=None, payload=None):
+        APIException.__init__(self, message, payload=payload)
+        self.retry_after = retry_after
+
+
 def register_error_handlers(app: Flask):
     """注册全局错误处理器"""
     
@@ -69,6 +79,8 @@ def register_error_handlers(app: Flask):
             'data': error.payload if error.payload else None
         })
         response.status_code = error.status_code
+        if getattr(error, 'retry_after', None):
+            response.headers['Retry-After'] = str(error.retry_after)
         return response
     
     @app.errorhandler(HTTPException)
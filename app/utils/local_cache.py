@@ -0,0 +1,69 @@
+"""
+进程内缓存
+作为 Redis 前面的第一级缓存，提供有容量上限的 LRU + TTL 存储
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class LocalCache:
+    """
+    进程内 LRU + TTL 缓存（线程安全）
+
+    - 超过 max_size 时淘汰最久未使用的条目
+    - 每个条目的存活时间不超过 ttl 秒，即使跨进程失效广播丢失，本地数据最多陈旧 ttl 秒
+    - 存储的是反序列化后的对象，调用方不应修改 get 返回的值
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 5):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """获取未过期的值，命中时将条目移到最近使用的位置"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expire_at, value = item
+            if expire_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float = None) -> None:
+        """
+        写入值
+
+        Args:
+            key: 键名
+            value: 值
+            ttl: 存活时间（秒），不会超过实例的 ttl 上限
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        """删除键"""
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,424 @@
+"""
+进程内缓存后端
+实现 RedisClient 用到的 redis-py 命令子集，单机部署或测试时可替代 Redis
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from redis.exceptions import DataError, ResponseError
+
+_WRONGTYPE = 'WRONGTYPE Operation against a key holding the wrong kind of value'
+
+# 条目类型
+_STRING = 'string'
+_HASH = 'hash'
+_LIST = 'list'
+_ZSET = 'zset'
+
+
+def _encode(value: Any) -> bytes:
+    """与 redis-py 相同的参数编码规则：bytes 原样，str 按 UTF-8，数字转为字符串"""
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, bool) or value is None:
+        raise DataError(f'Invalid input of type: {type(value).__name__!r}. Convert to a bytes, string, int or float first.')
+    if isinstance(value, (int, float)):
+        return repr(value).encode()
+    if isinstance(value, str):
+        return value.encode('utf-8')
+    raise DataError(f'Invalid input of type: {type(value).__name__!r}. Convert to a bytes, string, int or float first.')
+
+
+def _sizeof(kind: str, value: Any) -> int:
+    """估算条目占用的字节数（只计键值内容，用于容量淘汰）"""
+    if kind == _STRING:
+        return len(value)
+    if kind == _HASH:
+        return sum(len(k) + len(v) for k, v in value.items())
+    if kind == _ZSET:
+        return sum(len(k) + 8 for k in value)
+    return sum(len(v) for v in value)
+
+
+def _score_bound(value: Any) -> tuple:
+    """解析 ZRANGEBYSCORE 的分值边界：数字、'-inf'/'+inf'，或 '(' 开头表示不含边界"""
+    if isinstance(value, (int, float)):
+        return float(value), False
+    value = value.decode() if isinstance(value, bytes) else value
+    exclusive = value.startswith('(')
+    try:
+        return float(value[1:] if exclusive else value), exclusive
+    except ValueError:
+        raise ResponseError('min or max is not a float')
+
+
+class _Store:
+    """多个 MemoryBackend 视图共享的数据（如解码与不解码响应的两个客户端）"""
+
+    def __init__(self, max_memory: int):
+        self.max_memory = max_memory
+        self.data: OrderedDict = OrderedDict()     # 键 -> [类型, 值, 过期时间(monotonic) 或 None, 字节数]
+        self.used_memory = 0
+        self.lock = threading.RLock()
+
+
+class MemoryBackend:
+    """
+    进程内 Redis 替代实现（线程安全）
+
+    - 支持字符串、哈希、列表、有序集合四种类型，以及 TTL 过期（访问时惰性删除）
+    - 总字节数超过 max_memory 时按 LRU 淘汰（相当于 allkeys-lru）
+    - pipeline 在同一把锁内顺序执行，天然满足 MULTI/EXEC 的原子性
+    - Lua 脚本以同名方法实现（如 token_bucket），同样在锁内原子执行
+    - 不支持 pub/sub：数据只存在于当前进程，使用该后端时应关闭本地缓存层
+
+    Args:
+        max_memory: 最大占用字节数，0 表示不限制
+        decode_responses: 是否将返回值解码为字符串（与 redis-py 的同名参数一致）
+    """
+
+    def __init__(self, max_memory: int = 64 * 1024 * 1024, decode_responses: bool = False, store: _Store = None):
+        self._store = store or _Store(max_memory)
+        self.decode_responses = decode_responses
+
+    def with_decoding(self, decode_responses: bool) -> 'MemoryBackend':
+        """返回共享同一份数据、但解码方式不同的视图"""
+        return MemoryBackend(decode_responses=decode_responses, store=self._store)
+
+    @property
+    def used_memory(self) -> int:
+        return self._store.used_memory
+
+    # ========== 内部工具 ==========
+
+    def _decode(self, value: Optional[bytes]) -> Any:
+        if value is None or not self.decode_responses:
+            return value
+        return value.decode('utf-8')
+
+    def _entry(self, name: str, kind: str = None) -> Optional[list]:
+        """获取未过期的条目并标记为最近使用；类型不符时抛出 WRONGTYPE"""
+        store = self._store
+        entry = store.data.get(name)
+        if entry is None:
+            return None
+        if entry[2] is not None and entry[2] <= time.monotonic():
+            self._remove(name)
+            return None
+        if kind is not None and entry[0] != kind:
+            raise ResponseError(_WRONGTYPE)
+        store.data.move_to_end(name)
+        return entry
+
+    def _remove(self, name: str) -> bool:
+        entry = self._store.data.pop(name, None)
+        if entry is None:
+            return False
+        self._store.used_memory -= entry[3]
+        return True
+
+    def _put(self, name: str, kind: str, value: Any, expire_at: Optional[float]) -> None:
+        self._remove(name)
+        size = len(name) + _sizeof(kind, value)
+        self._store.data[name] = [kind, value, expire_at, size]
+        self._store.used_memory += size
+        self._evict()
+
+    def _resize(self, name: str, entry: list) -> None:
+        """容器类型原地修改后重新计算大小"""
+        size = len(name) + _sizeof(entry[0], entry[1])
+        self._store.used_memory += size - entry[3]
+        entry[3] = size
+        self._evict()
+
+    def _evict(self) -> None:
+        store = self._store
+        if not store.max_memory:
+            return
+        while store.used_memory > store.max_memory and len(store.data) > 1:
+            name = next(iter(store.data))
+            self._remove(name)
+
+    def _container(self, name: str, kind: str, factory) -> list:
+        """获取容器类型条目，不存在时创建（保留原有过期时间）"""
+        entry = self._entry(name, kind)
+        if entry is None:
+            self._put(name, kind, factory(), None)
+            entry = self._store.data[name]
+        return entry
+
+    # ========== 通用命令 ==========
+
+    def ping(self) -> bool:
+        return True
+
+    def delete(self, *names: str) -> int:
+        with self._store.lock:
+            return sum(1 for name in names if self._entry(name) is not None and self._remove(name))
+
+    def exists(self, *names: str) -> int:
+        with self._store.lock:
+            return sum(1 for name in names if self._entry(name) is not None)
+
+    def expire(self, name: str, time_: int) -> bool:
+        return self.pexpire(name, int(time_ * 1000))
+
+    def pexpire(self, name: str, time_: int) -> bool:
+        with self._store.lock:
+            entry = self._entry(name)
+            if entry is None:
+                return False
+            if time_ <= 0:
+                self._remove(name)
+            else:
+                entry[2] = time.monotonic() + time_ / 1000
+            return True
+
+    def pttl(self, name: str) -> int:
+        with self._store.lock:
+            entry = self._entry(name)
+            if entry is None:
+                return -2
+            if entry[2] is None:
+                return -1
+            return max(int((entry[2] - time.monotonic()) * 1000), 0)
+
+    def ttl(self, name: str) -> int:
+        ms = self.pttl(name)
+        return ms if ms < 0 else (ms + 999) // 1000
+
+    def publish(self, channel: str, message: Any) -> int:
+        # 单进程后端没有订阅者
+        return 0
+
+    def flushdb(self) -> bool:
+        with self._store.lock:
+            self._store.data.clear()
+            self._store.used_memory = 0
+        return True
+
+    # ========== 字符串 ==========
+
+    def get(self, name: str) -> Any:
+        with self._store.lock:
+            entry = self._entry(name, _STRING)
+            return None if entry is None else self._decode(entry[1])
+
+    def mget(self, keys, *args) -> list:
+        names = list(keys) + list(args) if isinstance(keys, (list, tuple)) else [keys, *args]
+        with self._store.lock:
+            results = []
+            for name in names:
+                entry = self._entry(name)
+                results.append(self._decode(entry[1]) if entry is not None and entry[0] == _STRING else None)
+            return results
+
+    def set(self, name: str, value: Any, ex: int = None, px: int = None, nx: bool = False) -> Optional[bool]:
+        value = _encode(value)
+        with self._store.lock:
+            if nx and self._entry(name) is not None:
+                return None
+            if ex is not None:
+                expire_at = time.monotonic() + ex
+            elif px is not None:
+                expire_at = time.monotonic() + px / 1000
+            else:
+                expire_at = None
+            self._put(name, _STRING, value, expire_at)
+            return True
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        with self._store.lock:
+            entry = self._entry(name, _STRING)
+            try:
+                value = int(entry[1]) + amount if entry is not None else amount
+            except ValueError:
+                raise ResponseError('value is not an integer or out of range')
+            expire_at = entry[2] if entry is not None else None
+            self._put(name, _STRING, str(value).encode(), expire_at)
+            return value
+
+    # ========== 哈希 ==========
+
+    def hset(self, name: str, key: Any = None, value: Any = None, mapping: dict = None) -> int:
+        items = {}
+        if key is not None:
+            items[_encode(key)] = _encode(value)
+        for k, v in (mapping or {}).items():
+            items[_encode(k)] = _encode(v)
+        if not items:
+            raise DataError("'hset' with no key value pairs")
+        with self._store.lock:
+            entry = self._container(name, _HASH, dict)
+            added = sum(1 for k in items if k not in entry[1])
+            entry[1].update(items)
+            self._resize(name, entry)
+            return added
+
+    def hincrby(self, name: str, key: Any, amount: int = 1) -> int:
+        field = _encode(key)
+        with self._store.lock:
+            entry = self._container(name, _HASH, dict)
+            try:
+                value = int(entry[1].get(field, b'0')) + amount
+            except ValueError:
+                raise ResponseError('hash value is not an integer')
+            entry[1][field] = str(value).encode()
+            self._resize(name, entry)
+            return value
+
+    def hget(self, name: str, key: Any) -> Any:
+        with self._store.lock:
+            entry = self._entry(name, _HASH)
+            return None if entry is None else self._decode(entry[1].get(_encode(key)))
+
+    def hmget(self, name: str, keys, *args) -> list:
+        fields = list(keys) + list(args) if isinstance(keys, (list, tuple)) else [keys, *args]
+        with self._store.lock:
+            entry = self._entry(name, _HASH)
+            values = {} if entry is None else entry[1]
+            return [self._decode(values.get(_encode(f))) for f in fields]
+
+    def hgetall(self, name: str) -> dict:
+        with self._store.lock:
+            entry = self._entry(name, _HASH)
+            if entry is None:
+                return {}
+            return {self._decode(k): self._decode(v) for k, v in entry[1].items()}
+
+    # ========== 列表 ==========
+
+    def lpush(self, name: str, *values: Any) -> int:
+        encoded = [_encode(v) for v in values]
+        with self._store.lock:
+            entry = self._container(name, _LIST, list)
+            entry[1][:0] = reversed(encoded)
+            self._resize(name, entry)
+            return len(entry[1])
+
+    def rpush(self, name: str, *values: Any) -> int:
+        encoded = [_encode(v) for v in values]
+        with self._store.lock:
+            entry = self._container(name, _LIST, list)
+            entry[1].extend(encoded)
+            self._resize(name, entry)
+            return len(entry[1])
+
+    def lrange(self, name: str, start: int, end: int) -> list:
+        with self._store.lock:
+            entry = self._entry(name, _LIST)
+            if entry is None:
+                return []
+            items = entry[1]
+            end = len(items) if end == -1 else (end + 1 if end >= 0 else len(items) + end + 1)
+            return [self._decode(v) for v in items[start if start >= 0 else max(len(items) + start, 0):end]]
+
+    # ========== 有序集合 ==========
+
+    def zadd(self, name: str, mapping: dict) -> int:
+        items = {_encode(member): float(score) for member, score in mapping.items()}
+        with self._store.lock:
+            entry = self._container(name, _ZSET, dict)
+            added = sum(1 for member in items if member not in entry[1])
+            entry[1].update(items)
+            self._resize(name, entry)
+            return added
+
+    def _zrange_members(self, entry: Optional[list], min: Any, max: Any) -> list:
+        if entry is None:
+            return []
+        (low, low_open), (high, high_open) = _score_bound(min), _score_bound(max)
+        return [
+            (member, score) for member, score in sorted(entry[1].items(), key=lambda item: (item[1], item[0]))
+            if (score > low if low_open else score >= low) and (score < high if high_open else score <= high)
+        ]
+
+    def zrangebyscore(self, name: str, min: Any, max: Any, withscores: bool = False) -> list:
+        with self._store.lock:
+            members = self._zrange_members(self._entry(name, _ZSET), min, max)
+            if withscores:
+                return [(self._decode(member), score) for member, score in members]
+            return [self._decode(member) for member, _ in members]
+
+    def zremrangebyscore(self, name: str, min: Any, max: Any) -> int:
+        with self._store.lock:
+            entry = self._entry(name, _ZSET)
+            members = self._zrange_members(entry, min, max)
+            for member, _ in members:
+                del entry[1][member]
+            if entry is not None:
+                if entry[1]:
+                    self._resize(name, entry)
+                else:
+                    self._remove(name)
+            return len(members)
+
+    def zcard(self, name: str) -> int:
+        with self._store.lock:
+            entry = self._entry(name, _ZSET)
+            return 0 if entry is None else len(entry[1])
+
+    # ========== 脚本 ==========
+
+    def token_bucket(self, name: str, rate: float, capacity: int, cost: int = 1) -> tuple:
+        """令牌桶取令牌，与 redis_client.TOKEN_BUCKET_SCRIPT 的语义相同"""
+        with self._store.lock:
+            now = time.time()
+            entry = self._entry(name, _HASH)
+            if entry is None:
+                tokens = capacity
+            else:
+                state = entry[1]
+                tokens = min(capacity, float(state[b'tokens']) + max(0.0, now - float(state[b'ts'])) * rate)
+            allowed, wait = tokens >= cost, 0.0
+            if allowed:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            self._put(name, _HASH, {b'tokens': repr(tokens).encode(), b'ts': repr(now).encode()},
+                      time.monotonic() + capacity / rate + 1)
+            return allowed, wait, tokens
+
+    # ========== 管道 ==========
+
+    def pipeline(self, transaction: bool = True) -> 'MemoryPipeline':
+        return MemoryPipeline(self)
+
+
+class MemoryPipeline:
+    """
+    MemoryBackend 的命令管道：命令先缓存，execute 时在同一把锁内顺序执行
+
+    与 redis-py 一致，单条命令出错不影响其他命令执行，全部执行完后抛出第一个错误
+    """
+
+    def __init__(self, backend: MemoryBackend):
+        self._backend = backend
+        self._commands = []
+
+    def __getattr__(self, name: str):
+        method = getattr(self._backend, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((method, args, kwargs))
+            return self
+        return queue
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def execute(self) -> list:
+        results, error = [], None
+        with self._backend._store.lock:
+            for method, args, kwargs in self._commands:
+                try:
+                    results.append(method(*args, **kwargs))
+                except ResponseError as e:
+                    results.append(e)
+                    error = error or e
+        self._commands = []
+        if error is not None:
+            raise error
+        return results
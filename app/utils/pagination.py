@@ -0,0 +1,136 @@
+"""
+键集（游标）分页
+按排序列定位上一页最后一条记录之后的数据，查询只扫描一页的索引范围，耗时与翻页深度无关
+"""
+import base64
+import json
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+from marshmallow import ValidationError as MarshmallowValidationError
+from sqlalchemy import Select, and_, or_
+
+from app.utils.exceptions import ValidationError
+from app.utils.projection import fetch_rows
+from app.utils.schemas import PaginationSchema
+
+_pagination_schema = PaginationSchema()
+
+
+class Page(NamedTuple):
+    """一页数据：items 为本页记录（ORM 对象，或列投影查询的字典），next_cursor 为下一页游标（没有下一页时为 None）"""
+    items: list
+    next_cursor: Optional[str]
+
+
+def encode_cursor(values: list) -> str:
+    """将排序列的值编码为不透明游标（URL 安全的 base64，无填充）"""
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(',', ':')
+    )
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor: str) -> list:
+    """
+    解码游标
+
+    Raises:
+        ValidationError: 游标格式无效
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValidationError('cursor 无效', payload={'field': 'cursor'})
+    if not isinstance(values, list) or not values:
+        raise ValidationError('cursor 无效', payload={'field': 'cursor'})
+    return values
+
+
+def parse_pagination(args) -> Tuple[Optional[str], int]:
+    """
+    解析并校验分页查询参数（cursor、per_page）
+
+    Returns:
+        tuple: (游标, 每页数量)
+
+    Raises:
+        ValidationError: 参数无效
+    """
+    try:
+        data = _pagination_schema.load(args)
+    except MarshmallowValidationError as e:
+        raise ValidationError('分页参数无效', payload=e.messages)
+    if data['cursor'] is not None:
+        decode_cursor(data['cursor'])
+    return data['cursor'], data['per_page']
+
+
+def _cursor_value(column, value):
+    """将游标中的值还原为排序列的类型，类型不符时视为无效游标"""
+    python_type = column.type.python_type
+    try:
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        pass
+    else:
+        if isinstance(value, python_type) and not isinstance(value, bool):
+            return value
+    raise ValidationError('cursor 无效', payload={'field': 'cursor'})
+
+
+def paginate(query, order_by: List[tuple], cursor: Optional[str] = None, per_page: int = 20) -> Page:
+    """
+    对查询进行键集分页
+
+    排序列的组合必须唯一（末尾带上主键），并且应有对应的索引（InnoDB 二级索引隐含主键，
+    (apply_time) 索引即可支持 ORDER BY apply_time, id）。
+
+    Args:
+        query: 已加好筛选条件的查询，可以是 ORM 查询，也可以是 select(*列) 投影语句
+               （投影语句须包含排序列，本页记录为字典）
+        order_by: 排序列与方向，如 [(Reservation.apply_time, True), (Reservation.id, True)]，True 表示倒序
+        cursor: 上一页返回的 next_cursor，为空表示第一页
+        per_page: 每页数量
+
+    Returns:
+        Page: 本页记录与下一页游标
+
+    Raises:
+        ValidationError: 游标无效
+
+    Usage:
+        page = paginate(Equipment.query, [(Equipment.id, False)], cursor, per_page)
+        page = paginate(select(Equipment.id, Equipment.name), [(Equipment.id, False)], cursor, per_page)
+    """
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(order_by):
+            raise ValidationError('cursor 无效', payload={'field': 'cursor'})
+        values = [_cursor_value(column, v) for (column, _), v in zip(order_by, values)]
+
+        # (a, b) 在游标之后：a 越过游标值，或 a 相等且 b 越过游标值
+        conditions = []
+        for i, (column, descending) in enumerate(order_by):
+            equal = [c == v for (c, _), v in zip(order_by[:i], values[:i])]
+            beyond = column < values[i] if descending else column > values[i]
+            conditions.append(and_(*equal, beyond))
+        query = query.filter(or_(*conditions))
+
+    query = query.order_by(*[column.desc() if descending else column for column, descending in order_by])
+    # 多取一条判断是否还有下一页
+    projected = isinstance(query, Select)
+    query = query.limit(per_page + 1)
+    items = fetch_rows(query) if projected else query.all()
+    if len(items) <= per_page:
+        return Page(items, None)
+    items = items[:per_page]
+    last = items[-1]
+    if projected:
+        values = [last[column.key] for column, _ in order_by]
+    else:
+        values = [getattr(last, column.key) for column, _ in order_by]
+    return Page(items, encode_cursor(values))
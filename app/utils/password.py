@@ -0,0 +1,136 @@
+"""
+密码哈希工具
+密码校验与哈希计算放到有界线程池中执行，并按配置的哈希参数在登录成功时升级旧哈希
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+from typing import Callable
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.utils.exceptions import ServiceUnavailableError
+
+# 过载时建议客户端重试的间隔（秒）
+RETRY_AFTER = 1
+
+
+class PasswordPool:
+    """
+    密码哈希线程池（有界，带背压）
+
+    hashlib 的 scrypt/pbkdf2 计算期间会释放 GIL，放到线程池中执行既能用满多核，
+    又不会长时间占住请求线程。同时排队与执行中的任务数超过 max_pending 时直接拒绝，
+    不再无限排队，避免登录高峰拖垮其他接口。
+
+    Args:
+        workers: 工作线程数
+        max_pending: 最多同时排队与执行的任务数
+        timeout: 等待结果的最长秒数
+    """
+
+    def __init__(self, workers: int, max_pending: int, timeout: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pid = os.getpid()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password')
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def run(self, func: Callable, *args):
+        """
+        在线程池中执行 func 并等待结果
+
+        Raises:
+            ServiceUnavailableError: 队列已满或等待超时
+        """
+        if not self._slots.acquire(blocking=False):
+            raise ServiceUnavailableError('登录请求过多，请稍后重试', retry_after=RETRY_AFTER)
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise ServiceUnavailableError('登录请求过多，请稍后重试', retry_after=RETRY_AFTER)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _pool() -> PasswordPool:
+    """当前进程的密码哈希线程池（首次使用时创建，多进程部署时每个进程各自创建）"""
+    pool = current_app.extensions.get('password_pool')
+    if pool is None or pool.pid != os.getpid():
+        workers = current_app.config.get('PASSWORD_HASH_WORKERS') or os.cpu_count() or 1
+        pool = PasswordPool(
+            workers=workers,
+            max_pending=current_app.config.get('PASSWORD_HASH_MAX_PENDING') or workers * 4,
+            timeout=current_app.config.get('PASSWORD_HASH_TIMEOUT', 5)
+        )
+        current_app.extensions['password_pool'] = pool
+    return pool
+
+
+def hash_password(password: str) -> str:
+    """按当前配置的哈希参数计算密码哈希（在调用线程中执行）"""
+    return generate_password_hash(password, method=current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt'))
+
+
+@lru_cache(maxsize=8)
+def _method_spec(method: str) -> str:
+    """
+    将配置的哈希方法展开为哈希串中的完整参数（如 'scrypt' -> 'scrypt:32768:8:1'）
+
+    默认参数由 werkzeug 决定，这里计算一次空密码的哈希取其前缀
+    """
+    return generate_password_hash('', method=method, salt_length=1).partition('$')[0]
+
+
+def needs_rehash(pwhash: str) -> bool:
+    """已存储的哈希参数是否与当前配置不同"""
+    method = current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt')
+    return pwhash.partition('$')[0] != _method_spec(method)
+
+
+def verify_password(pwhash: str, password: str) -> bool:
+    """
+    在线程池中校验密码
+
+    Raises:
+        ServiceUnavailableError: 线程池已满或等待超时
+    """
+    return _pool().run(check_password_hash, pwhash, password)
+
+
+def rehash_password(password: str) -> str:
+    """
+    在线程池中按当前配置重新计算密码哈希
+
+    Raises:
+        ServiceUnavailableError: 线程池已满或等待超时
+    """
+    method = current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt')
+    return _pool().run(generate_password_hash, password, method)
+
+
+def upgrade_password_hash(user, password: str) -> None:
+    """
+    按当前配置重新计算并保存用户的密码哈希（登录成功后调用）
+
+    失败只记录日志，不影响本次登录；下次登录时会再次尝试
+    """
+    from app import db     # 延迟导入，避免循环依赖
+
+    try:
+        user.password_hash = rehash_password(password)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning(f'密码哈希升级失败: user={user.id}, error={e}')
@@ -0,0 +1,229 @@
+"""
+数据库连接池指标
+统计取连接等待耗时、等待线程数、溢出连接数与连接探活结果，并按空闲时长决定是否探活
+"""
+import os
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+
+from sqlalchemy import event
+from sqlalchemy.exc import DisconnectionError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# 取连接耗时直方图的桶上界（毫秒），超过最后一个桶计入 inf
+CHECKOUT_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+def _bucket_field(latency_ms: float) -> str:
+    for bound in CHECKOUT_BUCKETS_MS:
+        if latency_ms <= bound:
+            return f'le_{bound}'
+    return 'le_inf'
+
+
+class PoolMetrics:
+    """
+    单个连接池的进程内指标（线程安全，进程启动以来的累计值）
+    """
+
+    def __init__(self):
+        self._counters = defaultdict(int)
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.max_waiting = 0
+        self.max_overflow_used = 0
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    def start_wait(self) -> None:
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def finish_wait(self, latency: float, overflow: int, timed_out: bool = False) -> None:
+        """记录一次取连接（latency 为秒，overflow 为取到后的溢出连接数）"""
+        latency_ms = latency * 1000
+        with self._lock:
+            self.waiting -= 1
+            self.max_overflow_used = max(self.max_overflow_used, overflow)
+            if timed_out:
+                self._counters['timeouts'] += 1
+                return
+            self._counters['checkouts'] += 1
+            self._counters['checkout_us'] += int(latency_ms * 1000)
+            self._counters['checkout_max_us'] = max(self._counters['checkout_max_us'], int(latency_ms * 1000))
+            self._counters[_bucket_field(latency_ms)] += 1
+
+    def snapshot(self) -> dict:
+        """
+        当前指标
+
+        分位耗时取所在直方图桶的上界，是近似值；超出最大桶时为 '>5000'
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            waiting, max_waiting, max_overflow_used = self.waiting, self.max_waiting, self.max_overflow_used
+        checkouts = counters.get('checkouts', 0)
+
+        def percentile(q):
+            if not checkouts:
+                return None
+            threshold, seen = q * checkouts, 0
+            for bound in CHECKOUT_BUCKETS_MS:
+                seen += counters.get(f'le_{bound}', 0)
+                if seen >= threshold:
+                    return bound
+            return f'>{CHECKOUT_BUCKETS_MS[-1]}'
+
+        return {
+            'checkouts': checkouts,
+            'checkout_avg_ms': round(counters.get('checkout_us', 0) / checkouts / 1000, 3) if checkouts else None,
+            'checkout_p50_ms': percentile(0.5),
+            'checkout_p95_ms': percentile(0.95),
+            'checkout_p99_ms': percentile(0.99),
+            'checkout_max_ms': round(counters.get('checkout_max_us', 0) / 1000, 3),
+            'checkout_histogram': {
+                f'le_{bound}': counters.get(f'le_{bound}', 0) for bound in (*CHECKOUT_BUCKETS_MS, 'inf')
+            },
+            'timeouts': counters.get('timeouts', 0),
+            'waiting': waiting,
+            'max_waiting': max_waiting,
+            'max_overflow_used': max_overflow_used,
+            'connects': counters.get('connects', 0),
+            'invalidations': counters.get('invalidations', 0),
+            'pings': counters.get('pings', 0),
+            'ping_failures': counters.get('ping_failures', 0),
+        }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    带指标的 QueuePool
+
+    取连接的耗时包含排队等待与新建连接；连接空闲超过 idle_ping_seconds 时，
+    取出前先探活（SELECT 1），失败则丢弃并换一条连接，替代每次取连接都探活的 pool_pre_ping。
+
+    create_engine 不接受额外的连接池参数，探活阈值通过 instrumented_pool_class 生成的子类设置。
+
+    Attributes:
+        idle_ping_seconds: 空闲多少秒后取出前探活，0 表示每次都探活，None 表示不探活
+    """
+
+    idle_ping_seconds = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+        if kwargs.get('_dispatch') is not None:
+            # recreate() 重建的连接池会沿用原连接池的监听（共享同一份指标），不能重复注册
+            return
+        event.listen(self, 'connect', self._on_connect)
+        event.listen(self, 'checkin', self._on_checkin)
+        event.listen(self, 'checkout', self._on_checkout)
+        event.listen(self, 'invalidate', self._on_invalidate)
+
+    def recreate(self):
+        # dispose 后重建连接池时保留累计指标
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        self.metrics.start_wait()
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.finish_wait(time.perf_counter() - started, self.overflow(), timed_out=True)
+            raise
+        except BaseException:
+            self.metrics.finish_wait(time.perf_counter() - started, self.overflow(), timed_out=False)
+            raise
+        self.metrics.finish_wait(time.perf_counter() - started, self.overflow())
+        return connection
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        connection_record.info['checkin_at'] = time.monotonic()
+        self.metrics.incr('connects')
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        connection_record.info['checkin_at'] = time.monotonic()
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.metrics.incr('invalidations')
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        threshold = self.idle_ping_seconds
+        if threshold is None:
+            return
+        if time.monotonic() - connection_record.info.get('checkin_at', 0) < threshold:
+            return
+        self.metrics.incr('pings')
+        try:
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute('SELECT 1')
+            finally:
+                cursor.close()
+        except Exception as e:
+            self.metrics.incr('ping_failures')
+            # 连接池收到 DisconnectionError 后会丢弃该连接并重新获取
+            raise DisconnectionError(f'连接探活失败: {e}') from e
+
+    def status_dict(self) -> dict:
+        """连接池当前状态与累计指标"""
+        return {
+            'pid': os.getpid(),
+            'pool_size': self.size(),
+            'max_overflow': self._max_overflow,
+            'connections': self.size() + self.overflow(),     # 当前已建立的连接数
+            'checked_in': self.checkedin(),
+            'checked_out': self.checkedout(),
+            'overflow': max(0, self.overflow()),
+            'idle_ping_seconds': self.idle_ping_seconds,
+            **self.metrics.snapshot(),
+        }
+
+
+@lru_cache(maxsize=8)
+def instrumented_pool_class(idle_ping_seconds):
+    """生成指定探活阈值的 InstrumentedQueuePool 子类"""
+    return type('InstrumentedQueuePool', (InstrumentedQueuePool,), {'idle_ping_seconds': idle_ping_seconds})
+
+
+def configure_engine_options(app) -> None:
+    """
+    为使用连接池（配置了 pool_size）的引擎换用 InstrumentedQueuePool
+
+    DB_POOL_IDLE_PING_SECONDS 决定空闲探活阈值（小于 0 表示不探活）；
+    需在 db.init_app 之前调用，只读副本的引擎使用同一组参数
+    """
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if 'pool_size' not in options or 'poolclass' in options:
+        return
+    idle_ping = app.config.get('DB_POOL_IDLE_PING_SECONDS', 30)
+    options['poolclass'] = instrumented_pool_class(idle_ping if idle_ping >= 0 else None)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def pool_stats(engines: dict) -> list:
+    """
+    各引擎连接池的状态（当前进程）
+
+    Args:
+        engines: db.engines（{bind_key: Engine}）
+    """
+    stats = []
+    for bind_key, engine in engines.items():
+        pool = engine.pool
+        item = {'bind': bind_key or 'primary', 'url': engine.url.render_as_string(hide_password=True)}
+        if isinstance(pool, InstrumentedQueuePool):
+            item.update(pool.status_dict())
+        else:
+            item.update({'pid': os.getpid(), 'pool_class': type(pool).__name__, 'status': pool.status()})
+        stats.append(item)
+    return stats
@@ -0,0 +1,80 @@
+"""
+列投影查询
+列表接口只按响应 Schema 需要的列执行 Core 查询，直接由行元组构造字典，
+不创建 ORM 实体，也不经过 identity map 与关系属性的初始化
+"""
+from typing import Iterator, List
+
+from sqlalchemy import inspect
+
+
+def schema_columns(model, schema) -> List:
+    """
+    响应 Schema 各字段对应的模型列
+
+    Args:
+        model: ORM 模型类
+        schema: Schema 实例（only/exclude 等选项同样生效）
+
+    Returns:
+        list: 可直接传给 select() 的列属性，顺序与 Schema 字段一致
+
+    Raises:
+        ValueError: Schema 中有字段不是模型的列（如关系、计算属性），无法投影
+
+    Usage:
+        columns = schema_columns(Equipment, EquipmentSchema())
+        stmt = select(*columns).where(Equipment.lab_id == 1)
+    """
+    column_attrs = inspect(model).column_attrs
+    columns = []
+    for field_name, field in schema.dump_fields.items():
+        attr = field.attribute or field_name
+        if attr not in column_attrs:
+            raise ValueError(f'{type(schema).__name__}.{field_name} 不是 {model.__name__} 的列，无法投影')
+        columns.append(getattr(model, attr))
+    return columns
+
+
+def fetch_rows(stmt, session=None) -> List[dict]:
+    """
+    执行 Core 查询，返回以列名为键的字典列表
+
+    Args:
+        stmt: select() 语句
+        session: 数据库会话，默认为 db.session
+    """
+    if session is None:
+        from app import db     # 延迟导入，避免循环依赖
+        session = db.session
+    result = session.execute(stmt)
+    keys = tuple(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+def stream_rows(stmt, batch_size: int = 1000, session=None) -> Iterator[dict]:
+    """
+    分批流式读取 Core 查询结果（yield_per），适用于导出等大结果集
+
+    MySQL/TiDB 下使用服务端游标，每次只从连接读取 batch_size 行，进程内存与结果集大小无关；
+    迭代结束前连接一直被占用，调用方应尽快消费完毕。
+
+    Args:
+        stmt: select() 语句
+        batch_size: 每批读取的行数
+        session: 数据库会话，默认为 db.session
+
+    Yields:
+        dict: 以列名为键的一行数据
+    """
+    if session is None:
+        from app import db     # 延迟导入，避免循环依赖
+        session = db.session
+    result = session.execute(stmt.execution_options(yield_per=batch_size))
+    keys = tuple(result.keys())
+    try:
+        for partition in result.partitions():
+            for row in partition:
+                yield dict(zip(keys, row))
+    finally:
+        result.close()
@@ -0,0 +1,124 @@
+"""
+接口限流工具
+基于 Redis 令牌桶，按用户或客户端 IP 限制登录、预约等接口的请求频率
+"""
+import math
+from functools import lru_cache, wraps
+from typing import Callable, Optional, Union
+
+from flask import current_app, g, request
+
+from app.utils.memory_backend import MemoryBackend
+from app.utils.redis_client import redis_client
+from app.utils.response import fail
+
+RATE_LIMIT_PREFIX = 'ratelimit:'
+
+# Redis 不可用时退化为进程内令牌桶：多进程部署下总频率最多放大为进程数倍，但不会完全失去限流
+_fallback = MemoryBackend(max_memory=8 * 1024 * 1024)
+
+
+@lru_cache(maxsize=32)
+def parse_limit(spec: str) -> Optional[tuple]:
+    """
+    解析限流配置
+
+    Args:
+        spec: '次数/秒数'，如 '10/60' 表示最多连续 10 次，之后每 6 秒恢复 1 次
+
+    Returns:
+        tuple: (每秒补充速率, 桶容量)；为空时返回 None（不限流）
+    """
+    if not spec:
+        return None
+    count, _, seconds = spec.partition('/')
+    capacity, period = int(count), float(seconds or 1)
+    if capacity <= 0 or period <= 0:
+        raise ValueError(f'限流配置无效: {spec}')
+    return capacity / period, capacity
+
+
+# 登录限流键中用户名的最大长度，避免超长用户名生成超长的 Redis 键
+LOGIN_USERNAME_MAX_LENGTH = 64
+
+
+def _client_ip() -> str:
+    """客户端 IP（部署在反向代理之后时由 ProxyFix 按 TRUSTED_PROXY_HOPS 取 X-Forwarded-For，见 create_app）"""
+    return request.remote_addr or 'unknown'
+
+
+def _current_user_key() -> str:
+    """已登录用户按用户类型与 ID 计，未登录时按 IP 计"""
+    user = g.get('current_user')
+    if user:
+        return f"{user.get('user_type')}:{user.get('user_id')}"
+    return f'ip:{_client_ip()}'
+
+
+def _login_key() -> str:
+    """
+    登录按用户名与客户端 IP 计
+
+    校园网 NAT 或反向代理后的大量用户共用同一出口 IP，只按 IP 计数时开学高峰会互相限流；
+    加上用户名后，同一 IP 下每个账号各自计数，对单个账号的密码猜测仍受限
+    """
+    data = request.get_json(silent=True)
+    username = data.get('username') if isinstance(data, dict) else None
+    username = str(username or '')[:LOGIN_USERNAME_MAX_LENGTH]
+    return f'user:{username}:ip:{_client_ip()}'
+
+
+_KEY_FUNCS = {
+    'ip': lambda: f'ip:{_client_ip()}',
+    'user': _current_user_key,
+    'login': _login_key,
+}
+
+
+def rate_limit(name: str, by: Union[str, Callable[[], str]] = 'ip'):
+    """
+    限流装饰器
+
+    频率由配置项 RATE_LIMIT_<NAME> 决定（格式见 parse_limit），为空时不限流；
+    RATE_LIMIT_ENABLED 为 False 时全部关闭。超出频率返回 429，响应头 Retry-After
+    为需要等待的秒数。
+
+    Args:
+        name: 限流规则名，同时用于配置项名称与 Redis 键
+        by: 计数维度：'ip'、'user'（需放在 login_required 之后）、'login'（请求体中的用户名与 IP），
+            或返回标识字符串的函数
+
+    Usage:
+        @auth_bp.route('/login', methods=['POST'])
+        @rate_limit('login', by='login')
+        def login():
+            ...
+    """
+    key_func = _KEY_FUNCS[by] if isinstance(by, str) else by
+    config_key = f'RATE_LIMIT_{name.upper()}'
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            config = current_app.config
+            if request.method == 'OPTIONS' or not config.get('RATE_LIMIT_ENABLED', True):
+                return f(*args, **kwargs)
+            limit = parse_limit(config.get(config_key))
+            if limit is None:
+                return f(*args, **kwargs)
+
+            rate, capacity = limit
+            key = f'{RATE_LIMIT_PREFIX}{name}:{key_func()}'
+            result = redis_client.take_token(key, rate, capacity)
+            if result is None:
+                result = _fallback.token_bucket(key, rate, capacity)
+            allowed, wait, _ = result
+            if allowed:
+                return f(*args, **kwargs)
+
+            retry_after = max(1, math.ceil(wait))
+            response, code = fail(code=429, msg='请求过于频繁，请稍后重试', data={'retry_after': retry_after})
+            response.headers['Retry-After'] = str(retry_after)
+            return response, code
+        return decorated_function
+    return decorator
@@ -3,10 +3,78 @@ Redis 客户端工具类
 提供 Redis 连接和常用操作方法
 """
 import json
+import math
+import os
+import random
+import time
+import uuid
+import weakref
+from contextlib import contextmanager
+from functools import partial
 from typing import Any, Optional, Union
 from redis import Redis, ConnectionPool
+from redis.exceptions import ResponseError, ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
 from flask import current_app
 
+from app.utils import cache_metrics
+from app.utils.cache_metrics import CacheMetrics
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.codec import ValueCodec
+from app.utils.local_cache import LocalCache
+from app.utils.memory_backend import MemoryBackend
+
+# 版本号键前缀与过期时间
+# 版本号只需比引用它的缓存活得更久：7 天无写入后过期重置，此时旧版本的缓存早已过期
+GENERATION_PREFIX = 'gen:'
+GENERATION_TTL = 7 * 24 * 3600
+
+# 本地缓存未命中标记（区分缓存的 None 与未命中）
+_MISSING = object()
+# Redis 读取失败标记（区分失败与未命中）
+_ERROR = object()
+
+# 防击穿（single-flight）配置
+LOCK_PREFIX = 'lock:'
+LOCK_TIMEOUT_MS = 5000      # 重建锁的最长持有时间
+LOCK_WAIT_SECONDS = 2       # 未拿到锁的请求等待重建结果的最长时间
+LOCK_POLL_SECONDS = 0.05    # 等待期间的轮询间隔
+TTL_JITTER = 0.1            # 过期时间随机抖动比例（±10%），避免同批写入的键同时过期
+EARLY_REFRESH_BETA = 1.0    # 概率提前刷新系数，越大越倾向提前重建
+
+# 令牌桶限流脚本：读取、补充、扣减令牌在一次 EVALSHA 中原子完成
+# 时间取 Redis 服务器时间，多个进程之间不受本地时钟偏差影响
+# KEYS[1] 桶键；ARGV 为每秒补充速率、容量、本次消耗；返回 {是否放行, 需等待秒数, 剩余令牌}
+TOKEN_BUCKET_SCRIPT = '''
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+if tokens == nil then
+    tokens = capacity
+else
+    tokens = math.min(capacity, tokens + math.max(0, now - tonumber(state[2])) * rate)
+end
+local allowed, wait = 0, 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(wait), tostring(tokens)}
+'''
+
+
+def _reset_after_fork(ref: weakref.ref) -> None:
+    client = ref()
+    if client is not None:
+        client._after_fork()
+
 
 class RedisClient:
     """Redis 客户端封装类"""
@@ -14,34 +82,160 @@ class RedisClient:
     def __init__(self, app=None):
         self.redis_client: Optional[Redis] = None
         self.pool: Optional[ConnectionPool] = None
+        # 缓存值经 codec 编码为字节串，通过不解码响应的独立连接池读写
+        self.binary_client: Optional[Redis] = None
+        self.binary_pool: Optional[ConnectionPool] = None
+        self.codec = ValueCodec()
+        self.local_cache: Optional[LocalCache] = None
+        self.backend = 'redis'
+        self.metrics: Optional[CacheMetrics] = None
+        self._token_bucket = None
+        self.invalidation_channel = 'cache:invalidate'
+        self._pubsub = None
+        self._pubsub_thread = None
+        self._logger = None
+        # 熔断器：Redis 连续连接失败后跳过 Redis，由后台线程探测恢复
+        self.breaker = CircuitBreaker(
+            probe=self._ping,
+            on_open=self._on_breaker_open,
+            on_close=self._on_breaker_close
+        )
+        # 在熔断器之后注册，子进程中先重置熔断器再重建订阅
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=partial(_reset_after_fork, weakref.ref(self)))
         if app is not None:
             self.init_app(app)
     
     def init_app(self, app):
-        """初始化 Redis 连接"""
+        """初始化 Redis 连接（CACHE_BACKEND=memory 时使用进程内后端）"""
         config = app.config
+        self._logger = app.logger
+        self.backend = config.get('CACHE_BACKEND', 'redis')
         
-        # 创建连接池
-        self.pool = ConnectionPool(
-            host=config.get('REDIS_HOST', 'localhost'),
-            port=config.get('REDIS_PORT', 6379),
-            password=config.get('REDIS_PASSWORD'),
-            db=config.get('REDIS_DB', 0),
-            decode_responses=config.get('REDIS_DECODE_RESPONSES', True),
-            socket_timeout=config.get('REDIS_SOCKET_TIMEOUT', 5),
-            socket_connect_timeout=config.get('REDIS_SOCKET_CONNECT_TIMEOUT', 5),
-            max_connections=50
+        if self.backend == 'memory':
+            # 进程内后端：两个客户端共享同一份数据，只是返回值的解码方式不同
+            self.binary_client = MemoryBackend(max_memory=config.get('CACHE_MEMORY_MAX_BYTES', 64 * 1024 * 1024))
+            self.redis_client = self.binary_client.with_decoding(config.get('REDIS_DECODE_RESPONSES', True))
+        elif self.backend == 'redis':
+            # 创建连接池
+            pool_options = dict(
+                host=config.get('REDIS_HOST', 'localhost'),
+                port=config.get('REDIS_PORT', 6379),
+                password=config.get('REDIS_PASSWORD'),
+                db=config.get('REDIS_DB', 0),
+                socket_timeout=config.get('REDIS_SOCKET_TIMEOUT', 5),
+                socket_connect_timeout=config.get('REDIS_SOCKET_CONNECT_TIMEOUT', 5),
+                max_connections=50
+            )
+            self.pool = ConnectionPool(
+                decode_responses=config.get('REDIS_DECODE_RESPONSES', True),
+                **pool_options
+            )
+            self.binary_pool = ConnectionPool(decode_responses=False, **pool_options)
+            
+            # 创建 Redis 客户端
+            self.redis_client = Redis(connection_pool=self.pool)
+            self.binary_client = Redis(connection_pool=self.binary_pool)
+            # 首次执行时用 EVAL 加载，之后只发送 EVALSHA
+            self._token_bucket = self.redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+        else:
+            raise ValueError(f'未知的缓存后端: {self.backend}')
+        
+        # 缓存值编解码
+        self.codec = ValueCodec(
+            codec=config.get('CACHE_CODEC', 'msgpack'),
+            compress_threshold=config.get('CACHE_COMPRESS_THRESHOLD', 1024),
+            compress_level=config.get('CACHE_COMPRESS_LEVEL', 1)
         )
+        if self.codec.name != config.get('CACHE_CODEC', 'msgpack'):
+            app.logger.warning(f'未安装 msgpack，缓存编码回退为 {self.codec.name}')
+        
+        # 按键前缀统计命中率与耗时
+        if config.get('CACHE_METRICS_ENABLED', True):
+            self.metrics = CacheMetrics(flush_interval=config.get('CACHE_METRICS_FLUSH_INTERVAL', 10))
+        
+        if self.backend == 'memory':
+            # 数据本身就在进程内：不需要本地缓存层、失效广播和熔断探测
+            app.logger.info('使用进程内缓存后端')
+            return
         
-        # 创建 Redis 客户端
-        self.redis_client = Redis(connection_pool=self.pool)
+        # 进程内一级缓存，其他进程的失效通过 Redis pub/sub 广播（订阅在连接成功后建立）
+        if config.get('CACHE_LOCAL_ENABLED', True):
+            self.local_cache = LocalCache(
+                max_size=config.get('CACHE_LOCAL_MAX_SIZE', 1024),
+                ttl=config.get('CACHE_LOCAL_TTL', 5)
+            )
+            self.invalidation_channel = config.get('CACHE_INVALIDATION_CHANNEL', self.invalidation_channel)
         
-        # 测试连接
+        # 启动时不同步测试连接：先处于熔断状态，由后台线程立即探测，连接成功后开始使用 Redis
+        self.breaker.failure_threshold = config.get('REDIS_BREAKER_FAILURE_THRESHOLD', 3)
+        self.breaker.cooldown = config.get('REDIS_BREAKER_COOLDOWN', 5)
+        self.breaker.trip(delay=0)
+    
+    def _ping(self):
+        """熔断器探测：测试连接"""
+        self.redis_client.ping()
+    
+    def _on_breaker_open(self, error):
+        """熔断：熔断期间收不到失效广播，清空本地缓存（error 为 None 表示启动时等待首次探测）"""
+        if error is None:
+            return
+        self._logger.error(f'Redis 连续失败，暂停访问 {self.breaker.cooldown} 秒后重试: {error}')
+        if self.local_cache is not None:
+            self.local_cache.clear()
+    
+    def _on_breaker_close(self):
+        """探测成功：建立失效订阅（首次），清除熔断期间可能已陈旧的本地缓存"""
+        self._logger.info('Redis 连接成功')
+        if self.local_cache is not None:
+            self.local_cache.clear()
+            if self._pubsub_thread is None:
+                self._start_invalidation_listener()
+    
+    def _start_invalidation_listener(self):
+        """订阅失效频道，在后台线程中清除本进程的本地缓存"""
         try:
-            self.redis_client.ping()
-            app.logger.info('Redis 连接成功')
+            self._pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(**{self.invalidation_channel: self._handle_invalidation})
+            self._pubsub_thread = self._pubsub.run_in_thread(
+                sleep_time=1,
+                daemon=True,
+                exception_handler=self._handle_listener_error
+            )
         except Exception as e:
-            app.logger.error(f'Redis 连接失败: {e}')
+            # 订阅失败时仍可使用本地缓存，陈旧时间由 CACHE_LOCAL_TTL 兜底
+            self._logger.error(f'Redis 失效频道订阅失败: {e}')
+    
+    def _after_fork(self):
+        """
+        子进程中重建失效订阅
+
+        预加载（gunicorn --preload）时订阅在父进程建立，子进程不会继承订阅线程；
+        不重建则子进程收不到失效广播，本地缓存在 CACHE_LOCAL_TTL 内一直陈旧
+        """
+        self._pubsub = None
+        self._pubsub_thread = None
+        if self.local_cache is None:
+            return
+        self.local_cache.clear()
+        # 熔断中的子进程在探测成功后由 _on_breaker_close 建立订阅
+        if self.breaker.allow():
+            self._start_invalidation_listener()
+
+    def _handle_invalidation(self, message):
+        """处理失效广播：消息内容为 JSON 编码的键名列表"""
+        try:
+            keys = json.loads(message['data'])
+        except (json.JSONDecodeError, TypeError):
+            self.local_cache.clear()
+            return
+        self.local_cache.delete(*keys)
+    
+    def _handle_listener_error(self, error, pubsub, thread):
+        """订阅连接异常：期间可能错过失效广播，清空本地缓存后稍后重连"""
+        self._logger.error(f'Redis 失效频道连接异常: {error}')
+        self.local_cache.clear()
+        time.sleep(1)
     
     def get_client(self) -> Redis:
         """获取 Redis 客户端实例"""
@@ -49,6 +243,34 @@ class RedisClient:
             raise RuntimeError('Redis 未初始化，请先调用 init_app()')
         return self.redis_client
     
+    def _run(self, op: str, func, default: Any = None) -> Any:
+        """
+        执行一次 Redis 操作
+        
+        熔断期间直接返回默认值；执行失败时记录日志并返回默认值，
+        连接/超时错误计入熔断器，连续失败达到阈值后熔断
+        
+        Args:
+            op: 操作名（用于日志）
+            func: 无参函数，执行实际的 Redis 调用
+            default: 熔断或失败时的返回值
+        """
+        if not self.breaker.allow():
+            return default
+        try:
+            result = func()
+        except Exception as e:
+            self._on_error(op, e)
+            return default
+        self.breaker.record_success()
+        return result
+    
+    def _on_error(self, op: str, error: Exception) -> None:
+        """记录 Redis 操作失败，连接/超时错误计入熔断器"""
+        if isinstance(error, (RedisConnectionError, RedisTimeoutError)):
+            self.breaker.record_failure(error)
+        current_app.logger.error(f'Redis {op} 失败: {error}')
+    
     # ========== 基础操作 ==========
     
     def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
@@ -56,45 +278,58 @@ class RedisClient:
         设置键值对
         
         Args:
-            key: 键名
+            key: 键名，为 None 时不缓存（例如版本号读取失败）
             value: 值（会自动序列化）
             ex: 过期时间（秒）
         
         Returns:
             bool: 是否设置成功
         """
-        try:
-            if isinstance(value, (dict, list)):
-                value = json.dumps(value, ensure_ascii=False)
-            return self.redis_client.set(key, value, ex=ex)
-        except Exception as e:
-            current_app.logger.error(f'Redis set 失败: {e}')
+        if key is None:
             return False
+        encoded = self.codec.encode(value)
+        result = self._run('set', lambda: self.binary_client.set(key, encoded, ex=ex), False)
+        if result:
+            self._record_write(key, encoded)
+        if result and self.local_cache is not None:
+            self.local_cache.set(key, value, ttl=ex)
+        return result
     
     def get(self, key: str, default: Any = None) -> Any:
         """
         获取键值
         
         Args:
-            key: 键名
+            key: 键名，为 None 时直接返回默认值
             default: 默认值
         
         Returns:
             值（会自动反序列化）
         """
-        try:
-            value = self.redis_client.get(key)
-            if value is None:
-                return default
-            
-            # 尝试解析 JSON
-            try:
-                return json.loads(value)
-            except (json.JSONDecodeError, TypeError):
+        if key is None:
+            return default
+        started = time.perf_counter()
+        
+        # 一级缓存：进程内存
+        if self.local_cache is not None:
+            value = self.local_cache.get(key, _MISSING)
+            if value is not _MISSING:
+                self._record(key, cache_metrics.LOCAL_HIT, started)
                 return value
-        except Exception as e:
-            current_app.logger.error(f'Redis get 失败: {e}')
+        
+        # 二级缓存：Redis
+        value = self._run('get', lambda: self.codec.decode(self.binary_client.get(key)), _ERROR)
+        if value is _ERROR:
+            self._record(key, cache_metrics.ERROR, started)
+            return default
+        if value is None:
+            self._record(key, cache_metrics.MISS, started)
             return default
+        self._record(key, cache_metrics.HIT, started)
+        
+        if self.local_cache is not None:
+            self.local_cache.set(key, value)
+        return value
     
     def delete(self, *keys: str) -> int:
         """
@@ -106,33 +341,449 @@ class RedisClient:
         Returns:
             int: 删除的键数量
         """
-        try:
-            return self.redis_client.delete(*keys)
-        except Exception as e:
-            current_app.logger.error(f'Redis delete 失败: {e}')
+        if not keys:
             return 0
+        if self.local_cache is not None:
+            self.local_cache.delete(*keys)
+        
+        def _delete():
+            if self.local_cache is None:
+                return self.redis_client.delete(*keys)
+            # 删除与失效广播在同一次往返中发送，其他进程收到后清除各自的本地缓存
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.delete(*keys)
+            pipe.publish(self.invalidation_channel, json.dumps(list(keys), ensure_ascii=False))
+            return pipe.execute()[0]
+        
+        return self._run('delete', _delete, 0)
     
     def exists(self, key: str) -> bool:
         """检查键是否存在"""
-        try:
-            return bool(self.redis_client.exists(key))
-        except Exception as e:
-            current_app.logger.error(f'Redis exists 失败: {e}')
-            return False
+        return bool(self._run('exists', lambda: self.redis_client.exists(key), False))
     
     def expire(self, key: str, time: int) -> bool:
         """设置键的过期时间"""
+        return self._run('expire', lambda: self.redis_client.expire(key, time), False)
+
+    # ========== 批量操作 ==========
+
+    def mget(self, keys: list, default: Any = None) -> list:
+        """
+        批量获取键值（一次 MGET），本地缓存已命中的键不再访问 Redis
+
+        Args:
+            keys: 键名列表，为 None 的键直接返回默认值
+            default: 未命中时的默认值
+
+        Returns:
+            list: 与 keys 一一对应的值（会自动反序列化）
+        """
+        started = time.perf_counter()
+        results = [default] * len(keys)
+        pending = []
+        for index, key in enumerate(keys):
+            if key is None:
+                continue
+            if self.local_cache is not None:
+                value = self.local_cache.get(key, _MISSING)
+                if value is not _MISSING:
+                    self._record(key, cache_metrics.LOCAL_HIT, started)
+                    results[index] = value
+                    continue
+            pending.append(index)
+
+        if not pending:
+            return results
+        values = self._run('mget', lambda: self.binary_client.mget([keys[i] for i in pending]))
+        if values is None:
+            for index in pending:
+                self._record(keys[index], cache_metrics.ERROR, started)
+            return results
+
+        for index, value in zip(pending, values):
+            if value is None:
+                self._record(keys[index], cache_metrics.MISS, started)
+                continue
+            try:
+                value = self.codec.decode(value)
+            except Exception as e:
+                current_app.logger.error(f'Redis mget 解码失败: {e}')
+                self._record(keys[index], cache_metrics.ERROR, started)
+                continue
+            self._record(keys[index], cache_metrics.HIT, started)
+            results[index] = value
+            if self.local_cache is not None:
+                self.local_cache.set(keys[index], value)
+        return results
+
+    def mset(self, mapping: dict, ex: Union[int, dict, None] = None) -> bool:
+        """
+        批量设置键值对（一次往返）
+
+        Args:
+            mapping: {键名: 值}，值会自动序列化
+            ex: 统一过期时间（秒），或 {键名: 过期时间} 按键指定，未列出的键不过期
+
+        Returns:
+            bool: 是否设置成功
+        """
+        mapping = {k: v for k, v in mapping.items() if k is not None}
+        if not mapping:
+            return True
+        
+        encoded = {key: self.codec.encode(value) for key, value in mapping.items()}
+        
+        def _mset():
+            pipe = self.binary_client.pipeline(transaction=False)
+            for key, value in encoded.items():
+                pipe.set(key, value, ex=ex.get(key) if isinstance(ex, dict) else ex)
+            return pipe.execute()
+        
+        if self._run('mset', _mset) is None:
+            return False
+        for key, value in encoded.items():
+            self._record_write(key, value)
+        if self.local_cache is not None:
+            for key, value in mapping.items():
+                self.local_cache.set(key, value, ttl=ex.get(key) if isinstance(ex, dict) else ex)
+        return True
+
+    def delete_many(self, keys: list, batch_size: int = 500) -> int:
+        """
+        分批删除大量键
+
+        每批一条 DEL（附带一次失效广播），所有批次在同一次往返中发送，
+        避免单条 DEL 携带过多键长时间阻塞 Redis。
+
+        Args:
+            keys: 要删除的键名列表
+            batch_size: 每条 DEL 的键数量
+
+        Returns:
+            int: 删除的键数量
+        """
+        keys = [k for k in keys if k is not None]
+        if not keys:
+            return 0
+        with self.pipeline() as pipe:
+            for start in range(0, len(keys), batch_size):
+                pipe.delete(*keys[start:start + batch_size])
+        return sum(pipe.results or [])
+
+    @contextmanager
+    def pipeline(self, transaction: bool = False):
+        """
+        批量命令管道，退出 with 块时一次性发送
+
+        Args:
+            transaction: 是否用 MULTI/EXEC 包裹（原子执行）
+
+        Usage:
+            with redis_client.pipeline() as pipe:
+                pipe.get('api:equipment:detail:1')
+                pipe.set('a', {'x': 1}, ex=60)
+                pipe.delete('b')
+            detail, _, _ = pipe.results
+
+        with 块内抛出异常时不发送任何命令；熔断或发送失败时 results 为 None
+        """
+        pipe = CachePipeline(self, transaction=transaction)
+        yield pipe
+        self._run('pipeline', pipe.execute)
+
+    # ========== 版本号失效 ==========
+    
+    def get_generations(self, *tags: str) -> Optional[list]:
+        """
+        批量读取标签的版本号（一次 MGET）
+        
+        Args:
+            *tags: 标签名，如 'reservation:user:student:2023001'
+        
+        Returns:
+            list: 各标签的版本号，不存在的标签为 0；读取失败返回 None
+        """
+        values = self._run('get_generations', lambda: self.redis_client.mget([f'{GENERATION_PREFIX}{tag}' for tag in tags]))
+        if values is None:
+            return None
+        return [int(v) if v else 0 for v in values]
+    
+    def bump_generations(self, *tags: str) -> bool:
+        """
+        递增标签的版本号，使键中嵌入旧版本号的缓存全部失效
+        
+        每个标签只需一次 INCR（同一事务中提交），代价与缓存键数量无关，
+        旧版本的缓存不再被读取，随各自的过期时间自然淘汰。
+        
+        Args:
+            *tags: 标签名
+        
+        Returns:
+            bool: 是否成功
+        """
+        if not tags:
+            return True
+        
+        def _bump():
+            pipe = self.redis_client.pipeline(transaction=True)
+            for tag in tags:
+                pipe.incr(f'{GENERATION_PREFIX}{tag}')
+                pipe.expire(f'{GENERATION_PREFIX}{tag}', GENERATION_TTL)
+            return pipe.execute()
+        
+        return self._run('bump_generations', _bump) is not None
+    
+    def versioned_key(self, key: str, *tags: str) -> Optional[str]:
+        """
+        生成嵌入标签版本号的缓存键
+        
+        Args:
+            key: 基础键名
+            *tags: 该缓存依赖的标签
+        
+        Returns:
+            str: 如 'api:reservation:list:user_1:...:v3'；版本号读取失败返回 None（即不缓存）
+        
+        Usage:
+            cache_key = redis_client.versioned_key('api:xxx:list', 'xxx:user:1')
+            data = redis_client.get(cache_key)
+        """
+        generations = self.get_generations(*tags)
+        if generations is None:
+            return None
+        return f"{key}:v{'.'.join(str(g) for g in generations)}"
+    
+    # ========== 防击穿缓存 ==========
+    
+    def get_or_set(self, key: Optional[str], loader, ex: int = 300, raw: bool = False) -> Any:
+        """
+        读取缓存，未命中时调用 loader 重建（带防击穿保护）
+        
+        - single-flight：缓存失效时只有拿到短时 Redis 锁的请求执行 loader，
+          其他请求轮询等待其写入结果，不会同时打到数据库
+        - 概率提前刷新（XFetch）：临近过期时按重建耗时随机提前重建，
+          重建期间其他请求继续返回旧值
+        - 过期时间随机抖动，避免同一批写入的键同时过期
+        
+        缓存以哈希存储（v: 值，d: 重建耗时），只应通过本方法读取。
+        
+        Args:
+            key: 键名，为 None 时直接调用 loader 不缓存
+            loader: 无参函数，返回要缓存的值（None 不缓存）
+            ex: 过期时间（秒）
+            raw: 为 True 时 loader 返回字符串并原样存取，不经过序列化
+        
+        Returns:
+            缓存值或 loader 的返回值
+        
+        Usage:
+            data = redis_client.get_or_set('api:lab:list', lambda: dump_labs(), ex=600)
+        """
+        if key is None:
+            return loader()
+        started = time.perf_counter()
+        
+        if self.local_cache is not None:
+            value = self.local_cache.get(key, _MISSING)
+            if value is not _MISSING:
+                self._record(key, cache_metrics.LOCAL_HIT, started)
+                return value
+        
+        if not self.breaker.allow():
+            self._record(key, cache_metrics.ERROR, started)
+            return loader()
+        
+        token = None
         try:
-            return self.redis_client.expire(key, time)
+            try:
+                entry = self._read_entry(key, raw)
+            except Exception:
+                self._record(key, cache_metrics.ERROR, started)
+                raise
+            self.breaker.record_success()
+            self._record(key, cache_metrics.MISS if entry is None else cache_metrics.HIT, started)
+            if entry is not None:
+                value, delta, ttl = entry
+                # XFetch：剩余时间 - 重建耗时 × β × (-ln(rand)) > 0 时直接使用缓存
+                if ttl - delta * EARLY_REFRESH_BETA * -math.log(1.0 - random.random()) > 0:
+                    if self.local_cache is not None:
+                        self.local_cache.set(key, value, ttl=ttl)
+                    return value
+                # 提前刷新：只有拿到锁的请求重建，其余继续使用旧值
+                token = self._acquire_lock(key)
+                if token is None:
+                    return value
+            else:
+                token = self._acquire_lock(key)
+                if token is None:
+                    # 其他请求正在重建：等待其写入结果
+                    entry = self._wait_for_entry(key, raw)
+                    if entry is not None:
+                        return entry[0]
         except Exception as e:
-            current_app.logger.error(f'Redis expire 失败: {e}')
+            self._on_error('get_or_set', e)
+        
+        if token is None:
+            # Redis 不可用或等待超时：直接查询，不写缓存
+            return loader()
+        return self._rebuild(key, loader, ex, token, raw)
+    
+    def _read_entry(self, key: str, raw: bool = False) -> Optional[tuple]:
+        """读取缓存条目，返回 (值, 重建耗时秒, 剩余存活秒)，不存在返回 None"""
+        pipe = self.binary_client.pipeline(transaction=False)
+        pipe.hmget(key, 'v', 'd')
+        pipe.pttl(key)
+        try:
+            (value, delta), pttl = pipe.execute()
+        except ResponseError:
+            # 键为旧格式（非哈希），视为未命中，重建时覆盖
+            return None
+        if value is None:
+            return None
+        ttl = pttl / 1000 if pttl and pttl > 0 else 0
+        return self.codec.decode(value, raw), float(delta or 0), ttl
+    
+    def _wait_for_entry(self, key: str, raw: bool = False) -> Optional[tuple]:
+        """轮询等待持锁请求写入缓存，超时返回 None"""
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_SECONDS)
+            entry = self._read_entry(key, raw)
+            if entry is not None:
+                return entry
+        return None
+    
+    def _acquire_lock(self, key: str) -> Optional[str]:
+        """尝试获取重建锁，成功返回锁令牌，锁已被占用返回 None"""
+        token = uuid.uuid4().hex
+        if self.redis_client.set(f'{LOCK_PREFIX}{key}', token, nx=True, px=LOCK_TIMEOUT_MS):
+            return token
+        return None
+    
+    def _rebuild(self, key: str, loader, ex: int, token: str, raw: bool = False) -> Any:
+        """持锁执行 loader 并写入缓存，完成后释放锁（loader 的异常原样抛出）"""
+        lock_key = f'{LOCK_PREFIX}{key}'
+        try:
+            started = time.monotonic()
+            value = loader()
+            delta = time.monotonic() - started
+            if value is not None:
+                self._write_entry(key, value, ex, delta, raw)
+            return value
+        finally:
+            # 仅释放自己持有的锁（锁已超时被他人获取时不删除）
+            try:
+                if self.redis_client.get(lock_key) == token:
+                    self.redis_client.delete(lock_key)
+            except Exception as e:
+                self._on_error('释放重建锁', e)
+    
+    def _write_entry(self, key: str, value: Any, ex: int, delta: float, raw: bool = False) -> None:
+        """写入缓存条目，过期时间带随机抖动"""
+        ttl_ms = max(int(ex * 1000 * (1 + random.uniform(-TTL_JITTER, TTL_JITTER))), 1)
+        
+        encoded = self.codec.encode(value, raw)
+        
+        def _write():
+            # 先删除再写入，保证覆盖任意类型的旧值
+            pipe = self.binary_client.pipeline(transaction=True)
+            pipe.delete(key)
+            pipe.hset(key, mapping={'v': encoded, 'd': f'{delta:.6f}'})
+            pipe.pexpire(key, ttl_ms)
+            return pipe.execute()
+        
+        if self._run('写入缓存', _write) is None:
+            return
+        self._record_write(key, encoded)
+        if self.local_cache is not None:
+            self.local_cache.set(key, value, ttl=ttl_ms / 1000)
+    
+    # ========== 缓存指标 ==========
+    
+    def _record(self, key: str, outcome: str, started: float) -> None:
+        """记录一次读取结果与耗时，到达间隔时把增量写入 Redis"""
+        if self.metrics is None:
+            return
+        self.metrics.record(key, outcome, time.perf_counter() - started)
+        if self.metrics.due():
+            self.flush_metrics()
+    
+    def _record_write(self, key: str, encoded: Any) -> None:
+        """记录一次写入的编码后大小"""
+        if self.metrics is not None:
+            size = len(encoded) if isinstance(encoded, (bytes, str)) else len(str(encoded))
+            self.metrics.record_write(key, size)
+    
+    def flush_metrics(self) -> bool:
+        """
+        把本进程累计的指标增量累加到 Redis（HINCRBY），多个进程的数据在 Redis 中汇总
+        
+        Returns:
+            bool: 是否成功（失败时本次增量丢弃）
+        """
+        if self.metrics is None:
             return False
+        snapshot = self.metrics.drain()
+        if not snapshot:
+            return True
+        
+        def _flush():
+            pipe = self.redis_client.pipeline(transaction=False)
+            for prefix, counters in snapshot.items():
+                pipe.hset(cache_metrics.STATS_INDEX_KEY, prefix, 1)
+                for field, value in counters.items():
+                    pipe.hincrby(f'{cache_metrics.STATS_KEY_PREFIX}{prefix}', field, value)
+            return pipe.execute()
+        
+        return self._run('flush_metrics', _flush) is not None
+    
+    def get_cache_stats(self) -> Optional[list]:
+        """
+        读取所有进程汇总后的缓存指标（先写入本进程的增量）
+        
+        Returns:
+            list: 按前缀排序的统计结果（见 cache_metrics.summarize）；Redis 不可用时返回 None
+        """
+        self.flush_metrics()
+        
+        def _read():
+            prefixes = sorted(
+                p.decode('utf-8') if isinstance(p, bytes) else p
+                for p in self.redis_client.hgetall(cache_metrics.STATS_INDEX_KEY)
+            )
+            pipe = self.redis_client.pipeline(transaction=False)
+            for prefix in prefixes:
+                pipe.hgetall(f'{cache_metrics.STATS_KEY_PREFIX}{prefix}')
+            return [
+                cache_metrics.summarize(prefix, {
+                    (k.decode('utf-8') if isinstance(k, bytes) else k): v for k, v in counters.items()
+                })
+                for prefix, counters in zip(prefixes, pipe.execute())
+            ]
+        
+        return self._run('get_cache_stats', _read)
+    
+    def reset_cache_stats(self) -> bool:
+        """清空所有进程汇总的缓存指标"""
+        if self.metrics is not None:
+            self.metrics.drain()
+        
+        def _reset():
+            prefixes = self.redis_client.hgetall(cache_metrics.STATS_INDEX_KEY)
+            keys = [cache_metrics.STATS_INDEX_KEY]
+            keys.extend(
+                f"{cache_metrics.STATS_KEY_PREFIX}{p.decode('utf-8') if isinstance(p, bytes) else p}"
+                for p in prefixes
+            )
+            return self.redis_client.delete(*keys)
+        
+        return self._run('reset_cache_stats', _reset) is not None
     
     # ========== 缓存装饰器 ==========
     
     def cache(self, timeout: int = 300, key_prefix: str = 'cache:'):
         """
-        缓存装饰器
+        缓存装饰器（带防击穿保护，见 get_or_set）
         
         Args:
             timeout: 缓存过期时间（秒）
@@ -147,88 +798,176 @@ class RedisClient:
             def wrapper(*args, **kwargs):
                 # 生成缓存键
                 cache_key = f"{key_prefix}{func.__name__}:{str(args)}:{str(kwargs)}"
-                
-                # 尝试从缓存获取
-                cached_value = self.get(cache_key)
-                if cached_value is not None:
-                    return cached_value
-                
-                # 执行函数并缓存结果
-                result = func(*args, **kwargs)
-                self.set(cache_key, result, ex=timeout)
-                return result
+                return self.get_or_set(cache_key, lambda: func(*args, **kwargs), ex=timeout)
             
             wrapper.__name__ = func.__name__
             return wrapper
         return decorator
     
+    # ========== 限流 ==========
+    
+    def take_token(self, key: str, rate: float, capacity: int, cost: int = 1) -> Optional[tuple]:
+        """
+        从令牌桶中取令牌（一次往返，原子执行）
+        
+        Args:
+            key: 桶键，如 'ratelimit:login:127.0.0.1'
+            rate: 每秒补充的令牌数
+            capacity: 桶容量（允许的突发次数）
+            cost: 本次消耗的令牌数
+        
+        Returns:
+            tuple: (是否放行, 需等待秒数, 剩余令牌数)；熔断或失败时返回 None
+        """
+        if self.backend == 'memory':
+            return self.binary_client.token_bucket(key, rate, capacity, cost)
+        result = self._run('take_token', lambda: self._token_bucket(keys=[key], args=[rate, capacity, cost]))
+        if result is None:
+            return None
+        return bool(result[0]), float(result[1]), float(result[2])
+    
     # ========== 哈希操作 ==========
     
     def hset(self, name: str, key: str, value: Any) -> int:
         """设置哈希字段"""
-        try:
-            if isinstance(value, (dict, list)):
-                value = json.dumps(value, ensure_ascii=False)
-            return self.redis_client.hset(name, key, value)
-        except Exception as e:
-            current_app.logger.error(f'Redis hset 失败: {e}')
-            return 0
+        return self._run('hset', lambda: self.binary_client.hset(name, key, self.codec.encode(value)), 0)
     
     def hget(self, name: str, key: str, default: Any = None) -> Any:
         """获取哈希字段"""
-        try:
-            value = self.redis_client.hget(name, key)
-            if value is None:
-                return default
-            try:
-                return json.loads(value)
-            except (json.JSONDecodeError, TypeError):
-                return value
-        except Exception as e:
-            current_app.logger.error(f'Redis hget 失败: {e}')
-            return default
+        value = self._run('hget', lambda: self.codec.decode(self.binary_client.hget(name, key)))
+        return default if value is None else value
     
     def hgetall(self, name: str) -> dict:
         """获取所有哈希字段"""
-        try:
-            return self.redis_client.hgetall(name)
-        except Exception as e:
-            current_app.logger.error(f'Redis hgetall 失败: {e}')
-            return {}
+        return self._run('hgetall', lambda: {
+            field.decode('utf-8'): self.codec.decode(value)
+            for field, value in self.binary_client.hgetall(name).items()
+        }, {})
     
     # ========== 列表操作 ==========
     
     def lpush(self, name: str, *values: Any) -> int:
         """从左侧推入列表"""
-        try:
-            serialized_values = [
-                json.dumps(v, ensure_ascii=False) if isinstance(v, (dict, list)) else v
-                for v in values
-            ]
-            return self.redis_client.lpush(name, *serialized_values)
-        except Exception as e:
-            current_app.logger.error(f'Redis lpush 失败: {e}')
-            return 0
+        serialized_values = [self.codec.encode(v) for v in values]
+        return self._run('lpush', lambda: self.binary_client.lpush(name, *serialized_values), 0)
     
     def rpush(self, name: str, *values: Any) -> int:
         """从右侧推入列表"""
-        try:
-            serialized_values = [
-                json.dumps(v, ensure_ascii=False) if isinstance(v, (dict, list)) else v
-                for v in values
-            ]
-            return self.redis_client.rpush(name, *serialized_values)
-        except Exception as e:
-            current_app.logger.error(f'Redis rpush 失败: {e}')
-            return 0
+        serialized_values = [self.codec.encode(v) for v in values]
+        return self._run('rpush', lambda: self.binary_client.rpush(name, *serialized_values), 0)
     
     def lrange(self, name: str, start: int = 0, end: int = -1) -> list:
         """获取列表范围"""
-        try:
-            return self.redis_client.lrange(name, start, end)
-        except Exception as e:
-            current_app.logger.error(f'Redis lrange 失败: {e}')
-            return []
+        return self._run('lrange', lambda: [self.codec.decode(v) for v in self.binary_client.lrange(name, start, end)], [])
+    
+    # ========== 有序集合操作（成员为字符串，不经 codec 编码） ==========
+    
+    def zadd(self, name: str, mapping: dict) -> int:
+        """添加成员，mapping 为 {成员: 分值}"""
+        return self._run('zadd', lambda: self.redis_client.zadd(name, mapping), 0)
+    
+    def zrangebyscore(self, name: str, min: Any, max: Any, withscores: bool = False) -> Optional[list]:
+        """按分值范围读取成员（'(' 前缀表示不含边界）；失败返回 None"""
+        return self._run('zrangebyscore', lambda: self.redis_client.zrangebyscore(name, min, max, withscores=withscores))
+    
+    def zremrangebyscore(self, name: str, min: Any, max: Any) -> int:
+        """按分值范围删除成员"""
+        return self._run('zremrangebyscore', lambda: self.redis_client.zremrangebyscore(name, min, max), 0)
+
+
+class CachePipeline:
+    """
+    RedisClient 的批量命令管道
+
+    与 RedisClient 保持相同的自动序列化语义（经 codec 编码），并同步维护本地缓存：
+    set 在发送成功后写入本地缓存，delete 立即清除本地缓存并附带一次失效广播。
+    results 与调用顺序一一对应，每次调用对应一个结果。
+    """
+
+    def __init__(self, client: RedisClient, transaction: bool = False):
+        self._client = client
+        self._codec = client.codec
+        self._pipe = client.binary_client.pipeline(transaction=transaction)
+        self._handlers = []          # 每次调用: (占用的命令数, 结果转换函数)
+        self._local_writes = []      # 发送成功后写入本地缓存的 (键, 值, 过期时间)
+        self._deleted = []           # 需要广播失效的键
+        self.results: Optional[list] = None
+
+    def _queue(self, count: int = 1, handler=None) -> 'CachePipeline':
+        self._handlers.append((count, handler))
+        return self
+
+    def get(self, key: str) -> 'CachePipeline':
+        self._pipe.get(key)
+        return self._queue(handler=lambda r: self._codec.decode(r[0]))
+
+    def set(self, key: str, value: Any, ex: Optional[int] = None) -> 'CachePipeline':
+        self._pipe.set(key, self._codec.encode(value), ex=ex)
+        self._local_writes.append((key, value, ex))
+        return self._queue()
+
+    def delete(self, *keys: str) -> 'CachePipeline':
+        if self._client.local_cache is not None:
+            self._client.local_cache.delete(*keys)
+        self._deleted.extend(keys)
+        self._pipe.delete(*keys)
+        return self._queue()
+
+    def exists(self, key: str) -> 'CachePipeline':
+        self._pipe.exists(key)
+        return self._queue(handler=lambda r: bool(r[0]))
+
+    def expire(self, key: str, time: int) -> 'CachePipeline':
+        self._pipe.expire(key, time)
+        return self._queue()
+
+    def hset(self, name: str, key: str, value: Any) -> 'CachePipeline':
+        self._pipe.hset(name, key, self._codec.encode(value))
+        return self._queue()
+
+    def hget(self, name: str, key: str) -> 'CachePipeline':
+        self._pipe.hget(name, key)
+        return self._queue(handler=lambda r: self._codec.decode(r[0]))
+
+    def zadd(self, name: str, mapping: dict) -> 'CachePipeline':
+        self._pipe.zadd(name, mapping)
+        return self._queue()
+
+    def zremrangebyscore(self, name: str, min: Any, max: Any) -> 'CachePipeline':
+        self._pipe.zremrangebyscore(name, min, max)
+        return self._queue()
+
+    def bump_generations(self, *tags: str) -> 'CachePipeline':
+        """递增标签版本号，语义同 RedisClient.bump_generations"""
+        for tag in tags:
+            self._pipe.incr(f'{GENERATION_PREFIX}{tag}')
+            self._pipe.expire(f'{GENERATION_PREFIX}{tag}', GENERATION_TTL)
+        return self._queue(count=2 * len(tags), handler=lambda r: True)
+
+    def execute(self) -> list:
+        """发送所有命令并按调用顺序返回转换后的结果"""
+        if not self._handlers:
+            self.results = []
+            return self.results
+        if self._deleted and self._client.local_cache is not None:
+            self._pipe.publish(
+                self._client.invalidation_channel,
+                json.dumps(self._deleted, ensure_ascii=False)
+            )
+        raw = self._pipe.execute()
+
+        results, offset = [], 0
+        for count, handler in self._handlers:
+            chunk = raw[offset:offset + count]
+            offset += count
+            results.append(handler(chunk) if handler else (chunk[0] if chunk else None))
+
+        local_cache = self._client.local_cache
+        if local_cache is not None:
+            for key, value, ex in self._local_writes:
+                local_cache.set(key, value, ttl=ex)
+        self.results = results
+        return results
 
 
 # 创建全局 Redis 客户端实例
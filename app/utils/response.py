@@ -4,8 +4,18 @@
 
 标准 JSON 结构: {'code': 200, 'msg': 'success', 'data': ...}
 """
-from flask import jsonify
-from typing import Any, Dict, Optional
+import hashlib
+from flask import jsonify, current_app, request
+from typing import Any, Callable, Dict, Optional
+
+from app.utils.db_routing import cache_fill
+from app.utils.redis_client import redis_client
+
+# 响应缓存的内容为 ETag（32 位十六进制）+ 响应体，命中时无需重新计算 ETag
+ETAG_LENGTH = 32
+
+# 默认缓存策略：客户端可以保存响应，但每次使用前必须携带 If-None-Match 重新验证
+DEFAULT_CACHE_CONTROL = 'private, no-cache'
 
 
 def success(data: Any = None, msg: str = 'success') -> tuple:
@@ -27,6 +37,100 @@ def success(data: Any = None, msg: str = 'success') -> tuple:
     return jsonify(response), 200
 
 
+def encode_success(data: Any = None, msg: str = 'success', **extra: Any) -> str:
+    """
+    将成功响应编码为最终的 JSON 文本（用于响应缓存）
+    
+    Args:
+        data: 响应数据
+        msg: 响应消息
+        **extra: 附加的外层字段（如分页的 next_cursor）
+    
+    Returns:
+        str: 完整响应体，与 success() 返回的 JSON 结构相同
+    """
+    response = {
+        'code': 200,
+        'msg': msg,
+        'data': data,
+        **extra
+    }
+    return current_app.json.dumps(response, separators=(',', ':'))
+
+
+def compute_etag(body: str) -> str:
+    """根据响应体内容计算强 ETag（32 位十六进制）"""
+    return hashlib.blake2b(body.encode('utf-8'), digest_size=ETAG_LENGTH // 2).hexdigest()
+
+
+def raw_success(body: str, etag: Optional[str] = None, cache_control: str = DEFAULT_CACHE_CONTROL) -> tuple:
+    """
+    直接返回已编码的成功响应体，不做任何 JSON 解析与序列化
+    
+    响应带强 ETag 与 Cache-Control；请求的 If-None-Match 与 ETag 一致时返回 304（无响应体）。
+    
+    Args:
+        body: encode_success() 生成的 JSON 文本
+        etag: 响应体的 ETag，未提供时根据内容计算
+        cache_control: Cache-Control 响应头，为空时不设置
+    
+    Returns:
+        (response, status_code) 元组
+    """
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag or compute_etag(body))
+    if cache_control:
+        response.headers['Cache-Control'] = cache_control
+    response.make_conditional(request)
+    return response, response.status_code
+
+
+def cached_success(
+    cache_key: Optional[str],
+    loader: Callable[[], Any],
+    ex: int = 300,
+    msg: str = 'success',
+    cache_control: str = DEFAULT_CACHE_CONTROL,
+    paginated: bool = False
+) -> tuple:
+    """
+    带响应缓存的成功响应
+    
+    缓存中保存的是 ETag 与完整响应体：命中时原样返回，不做 JSON 解析与序列化，
+    客户端携带相同 ETag 时返回 304；未命中时调用 loader 获取数据并编码后写入缓存
+    （带防击穿保护，见 RedisClient.get_or_set）。
+    
+    Args:
+        cache_key: 缓存键，为 None 时不缓存
+        loader: 无参函数，返回响应数据（已序列化的 dict/list）
+        ex: 过期时间（秒）
+        msg: 响应消息
+        cache_control: Cache-Control 响应头
+        paginated: 为 True 时 loader 返回 (本页数据, next_cursor)，next_cursor 放在响应外层
+    
+    Returns:
+        (response, status_code) 元组
+    
+    Usage:
+        return cached_success('api:lab:list', lambda: lab_schema.dump(labs(), many=True), ex=600)
+    """
+    def load():
+        # 结果写入共享缓存：刚写入过的表从主库读取，避免把副本上的旧数据缓存到过期
+        with cache_fill():
+            if paginated:
+                data, next_cursor = loader()
+                body = encode_success(data, msg, next_cursor=next_cursor)
+            else:
+                body = encode_success(loader(), msg)
+        return compute_etag(body) + body
+    
+    cached = redis_client.get_or_set(cache_key, load, ex=ex, raw=True)
+    if cached.startswith('{'):
+        # 旧格式缓存（只有响应体）
+        return raw_success(cached, cache_control=cache_control)
+    return raw_success(cached[ETAG_LENGTH:], etag=cached[:ETAG_LENGTH], cache_control=cache_control)
+
+
 def fail(code: int = 400, msg: str = '操作失败', data: Any = None) -> tuple:
     """
     失败响应
@@ -0,0 +1,182 @@
+"""
+Token 吊销
+吊销记录保存在 Redis，各进程用布隆过滤器镜像吊销日志，未被吊销的 token 无需访问 Redis
+"""
+import math
+import threading
+import time
+from typing import Optional
+
+from flask import current_app
+
+from app.utils.bloom import BloomFilter
+from app.utils.redis_client import redis_client
+
+# 单个 token 的吊销标记（值为 1），保留到 token 过期
+REVOKED_JTI_PREFIX = 'auth:revoked:jti:'
+# 用户级吊销标记（值为时间戳，签发时间早于它的 token 全部失效），保留一个 token 有效期
+REVOKED_USER_PREFIX = 'auth:revoked:user:'
+# 吊销日志：成员为 'jti:<jti>' 或 'user:<类型>:<ID>'，分值为吊销时间，各进程按分值增量拉取
+REVOCATION_LOG_KEY = 'auth:revocations'
+# 增量拉取时向前多取的秒数，容忍各进程之间的时钟偏差
+REFRESH_OVERLAP = 5
+
+
+def _max_age() -> int:
+    from app.utils.auth import TOKEN_LIFETIME     # 延迟导入，避免循环依赖
+    return int(TOKEN_LIFETIME.total_seconds())
+
+
+class RevocationList:
+    """
+    进程内的吊销过滤器
+
+    - 过滤器判断"一定未吊销"时直接放行，不访问 Redis（绝大多数请求）
+    - 判断"可能已吊销"时读取 Redis 中的吊销标记确认，排除误判
+    - 每隔 refresh_interval 秒从吊销日志增量拉取其他进程的吊销记录，
+      元素数超过容量时按日志全量重建（日志只保留一个 token 有效期内的记录）
+
+    Args:
+        capacity: 过滤器容量
+        error_rate: 误判率
+        refresh_interval: 增量拉取间隔（秒）
+    """
+
+    def __init__(self, capacity: int, error_rate: float, refresh_interval: float):
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self._filter = BloomFilter(capacity, error_rate)
+        self._since: Optional[float] = None      # 已拉取到的最大吊销时间，None 表示尚未全量加载
+        self._last_refresh = 0.0
+        self._refresh_lock = threading.Lock()
+
+    def add(self, entry: str) -> None:
+        self._filter.add(entry)
+
+    def refresh(self, force: bool = False) -> None:
+        """拉取新的吊销记录（未到间隔或其他线程正在拉取时直接返回）"""
+        if not force and time.monotonic() - self._last_refresh < self.refresh_interval:
+            return
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_refresh = time.monotonic()
+            since = '-inf' if self._since is None else self._since - REFRESH_OVERLAP
+            entries = redis_client.zrangebyscore(REVOCATION_LOG_KEY, since, '+inf', withscores=True)
+            if entries is None:
+                # Redis 不可用：保留现有过滤器，下次再试
+                return
+            if len(self._filter) + len(entries) > self._filter.capacity:
+                self._rebuild()
+                return
+            for member, score in entries:
+                self._filter.add(member)
+                self._since = score if self._since is None else max(self._since, score)
+            if self._since is None:
+                self._since = time.time()
+        finally:
+            self._refresh_lock.release()
+
+    def _rebuild(self) -> None:
+        """按吊销日志全量重建过滤器，容量至少为日志条目数的两倍"""
+        entries = redis_client.zrangebyscore(REVOCATION_LOG_KEY, '-inf', '+inf', withscores=True)
+        if entries is None:
+            return
+        bloom = BloomFilter(max(self._filter.capacity, len(entries) * 2), self.error_rate)
+        for member, _ in entries:
+            bloom.add(member)
+        self._filter = bloom
+        self._since = max((score for _, score in entries), default=time.time())
+
+    def is_revoked(self, payload: dict) -> bool:
+        """
+        token 是否已被吊销
+
+        过滤器命中但 Redis 不可用、无法确认时按已吊销处理
+        """
+        self.refresh()
+        keys = []
+        jti = payload.get('jti')
+        if jti and f'jti:{jti}' in self._filter:
+            keys.append(f'{REVOKED_JTI_PREFIX}{jti}')
+        user_entry = f"user:{payload.get('user_type')}:{payload.get('user_id')}"
+        if user_entry in self._filter:
+            keys.append(f'{REVOKED_USER_PREFIX}{user_entry[5:]}')
+        if not keys:
+            return False
+
+        # 直接读 Redis（不经本地缓存），标记写入后立即可见
+        with redis_client.pipeline() as pipe:
+            for key in keys:
+                pipe.get(key)
+        if pipe.results is None:
+            return True
+        for key, value in zip(keys, pipe.results):
+            if value is None:
+                continue
+            if key.startswith(REVOKED_JTI_PREFIX):
+                return True
+            if payload.get('iat', 0) < float(value):
+                return True
+        return False
+
+
+def _revocations() -> RevocationList:
+    """当前进程的吊销过滤器（首次使用时从 Redis 全量加载）"""
+    revocations = current_app.extensions.get('token_revocations')
+    if revocations is None:
+        config = current_app.config
+        revocations = RevocationList(
+            capacity=config.get('TOKEN_REVOCATION_FILTER_CAPACITY', 100000),
+            error_rate=config.get('TOKEN_REVOCATION_FILTER_ERROR_RATE', 0.001),
+            refresh_interval=config.get('TOKEN_REVOCATION_REFRESH_INTERVAL', 2)
+        )
+        current_app.extensions['token_revocations'] = revocations
+    return revocations
+
+
+def is_revoked(payload: dict) -> bool:
+    """token 载荷是否已被吊销"""
+    return _revocations().is_revoked(payload)
+
+
+def _record(key: str, value, ttl: int, entry: str) -> bool:
+    """写入吊销标记与吊销日志（同一事务），并清理超过 token 有效期的日志"""
+    now = time.time()
+    with redis_client.pipeline(transaction=True) as pipe:
+        pipe.set(key, value, ex=ttl)
+        pipe.zadd(REVOCATION_LOG_KEY, {entry: now})
+        pipe.zremrangebyscore(REVOCATION_LOG_KEY, '-inf', now - _max_age())
+    if pipe.results is None:
+        return False
+    # 本进程立即生效，其他进程在下次增量拉取后生效
+    _revocations().add(entry)
+    return True
+
+
+def revoke_token(payload: dict) -> bool:
+    """
+    吊销单个 token
+
+    Args:
+        payload: token 载荷，需包含 jti 与 exp
+
+    Returns:
+        bool: 是否成功（Redis 不可用时返回 False）
+    """
+    ttl = max(1, math.ceil(payload['exp'] - time.time()))
+    return _record(f"{REVOKED_JTI_PREFIX}{payload['jti']}", 1, ttl, f"jti:{payload['jti']}")
+
+
+def revoke_user(user_type: str, user_id: str) -> bool:
+    """
+    吊销用户此前签发的全部 token
+
+    签发时间（iat，精确到秒）早于下一整秒的 token 均失效，因此吊销后 1 秒内重新登录
+    得到的 token 也会被拒绝
+
+    Returns:
+        bool: 是否成功（Redis 不可用时返回 False）
+    """
+    not_before = int(time.time()) + 1
+    return _record(f'{REVOKED_USER_PREFIX}{user_type}:{user_id}', not_before, _max_age(), f'user:{user_type}:{user_id}')
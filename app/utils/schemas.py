@@ -3,7 +3,7 @@ Schema 基类
 提供 Marshmallow Schema 的基础配置和通用功能
 """
 from marshmallow import Schema, EXCLUDE, INCLUDE, RAISE
-from marshmallow import fields, validates_schema, ValidationError
+from marshmallow import fields, validate, validates_schema, ValidationError
 
 
 class BaseSchema(Schema):
@@ -97,9 +97,9 @@ class BaseUpdateSchema(BaseSchema):
 
 # 常用字段类型（可选，方便使用）
 class PaginationSchema(BaseQuerySchema):
-    """分页参数 Schema"""
-    page = fields.Integer(missing=1, validate=lambda x: x > 0, error_messages={'invalid': '页码必须为正整数'})
-    per_page = fields.Integer(missing=10, validate=lambda x: 0 < x <= 100, error_messages={'invalid': '每页数量必须在1-100之间'})
+    """游标分页参数 Schema（cursor 为上一页响应中的 next_cursor，不传表示第一页）"""
+    cursor = fields.String(missing=None, validate=validate.Length(min=1, max=512, error='cursor 无效'))
+    per_page = fields.Integer(missing=20, validate=validate.Range(min=1, max=100, error='每页数量必须在1-100之间'), error_messages={'invalid': '每页数量必须在1-100之间'})
 
 
 class IDSchema(BaseQuerySchema):
@@ -0,0 +1,144 @@
+"""
+Schema 序列化编译器
+将响应 Schema 编译为专用的序列化函数，一次遍历完成取值、格式化与 None 过滤，
+输出与 BaseSchema.dump 完全一致
+"""
+from typing import Callable, Optional
+
+from marshmallow import fields, missing, utils
+from marshmallow.schema import Schema
+
+from app.utils.schemas import BaseSchema
+
+# 按类精确匹配（子类可能改写格式化逻辑，走通用路径）
+_TEMPORAL_FIELDS = (fields.DateTime, fields.Date, fields.Time)
+
+
+class Serializer:
+    """
+    编译后的序列化器
+
+    调用方式与 schema.dump 相同：serializer(obj) / serializer(objs, many=True)
+
+    Attributes:
+        schema: 来源 Schema 实例
+        source: 生成的函数源码（便于排查）
+    """
+
+    def __init__(self, schema: BaseSchema, dump_object: Callable, dump_mapping: Callable, source: str):
+        self.schema = schema
+        self.source = source
+        self._dump_object = dump_object
+        self._dump_mapping = dump_mapping
+
+    def dump_one(self, obj) -> dict:
+        # 与 marshmallow 的取值规则一致：dict 按键取值，ORM 对象与 Row 按属性取值，
+        # 其他可下标访问的对象（少见）交给 schema.dump 保证结果一致
+        if isinstance(obj, dict):
+            return self._dump_mapping(obj)
+        if hasattr(obj, '__getitem__') and not hasattr(obj, '_fields'):
+            return self.schema.dump(obj)
+        return self._dump_object(obj)
+
+    def __call__(self, obj, many: bool = False):
+        if many:
+            dump_one = self.dump_one
+            return [dump_one(item) for item in obj]
+        return self.dump_one(obj)
+
+
+def _has_dump_hooks(schema: Schema) -> bool:
+    # _hooks 为 defaultdict，dump 过程中会写入空列表，需判断是否真有钩子
+    return any(tag in ('pre_dump', 'post_dump') and hooks for (tag, _), hooks in schema._hooks.items())
+
+
+def _field_source(index: int, name: str, field: fields.Field, namespace: dict) -> Optional[str]:
+    """
+    生成单个字段的格式化表达式（v 为取到的非 None 值）
+
+    Returns:
+        str: 格式化表达式；返回 None 表示走字段自身的 serialize
+    """
+    if field.dump_default is not missing or not field._CHECK_ATTRIBUTE:
+        namespace[f'_serialize_{index}'] = field.serialize
+        return None
+
+    cls = type(field)
+    if cls is fields.Integer and not field.as_string:
+        return 'int(v)'
+    if cls is fields.String:
+        namespace['_text'] = utils.ensure_text_type
+        return 'v if v.__class__ is str else _text(v)'
+    if cls in _TEMPORAL_FIELDS:
+        data_format = field.format or cls.DEFAULT_FORMAT
+        format_func = cls.SERIALIZATION_FUNCS.get(data_format)
+        if format_func is None:
+            return f'v.strftime({data_format!r})'
+        namespace[f'_format_{index}'] = format_func
+        return f'_format_{index}(v)'
+    if isinstance(field, fields.Number):
+        namespace[f'_format_{index}'] = field._serialize
+        return f'_format_{index}(v, {name!r}, obj)'
+    namespace[f'_serialize_{index}'] = field.serialize
+    return None
+
+
+def _build(schema: BaseSchema, access: str, namespace: dict) -> list:
+    """生成函数体，access 为取值模板（{attr} 为属性名）"""
+    lines = ['    out = {}']
+    for index, (field_name, field) in enumerate(schema.dump_fields.items()):
+        key = field.data_key if field.data_key is not None else field_name
+        attr = field.attribute or field_name
+        expression = _field_source(index, attr, field, namespace)
+        if expression is None:
+            # 通用路径：交给字段自身序列化，再按原有规则递归过滤 None
+            lines.append(f'    v = _serialize_{index}({attr!r}, obj, accessor=_get_attribute)')
+            lines.append('    if v is not None and v is not _missing:')
+            lines.append(f'        out[{key!r}] = _filter_none(v)')
+        elif '.' in attr:
+            lines.append(f'    v = _get_attribute(obj, {attr!r}, None)')
+            lines.append('    if v is not None and v is not _missing:')
+            lines.append(f'        out[{key!r}] = {expression}')
+        else:
+            lines.append(f'    v = {access.format(attr=attr)}')
+            lines.append('    if v is not None:')
+            lines.append(f'        out[{key!r}] = {expression}')
+    lines.append('    return out')
+    return lines
+
+
+def compile_serializer(schema: BaseSchema) -> Callable:
+    """
+    将 Schema 实例编译为序列化函数
+
+    BaseSchema.dump 先由 marshmallow 逐字段调用 serialize，再由 _filter_none 递归重建一遍
+    结果；编译后的函数直接按字段生成取值与格式化语句，值为 None 的字段不写入，只遍历一次。
+    Integer、String、DateTime/Date/Time 内联格式化，Decimal 等数值字段调用字段自身的格式化，
+    其余字段（Nested、List 等）走字段自身的 serialize。含 pre_dump/post_dump 钩子或改写了
+    get_attribute 的 Schema 无法编译，直接返回 schema.dump。
+
+    Args:
+        schema: Schema 实例（only/exclude 等选项会被一并编译）
+
+    Returns:
+        Callable: serializer(obj) / serializer(objs, many=True)
+
+    Usage:
+        equipment_serializer = compile_serializer(EquipmentSchema())
+        data = equipment_serializer(page.items, many=True)
+    """
+    if _has_dump_hooks(schema) or type(schema).get_attribute is not Schema.get_attribute:
+        return schema.dump
+
+    namespace = {
+        '_get_attribute': schema.get_attribute,
+        '_filter_none': BaseSchema._filter_none,
+        '_missing': missing,
+    }
+    body_object = _build(schema, 'getattr(obj, {attr!r}, None)', namespace)
+    body_mapping = _build(schema, 'obj.get({attr!r})', namespace)
+    source = '\n'.join(
+        ['def dump_object(obj):', *body_object, '', '', 'def dump_mapping(obj):', *body_mapping]
+    )
+    exec(compile(source, f'<serializer {type(schema).__name__}>', 'exec'), namespace)
+    return Serializer(schema, namespace['dump_object'], namespace['dump_mapping'], source)
@@ -0,0 +1,28 @@
+"""
+数据库会话工具
+"""
+
+
+def commit_keep_loaded() -> None:
+    """
+    提交当前事务，提交后不让会话中的对象过期
+
+    会话默认 expire_on_commit=True，提交后再访问对象属性会重新 SELECT 一次。写接口提交后
+    立即序列化并返回刚写入的对象，属性值就是本事务写入的值（主键由 INSERT 返回，模型默认值
+    都在 Python 端生成，INSERT 时已填入对象），无需重新读取，因此只对这次提交关闭过期。
+
+    注意：数据库端生成的值（server_default、触发器等）不会回填，新增此类列时需在模型上
+    设置 eager_defaults 或改回普通提交。
+
+    Raises:
+        Exception: 提交失败时原样抛出，由调用方回滚
+    """
+    from app import db     # 延迟导入，避免循环依赖
+
+    session = db.session()
+    previous = session.expire_on_commit
+    session.expire_on_commit = False
+    try:
+        session.commit()
+    finally:
+        session.expire_on_commit = previous
@@ -0,0 +1,104 @@
+"""
+SQL 语句计数
+统计每个请求执行的 SQL 语句数，用于发现 N+1 查询与提交后的重复读取
+"""
+import threading
+from contextlib import contextmanager
+
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+STATEMENT_COUNT_HEADER = 'X-SQL-Statements'
+
+_local = threading.local()
+_installed = False
+
+
+class StatementCounter:
+    """一段代码执行的 SQL 语句（statements 为语句文本，按执行顺序）"""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+def _active() -> list:
+    counters = getattr(_local, 'counters', None)
+    if counters is None:
+        counters = _local.counters = []
+    return counters
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    for counter in _active():
+        counter.statements.append(statement)
+
+
+def _install() -> None:
+    """在所有引擎上注册监听（进程内只注册一次）"""
+    global _installed
+    if not _installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        _installed = True
+
+
+@contextmanager
+def count_statements():
+    """
+    统计 with 块内当前线程执行的 SQL 语句
+
+    Usage:
+        with count_statements() as counter:
+            client.post('/api/v1/admin/equipments', json=data, headers=headers)
+        assert counter.count <= 3, counter.statements
+    """
+    _install()
+    counter = StatementCounter()
+    counters = _active()
+    counters.append(counter)
+    try:
+        yield counter
+    finally:
+        counters.remove(counter)
+
+
+def _start_request_counter():
+    counter = StatementCounter()
+    _active().append(counter)
+    g.sql_statement_counter = counter
+
+
+def _finish_request_counter(response):
+    counter = g.get('sql_statement_counter')
+    if counter is None:
+        return response
+    response.headers[STATEMENT_COUNT_HEADER] = str(counter.count)
+    threshold = current_app.config.get('SQL_STATEMENT_WARN_THRESHOLD', 0)
+    if threshold and counter.count > threshold:
+        current_app.logger.warning(
+            f'SQL 语句过多: {request.method} {request.path} 执行了 {counter.count} 条'
+        )
+    return response
+
+
+def _stop_request_counter(exc=None):
+    counter = g.pop('sql_statement_counter', None)
+    if counter is not None and counter in _active():
+        _active().remove(counter)
+
+
+def init_app(app) -> None:
+    """
+    SQL_STATEMENT_COUNT 为 True 时统计每个请求的 SQL 语句数，写入响应头 X-SQL-Statements，
+    超过 SQL_STATEMENT_WARN_THRESHOLD（大于 0 时）记录警告日志
+    """
+    if not app.config.get('SQL_STATEMENT_COUNT', False):
+        return
+    _install()
+    app.before_request(_start_request_counter)
+    app.after_request(_finish_request_counter)
+    app.teardown_request(_stop_request_counter)
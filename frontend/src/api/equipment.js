@@ -1,18 +1,19 @@
 import request from './request'
+import { fetchAllPages } from './pagination'
 
 /**
  * 设备 API
  */
 
 /**
- * 获取设备列表
+ * 获取设备列表（一页）
  * @param {object} params - 查询参数
  * @param {number} params.lab_id - 实验室ID（可选）
  * @param {string} params.keyword - 关键词搜索（可选）
  * @param {string} params.category - 设备类别（可选）
  * @param {string} params.status - 设备状态（可选）
- * @param {number} params.page - 页码（可选）
- * @param {number} params.page_size - 每页数量（可选）
+ * @param {string} params.cursor - 上一页响应中的 next_cursor（可选）
+ * @param {number} params.per_page - 每页数量，1-100，默认 20（可选）
  */
 export function getEquipmentList(params = {}) {
   return request({
@@ -22,6 +23,14 @@ export function getEquipmentList(params = {}) {
   })
 }
 
+/**
+ * 获取符合条件的全部设备（按 next_cursor 逐页读取）
+ * @param {object} params - 筛选条件，同 getEquipmentList（不含 cursor、per_page）
+ */
+export function getAllEquipment(params = {}) {
+  return fetchAllPages('/equipments/', params)
+}
+
 /**
  * 获取设备详情
  * @param {number} id - 设备ID
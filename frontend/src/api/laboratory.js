@@ -1,19 +1,31 @@
 import request from './request'
+import { fetchAllPages } from './pagination'
 
 /**
  * 实验室 API
  */
 
 /**
- * 获取实验室列表
+ * 获取实验室列表（一页）
+ * @param {object} params - 分页参数
+ * @param {string} params.cursor - 上一页响应中的 next_cursor（可选）
+ * @param {number} params.per_page - 每页数量，1-100，默认 20（可选）
  */
-export function getLabList() {
+export function getLabList(params = {}) {
   return request({
     url: '/laboratories/',
-    method: 'get'
+    method: 'get',
+    params
   })
 }
 
+/**
+ * 获取全部实验室（按 next_cursor 逐页读取）
+ */
+export function getAllLabs() {
+  return fetchAllPages('/laboratories/')
+}
+
 /**
  * 获取单个实验室详情
  */
@@ -0,0 +1,29 @@
+import request from './request'
+
+/**
+ * 游标分页
+ * 列表接口每次最多返回 per_page 条，响应中的 next_cursor 为下一页游标（没有下一页时为 null）
+ */
+
+// 后端允许的每页最大数量
+const MAX_PER_PAGE = 100
+
+/**
+ * 按 next_cursor 逐页读取，返回全部记录
+ * @param {string} url - 列表接口地址
+ * @param {object} params - 查询参数（不含 cursor、per_page）
+ */
+export async function fetchAllPages(url, params = {}) {
+  const items = []
+  let cursor = null
+  do {
+    const res = await request({
+      url,
+      method: 'get',
+      params: { ...params, per_page: MAX_PER_PAGE, ...(cursor ? { cursor } : {}) }
+    })
+    items.push(...(res.data || []))
+    cursor = res.next_cursor
+  } while (cursor)
+  return items
+}
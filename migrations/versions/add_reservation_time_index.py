@@ -0,0 +1,30 @@
+"""Add reservation time range index - 添加预约时间区间索引
+
+Revision ID: add_resv_time_idx
+Revises: fa98e6e70c2d
+Create Date: 2026-01-10 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_resv_time_idx'
+down_revision = 'fa98e6e70c2d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ### 为 reservation 表添加 (equip_id, start_time, end_time) 组合索引 ###
+    # 用于创建预约时的时间冲突检测：预约时长有上限（RESERVATION_MAX_HOURS），
+    # 按设备和 [新开始时间 - 最长时长, 新结束时间) 的开始时间范围扫描，不随历史预约数量增长
+    op.create_index('idx_reservation_equip_time', 'reservation',
+                    ['equip_id', 'start_time', 'end_time'],
+                    unique=False)
+
+
+def downgrade():
+    # ### 删除预约时间区间索引 ###
+    op.drop_index('idx_reservation_equip_time', table_name='reservation')
@@ -0,0 +1,72 @@
+"""
+测试公共夹具
+使用 testing 配置：SQLite 内存库 + 进程内缓存后端，不依赖 MySQL/TiDB 与 Redis
+"""
+from datetime import time
+
+import pytest
+from sqlalchemy import BigInteger
+from sqlalchemy.ext.compiler import compiles
+from werkzeug.security import generate_password_hash
+
+from app import create_app, db
+from app.models import Admin, Equipment, Laboratory, Student, Teacher, TimeSlot
+
+PASSWORD = '123456'
+
+
+@compiles(BigInteger, 'sqlite')
+def _sqlite_big_integer(type_, compiler, **kw):
+    # SQLite 只有 INTEGER PRIMARY KEY 才会自增，BIGINT 主键需按 INTEGER 建表
+    return 'INTEGER'
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    # 预约蓝图尚未在 api_v1 中注册，测试中单独挂载
+    from app.api.v1.reservation import reservation_bp
+    app.register_blueprint(reservation_bp, url_prefix='/api/v1/reservations')
+
+    with app.app_context():
+        db.create_all(bind_key=None)
+        db.session.add(Laboratory(id=1, name='实验室1', location='A101'))
+        db.session.add(Admin(id='admin', name='管理员', manage_scope=1,
+                             password_hash=generate_password_hash(PASSWORD)))
+        db.session.add(Teacher(id='T001', name='教师', lab_id=1,
+                               password_hash=generate_password_hash(PASSWORD)))
+        db.session.add(Student(id='S001', name='学生', lab_id=1, lab_name='实验室1',
+                               password_hash=generate_password_hash(PASSWORD)))
+        db.session.add(Equipment(id=1, name='示波器', lab_id=1, category=2, status=1))
+        db.session.add(TimeSlot(slot_id=1, equip_id=1, start_time=time(8), end_time=time(9), is_active=1))
+        db.session.commit()
+        db.session.remove()
+    # 不在整个测试期间保持应用上下文：每个请求各自推入上下文，会话与 g 不会跨请求保留
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all(bind_key=None)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, user_id, user_type):
+    """登录并返回带 token 的请求头"""
+    resp = client.post('/api/v1/auth/login', json={
+        'username': user_id, 'password': PASSWORD, 'user_type': user_type
+    })
+    token = resp.get_json()['data']['token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def admin_headers(client):
+    return login(client, 'admin', 'admin')
+
+
+@pytest.fixture
+def student_headers(client):
+    return login(client, 'S001', 'student')
@@ -0,0 +1,45 @@
+"""
+列表接口的游标分页（前端按 next_cursor 逐页读取全部记录，见 frontend/src/api/pagination.js）
+"""
+from app import db
+from app.models import Laboratory
+
+
+def _add_labs(app, count):
+    with app.app_context():
+        db.session.add_all([Laboratory(name=f'实验室{i}', location=f'B{i}') for i in range(2, count + 1)])
+        db.session.commit()
+
+
+def _fetch_all(client, url, per_page):
+    ids, cursor, pages = [], None, 0
+    while True:
+        params = {'per_page': per_page}
+        if cursor:
+            params['cursor'] = cursor
+        body = client.get(url, query_string=params).get_json()
+        assert body['code'] == 200, body
+        ids.extend(item['id'] for item in body['data'])
+        pages += 1
+        cursor = body['next_cursor']
+        if not cursor:
+            return ids, pages
+
+
+def test_default_page_size_returns_next_cursor(app, client):
+    _add_labs(app, 25)
+    body = client.get('/api/v1/laboratories/').get_json()
+    assert len(body['data']) == 20
+    assert body['next_cursor']
+
+
+def test_following_next_cursor_returns_every_row(app, client):
+    _add_labs(app, 25)
+    ids, pages = _fetch_all(client, '/api/v1/laboratories/', per_page=10)
+    assert ids == list(range(1, 26))
+    assert pages == 3
+
+
+def test_invalid_cursor_rejected(client):
+    resp = client.get('/api/v1/laboratories/', query_string={'cursor': 'not-a-cursor'})
+    assert resp.get_json()['code'] == 422
@@ -0,0 +1,41 @@
+"""
+连接池指标
+"""
+from sqlalchemy import create_engine, text
+
+from app.utils.pool_metrics import instrumented_pool_class
+
+
+def _engine(tmp_path):
+    # idle_ping_seconds=0：每次取连接都探活
+    return create_engine(f"sqlite:///{tmp_path / 'pool.db'}",
+                         poolclass=instrumented_pool_class(0), pool_size=1, max_overflow=0)
+
+
+def _use_connection(engine):
+    with engine.connect() as conn:
+        conn.execute(text('SELECT 1'))
+
+
+def test_counts_once_per_connection(tmp_path):
+    engine = _engine(tmp_path)
+    _use_connection(engine)
+    stats = engine.pool.status_dict()
+    assert stats['connects'] == 1
+    assert stats['pings'] == 1
+    assert stats['checkouts'] == 1
+
+
+def test_dispose_keeps_single_listener_set(tmp_path):
+    engine = _engine(tmp_path)
+    _use_connection(engine)
+    for _ in range(2):
+        engine.dispose()
+        before = engine.pool.status_dict()
+        _use_connection(engine)
+        after = engine.pool.status_dict()
+        # dispose 后累计指标保留，新连接仍只计一次
+        assert after['connects'] - before['connects'] == 1
+        assert after['pings'] - before['pings'] == 1
+        assert after['checkouts'] - before['checkouts'] == 1
+    assert engine.pool.status_dict()['connects'] == 3
@@ -0,0 +1,43 @@
+"""
+登录限流
+"""
+import pytest
+
+from config import config
+
+
+@pytest.fixture(autouse=True)
+def _behind_proxy(monkeypatch):
+    # 在 app 夹具创建应用之前生效：一层反向代理
+    monkeypatch.setattr(config['testing'], 'TRUSTED_PROXY_HOPS', 1)
+
+
+@pytest.fixture
+def limited_client(app, client):
+    app.config['RATE_LIMIT_ENABLED'] = True
+    app.config['RATE_LIMIT_LOGIN'] = '2/60'
+    return client
+
+
+def _login(client, username, forwarded_for='10.0.0.1'):
+    return client.post('/api/v1/auth/login', json={
+        'username': username, 'password': 'wrong', 'user_type': 'student'
+    }, headers={'X-Forwarded-For': forwarded_for})
+
+
+def test_login_limited_per_username(limited_client):
+    assert _login(limited_client, 'S001').status_code != 429
+    assert _login(limited_client, 'S001').status_code != 429
+    resp = _login(limited_client, 'S001')
+    assert resp.status_code == 429
+    assert int(resp.headers['Retry-After']) >= 1
+    # 同一出口 IP 下的其他账号不受影响
+    assert _login(limited_client, 'S002').status_code != 429
+
+
+def test_login_limited_per_client_ip_behind_proxy(limited_client):
+    for _ in range(2):
+        _login(limited_client, 'S001', forwarded_for='10.0.0.1')
+    assert _login(limited_client, 'S001', forwarded_for='10.0.0.1').status_code == 429
+    # 代理转发的客户端地址不同，各自计数
+    assert _login(limited_client, 'S001', forwarded_for='10.0.0.2').status_code != 429
@@ -0,0 +1,69 @@
+"""
+读写分离：主库与只读副本各用一个 SQLite 文件，副本不同步写入（相当于复制延迟无限大）
+"""
+import time
+
+import pytest
+
+from app import db
+from app.models import Laboratory
+from app.utils.redis_client import redis_client
+from config import _replica_binds, config
+
+
+@pytest.fixture(autouse=True)
+def _two_databases(monkeypatch, tmp_path):
+    # 在 app 夹具创建应用之前生效
+    monkeypatch.setattr(config['testing'], 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'primary.db'}")
+    monkeypatch.setattr(config['testing'], 'SQLALCHEMY_BINDS', _replica_binds(f"sqlite:///{tmp_path / 'replica.db'}"))
+
+
+@pytest.fixture
+def replica(app):
+    """副本建表并复制主库的实验室数据"""
+    with app.app_context():
+        engine = db.engines['replica_0']
+        db.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(Laboratory.__table__.insert(), [
+                {'id': lab.id, 'name': lab.name, 'location': lab.location}
+                for lab in Laboratory.query.all()
+            ])
+        # 清除初始化数据留下的写入标记
+        redis_client.delete(*(f'db:written:{table}' for table in db.metadata.tables))
+    yield engine
+    db.metadata.drop_all(engine)
+
+
+def _lab_names(client, **params):
+    body = client.get('/api/v1/laboratories/', query_string=params).get_json()
+    assert body['code'] == 200, body
+    return [lab['name'] for lab in body['data']]
+
+
+def test_list_reads_from_replica(client, replica):
+    with replica.begin() as conn:
+        conn.execute(Laboratory.__table__.insert(), {'id': 99, 'name': '仅副本', 'location': 'R1'})
+    assert '仅副本' in _lab_names(client)
+
+
+def test_cache_not_filled_from_lagging_replica(app, client, replica):
+    assert _lab_names(client) == ['实验室1']
+
+    resp = client.post('/api/v1/laboratories/', json={'name': '新实验室', 'location': 'C301'})
+    assert resp.get_json()['code'] == 200
+
+    # 另一个客户端（不在写入者的粘滞窗口内）的未命中从主库填充缓存，缓存命中后同样是新数据
+    other = app.test_client()
+    assert _lab_names(other) == ['实验室1', '新实验室']
+    assert _lab_names(other) == ['实验室1', '新实验室']
+
+
+def test_write_marker_expires_after_sticky_window(app, client, replica):
+    app.config['DB_REPLICA_STICKY_SECONDS'] = 1
+    client.post('/api/v1/laboratories/', json={'name': '新实验室', 'location': 'C301'})
+    assert redis_client.get('db:written:laboratory') is not None
+
+    time.sleep(1.2)
+    # 窗口过后重新走副本（副本仍未同步，看不到新实验室）
+    assert _lab_names(app.test_client(), per_page=50) == ['实验室1']
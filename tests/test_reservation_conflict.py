@@ -0,0 +1,61 @@
+"""
+预约时间冲突检测
+"""
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.models import Reservation
+from app.services import reservation_service
+from app.utils.exceptions import ValidationError
+
+STUDENT = {'user_id': 'S001', 'user_type': 'student'}
+
+
+def _create(start_hour, end_hour, day=1):
+    return reservation_service.create_reservation({
+        'equip_id': 1,
+        'start_time': datetime(2026, 5, day, start_hour),
+        'end_time': datetime(2026, 5, day, end_hour)
+    }, dict(STUDENT))
+
+
+def test_adjacent_reservations_do_not_conflict(app):
+    with app.test_request_context():
+        _create(8, 9)
+        assert _create(9, 10).id
+
+
+def test_detects_overlap_with_existing_double_booking(app):
+    with app.test_request_context():
+        # 历史数据中已有相互重叠的预约 [1, 10) 与 [2, 3)
+        db.session.add_all([
+            Reservation(equip_id=1, student_id='S001', status=0,
+                        start_time=datetime(2026, 5, 1, 1), end_time=datetime(2026, 5, 1, 10)),
+            Reservation(equip_id=1, student_id='S001', status=0,
+                        start_time=datetime(2026, 5, 1, 2), end_time=datetime(2026, 5, 1, 3)),
+        ])
+        db.session.commit()
+        with pytest.raises(ValidationError) as exc:
+            _create(5, 6)
+        assert exc.value.payload['conflict_reservation_id'] == 1
+
+
+def test_detects_overlap_with_reservation_starting_a_day_earlier(app):
+    with app.test_request_context():
+        reservation_service.create_reservation({
+            'equip_id': 1,
+            'start_time': datetime(2026, 5, 1, 9),
+            'end_time': datetime(2026, 5, 2, 8)
+        }, dict(STUDENT))
+        with pytest.raises(ValidationError):
+            _create(7, 8, day=2)
+
+
+def test_rejects_reservation_longer_than_max_duration(app):
+    app.config['RESERVATION_MAX_HOURS'] = 2
+    with app.test_request_context():
+        with pytest.raises(ValidationError) as exc:
+            _create(8, 11)
+        assert exc.value.payload == {'field': 'time_range'}
@@ -0,0 +1,53 @@
+"""
+管理员导出预约记录
+"""
+import csv
+import io
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.models import Reservation
+
+
+@pytest.fixture
+def reservations(app):
+    with app.app_context():
+        db.session.add_all([
+            Reservation(equip_id=1, student_id='S001', status=status, apply_time=datetime(2026, 4, 1),
+                        start_time=datetime(2026, 5, day, 8), end_time=datetime(2026, 5, day, 9))
+            for day, status in [(1, 0), (2, 1), (3, 1)]
+        ])
+        db.session.commit()
+
+
+def _export(client, headers, **params):
+    resp = client.get('/api/v1/admin/reservations/export', query_string=params, headers=headers)
+    assert resp.status_code == 200, resp.get_data(as_text=True)
+    assert resp.mimetype == 'text/csv'
+    return list(csv.DictReader(io.StringIO(resp.get_data(as_text=True).lstrip('﻿'))))
+
+
+def test_export_all_reservations(client, admin_headers, reservations):
+    rows = _export(client, admin_headers)
+    assert [row['id'] for row in rows] == ['1', '2', '3']
+    assert rows[0]['start_time'] == '2026-05-01T08:00:00'
+    assert rows[0]['teacher_id'] == ''
+
+
+def test_export_filters(client, admin_headers, reservations):
+    assert [row['id'] for row in _export(client, admin_headers, status=1)] == ['2', '3']
+    rows = _export(client, admin_headers, start_date='2026-05-02', end_date='2026-05-02')
+    assert [row['id'] for row in rows] == ['2']
+
+
+def test_export_requires_admin(client, student_headers):
+    resp = client.get('/api/v1/admin/reservations/export', headers=student_headers)
+    assert resp.status_code == 403
+
+
+def test_export_rejects_invalid_date(client, admin_headers):
+    resp = client.get('/api/v1/admin/reservations/export', query_string={'start_date': '2026/05/01'},
+                      headers=admin_headers)
+    assert resp.get_json()['code'] == 422
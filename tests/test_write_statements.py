@@ -0,0 +1,45 @@
+"""
+写接口的 SQL 语句数
+写入后直接返回本事务写入的值，不在提交后重新读取对象（见 app/utils/session.py）；
+语句数增加通常意味着引入了提交后的重复读取或 N+1 查询
+"""
+from app.utils.statement_counter import STATEMENT_COUNT_HEADER
+
+
+def _statements(resp):
+    assert resp.status_code == 200, resp.get_json()
+    return int(resp.headers[STATEMENT_COUNT_HEADER])
+
+
+def test_create_reservation(client, student_headers):
+    resp = client.post('/api/v1/reservations/', json={
+        'equip_id': 1,
+        'start_time': '2026-05-01T08:00:00',
+        'end_time': '2026-05-01T09:00:00'
+    }, headers=student_headers)
+    # 设备状态、冲突检测、INSERT（申请人姓名取自登录时写入的用户信息缓存）
+    assert _statements(resp) == 3
+    assert resp.get_json()['data']['start_time'] == '2026-05-01T08:00:00'
+
+
+def test_admin_create_equipment(client, admin_headers):
+    resp = client.post('/api/v1/admin/equipments', json={
+        'name': '新设备', 'lab_id': 1, 'category': 2
+    }, headers=admin_headers)
+    # 实验室存在性检查、INSERT
+    assert _statements(resp) == 2
+    assert resp.get_json()['data']['name'] == '新设备'
+
+
+def test_admin_update_equipment(client, admin_headers):
+    resp = client.put('/api/v1/admin/equipments/1', json={'name': '改名'}, headers=admin_headers)
+    # 读取设备、UPDATE
+    assert _statements(resp) == 2
+    assert resp.get_json()['data']['name'] == '改名'
+
+
+def test_update_timeslot(client, admin_headers):
+    resp = client.put('/api/v1/admin/timeslots/1', json={'end_time': '10:00'}, headers=admin_headers)
+    # 读取时间段、时间段冲突检测、UPDATE
+    assert _statements(resp) == 3
+    assert resp.get_json()['data']['end_time'] == '10:00:00'